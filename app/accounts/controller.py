@@ -1,14 +1,17 @@
 # app/accounts/controller.py
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date
 
 from database import get_db
 from . import service, model
-# Importa o 'get_current_user' para proteger as rotas
-from app.auth.service import get_current_user, require_role
-# Importa o 'User' do SQLAlchemy e 'UserPublic' do Pydantic
-from app.users.model import User as SQLAlchemyUser, UserPublic
+from app.currency.model import NetWorth
+from app.users.model import CurrencyType
+from pagination import MAX_PAGE_SIZE, set_next_cursor
+from streaming import ExportFormat
+# Importa o 'get_current_principal' para proteger as rotas
+from app.auth.service import Principal, get_current_principal, require_role
 
 # Este é o NOVO controller, agora protegido e usando SQLAlchemy
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
@@ -17,22 +20,21 @@ router = APIRouter(prefix="/accounts", tags=["Accounts"])
 def create_account(
     account: model.AccountCreate, 
     db: Session = Depends(get_db), 
-    # CORREÇÃO: Usar o 'UserPublic' como o tipo da dependência
-    # O 'get_current_user' ainda retorna o modelo SQLAlchemy,
-    # mas o FastAPI vai convertê-lo para 'UserPublic' para nós.
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    # 'Principal' traz apenas a identidade do usuário logado (id, role, moeda),
+    # sem precisar carregar o usuário inteiro do banco.
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Cria uma nova conta para o usuário logado.
     """
     # Passa o ID do usuário logado para o serviço
     # Agora 'current_user.id' é corretamente tipado como 'int'
-    return service.create_new_account(db=db, account=account, id_user=current_user.id)
+    return service.create_new_account(db=db, account=account, id_user=current_user.id, moeda=current_user.moeda)
 
 @router.get("/", response_model=List[model.AccountPublic])
 def list_accounts_for_current_user(
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção e CORREÇÃO
+    current_user: Principal = Depends(get_current_principal) # <- Proteção e CORREÇÃO
 ):
     """
     Lista todas as contas pertencentes ao usuário logado.
@@ -40,11 +42,23 @@ def list_accounts_for_current_user(
     # Agora 'current_user.id' é corretamente tipado como 'int'
     return service.get_all_accounts_for_user(db=db, id_user=current_user.id)
 
+@router.get("/net-worth", response_model=NetWorth)
+def get_net_worth(
+    moeda: CurrencyType | None = Query(default=None, description="Moeda do total (padrão: a do usuário)"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Patrimônio do usuário logado: saldo de todas as contas convertido para uma
+    moeda com as cotações do dia, com o subtotal de cada moeda.
+    """
+    return service.get_net_worth(db=db, id_user=current_user.id, moeda=moeda or current_user.moeda)
+
 @router.get("/{id_account}", response_model=model.AccountPublic)
 def get_account(
     id_account: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção e CORREÇÃO
+    current_user: Principal = Depends(get_current_principal) # <- Proteção e CORREÇÃO
 ):
     """
     Busca uma conta específica do usuário logado pelo ID.
@@ -52,12 +66,30 @@ def get_account(
     # Agora 'current_user.id' é corretamente tipado como 'int'
     return service.get_account_by_id(db=db, id_account=id_account, id_user=current_user.id)
 
+@router.get("/{id_account}/balance-history", response_model=model.BalanceHistory)
+def get_balance_history(
+    id_account: int,
+    inicio: date | None = Query(default=None, alias="from", description="Data inicial (padrão: 1 ano antes de 'to')"),
+    fim: date | None = Query(default=None, alias="to", description="Data final (padrão: hoje)"),
+    granularity: model.HistoryGranularity = model.HistoryGranularity.DAY,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Evolução do saldo da conta: saldo no fim de cada dia/semana/mês do intervalo,
+    em duas listas paralelas ('datas' e 'saldos').
+    """
+    return service.get_balance_history(
+        db=db, id_account=id_account, id_user=current_user.id,
+        granularity=granularity, inicio=inicio, fim=fim,
+    )
+
 @router.put("/{id_account}", response_model=model.AccountPublic)
 def update_account(
     id_account: int, 
     account_in: model.AccountUpdate, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção e CORREÇÃO
+    current_user: Principal = Depends(get_current_principal) # <- Proteção e CORREÇÃO
 ):
     """
     Atualiza uma conta do usuário logado (nome ou limite de crédito).
@@ -69,7 +101,7 @@ def update_account(
 def delete_account(
     id_account: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção e CORREÇÃO
+    current_user: Principal = Depends(get_current_principal) # <- Proteção e CORREÇÃO
 ):
     """
     Deleta uma conta do usuário logado.
@@ -83,10 +115,58 @@ def delete_account(
 
 @router.get("/admin/all", response_model=List[model.AccountPublic])
 def list_all_accounts_admin(
+    response: Response,
+    usuario_id: int | None = None,
+    moeda: CurrencyType | None = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    cursor: str | None = Query(default=None, description="Valor do header X-Next-Cursor da página anterior"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Lista as contas de todos os usuários em ordem de id (apenas para admin).
+    Filtros opcionais: usuario_id, moeda. Se houver mais, o header X-Next-Cursor
+    traz o 'cursor' da próxima página (repita os mesmos filtros). Para tudo de uma vez, use /admin/export.
+    """
+    items, next_cursor = service.get_all_accounts_admin(
+        db=db, limit=limit, cursor=cursor, id_user=usuario_id, moeda=moeda
+    )
+    set_next_cursor(response, next_cursor)
+    return items
+
+@router.get("/admin/export")
+def export_accounts_admin(
+    formato: ExportFormat = ExportFormat.NDJSON,
+    usuario_id: int | None = None,
+    moeda: CurrencyType | None = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Exporta as contas de todos os usuários em NDJSON (ou CSV), em streaming
+    (aceita os mesmos filtros da listagem; apenas para admin).
+    """
+    return service.export_accounts_admin(db=db, formato=formato, id_user=usuario_id, moeda=moeda)
+
+@router.get("/admin/net-worth", response_model=NetWorth)
+def get_net_worth_admin(
+    moeda: CurrencyType | None = Query(default=None, description="Moeda do total (padrão: a moeda base das cotações)"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Soma do saldo de todas as contas de todos os usuários, convertida para uma moeda (apenas para admin).
+    """
+    return service.get_net_worth_admin(db=db, moeda=moeda)
+
+@router.post("/admin/reconcile", response_model=model.ReconciliationReport)
+def reconcile_balances_admin(
+    corrigir: bool = False,
     db: Session = Depends(get_db),
-    current_user: SQLAlchemyUser = Depends(require_role("admin"))
+    current_user: Principal = Depends(require_role("admin"))
 ):
     """
-    Lista todas as contas de todos os usuários (apenas para admin).
+    Recalcula o saldo de todas as contas (saldo inicial + transações + transferências)
+    e lista as diferenças. Com '?corrigir=true', reescreve o saldo das contas com diferença.
     """
-    return service.get_all_accounts_admin(db=db)
\ No newline at end of file
+    return service.reconcile_balances_admin(db=db, corrigir=corrigir)
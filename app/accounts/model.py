@@ -1,9 +1,11 @@
 # app/accounts/model.py
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field, ConfigDict
 from database import Base
 import enum
+from app.users.model import CurrencyType
+from datetime import date
 
 # 1. Cria o Enum para os tipos de conta (baseado no Informações_Úteis.txt)
 class AccountType(str, enum.Enum):
@@ -28,6 +30,8 @@ class Account(Base):
     saldo_inicial = Column(Numeric(15, 2), nullable=False, default=0.00)
     saldo_atual = Column(Numeric(15, 2), nullable=False, default=0.00)
     limite_credito = Column(Numeric(15, 2), nullable=True, default=0.00)
+    # Moeda dos valores da conta (saldo, transações, transferências)
+    moeda = Column(Enum(CurrencyType), nullable=False, default=CurrencyType.BRL)
     
     # Chave Estrangeira
     usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -35,6 +39,9 @@ class Account(Base):
     # Relacionamento (para o SQLAlchemy entender a ligação)
     owner = relationship("User")
 
+    # Contas do usuário e listagem do admin filtrada por usuário: WHERE usuario_id = ? ORDER BY id
+    __table_args__ = (Index("ix_accounts_usuario_id_id", usuario_id, id),)
+
 # 3. Schemas (Pydantic) - O "contrato" da sua API
 
 class AccountBase(BaseModel):
@@ -49,6 +56,7 @@ class AccountCreate(AccountBase):
     """Schema usado para CRIAR uma conta via API."""
     # O usuario_id virá do 'current_user' (usuário logado),
     # então não precisamos pedi-lo aqui.
+    moeda: CurrencyType | None = None # Padrão: a moeda do usuário
     
     @classmethod
     def model_validate(cls, obj):
@@ -82,4 +90,34 @@ class AccountPublic(AccountBase):
     
     id: int
     usuario_id: int
-    saldo_atual: float # Retorna o saldo atual
\ No newline at end of file
+    saldo_atual: float # Retorna o saldo atual
+    moeda: CurrencyType
+# Schemas do relatório de conciliação de saldos (POST /accounts/admin/reconcile)
+class BalanceDrift(BaseModel):
+    conta_id: int
+    usuario_id: int
+    saldo_atual: float # Valor guardado em accounts.saldo_atual
+    saldo_calculado: float # saldo_inicial + transações + transferências recebidas - enviadas
+    diferenca: float # saldo_atual - saldo_calculado
+
+class ReconciliationReport(BaseModel):
+    contas_verificadas: int
+    contas_com_diferenca: int
+    diferenca_total: float # Soma das diferenças em valor absoluto
+    corrigidas: int # Contas cujo saldo_atual foi reescrito (0 se corrigir=False)
+    lotes: int
+    duracao_segundos: float
+    diferencas: list[BalanceDrift] # Detalha no máximo RECONCILE_MAX_REPORTED contas
+
+# Schemas do histórico de saldo (GET /accounts/{id}/balance-history)
+class HistoryGranularity(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week" # Semanas começam na segunda-feira
+    MONTH = "month"
+
+class BalanceHistory(BaseModel):
+    """Série do saldo no fim de cada período, em listas paralelas (datas[i] -> saldos[i])."""
+    conta_id: int
+    granularidade: HistoryGranularity
+    datas: list[date] # Início de cada período
+    saldos: list[float]
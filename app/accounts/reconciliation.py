@@ -0,0 +1,196 @@
+# app/accounts/reconciliation.py
+"""
+Conciliação dos saldos das contas.
+
+'accounts.saldo_atual' é um valor acumulado (transações e transferências somam
+ou subtraem dele). Aqui ele é recalculado a partir dos lançamentos:
+
+    saldo_inicial + receitas - despesas + transferências recebidas - enviadas
+
+com SQL agregado (GROUP BY conta), processando os usuários em faixas de id
+em paralelo. As contas com diferença são listadas e, opcionalmente, corrigidas.
+
+Execute com: python -m app.accounts.reconciliation [--corrigir]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import cast
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from app.categories.model import CategoryType
+from app.transactions.model import Transaction
+from app.transfers.model import Transfer
+from app.users.model import User
+from . import model, repository
+
+# Threads (cada uma com sua conexão) e usuários por lote
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "4"))
+RECONCILE_BATCH_USERS = int(os.getenv("RECONCILE_BATCH_USERS", "1000"))
+# Contas detalhadas no relatório (o total é sempre contado)
+RECONCILE_MAX_REPORTED = 100
+
+_CENT = Decimal("0.01")
+
+def _balances_stmt(user_min: int, user_max: int, account_ids: set[int] | None = None):
+    """
+    SELECT (conta, usuário, saldo_atual, saldo calculado) das contas dos usuários
+    com id em [user_min, user_max). Cada tabela de lançamentos é agregada uma
+    única vez por lote (GROUP BY conta) e ligada às contas por LEFT JOIN.
+    """
+    accounts = model.Account.__table__
+    transactions = Transaction.__table__
+    transfers = Transfer.__table__
+
+    def in_range(column):
+        return column.between(user_min, user_max - 1)
+
+    signed_value = case(
+        (transactions.c.tipo == CategoryType.DESPESA, -transactions.c.valor),
+        else_=transactions.c.valor,
+    )
+    tx_totals = select(
+        transactions.c.conta_id.label("conta_id"), func.sum(signed_value).label("total")
+    ).where(in_range(transactions.c.usuario_id)).group_by(transactions.c.conta_id)
+    incoming = select(
+        transfers.c.conta_destino_id.label("conta_id"), func.sum(transfers.c.valor).label("total")
+    ).where(in_range(transfers.c.usuario_id)).group_by(transfers.c.conta_destino_id)
+    outgoing = select(
+        transfers.c.conta_origem_id.label("conta_id"), func.sum(transfers.c.valor).label("total")
+    ).where(in_range(transfers.c.usuario_id)).group_by(transfers.c.conta_origem_id)
+
+    if account_ids is not None:
+        accounts_filter = accounts.c.id.in_(account_ids)
+        tx_totals = tx_totals.where(transactions.c.conta_id.in_(account_ids))
+        incoming = incoming.where(transfers.c.conta_destino_id.in_(account_ids))
+        outgoing = outgoing.where(transfers.c.conta_origem_id.in_(account_ids))
+    else:
+        accounts_filter = in_range(accounts.c.usuario_id)
+
+    tx_totals, incoming, outgoing = tx_totals.subquery(), incoming.subquery(), outgoing.subquery()
+    calculated = (
+        accounts.c.saldo_inicial
+        + func.coalesce(tx_totals.c.total, 0)
+        + func.coalesce(incoming.c.total, 0)
+        - func.coalesce(outgoing.c.total, 0)
+    )
+    return (
+        select(accounts.c.id, accounts.c.usuario_id, accounts.c.saldo_atual, calculated.label("calculado"))
+        .select_from(
+            accounts
+            .outerjoin(tx_totals, tx_totals.c.conta_id == accounts.c.id)
+            .outerjoin(incoming, incoming.c.conta_id == accounts.c.id)
+            .outerjoin(outgoing, outgoing.c.conta_id == accounts.c.id)
+        )
+        .where(accounts_filter)
+    )
+
+def _drifts(rows) -> list[model.BalanceDrift]:
+    drifts = []
+    for account_id, user_id, stored, calculated in rows:
+        stored = Decimal(stored or 0).quantize(_CENT)
+        calculated = Decimal(calculated or 0).quantize(_CENT)
+        if stored != calculated:
+            drifts.append(model.BalanceDrift(
+                conta_id=account_id, usuario_id=user_id,
+                saldo_atual=float(stored), saldo_calculado=float(calculated),
+                diferenca=float(stored - calculated),
+            ))
+    return drifts
+
+def _repair(db: Session, user_min: int, user_max: int, account_ids: set[int]) -> list[model.BalanceDrift]:
+    """
+    Reescreve o saldo das contas com diferença. As contas são travadas antes
+    (mesma ordem de id das transferências) e o saldo é recalculado DEPOIS da
+    trava: uma escrita que chegue durante a correção espera e soma sobre o valor corrigido.
+    """
+    repository.lock_accounts(db, account_ids)
+    drifts = _drifts(db.execute(_balances_stmt(user_min, user_max, account_ids)))
+    if drifts:
+        accounts = model.Account.__table__
+        db.execute(
+            update(accounts).where(accounts.c.id == bindparam("b_id")).values(saldo_atual=bindparam("b_saldo")),
+            [{"b_id": d.conta_id, "b_saldo": Decimal(str(d.saldo_calculado))} for d in drifts],
+        )
+    db.commit()
+    return drifts
+
+def _reconcile_batch(user_min: int, user_max: int, fix: bool) -> tuple[int, list[model.BalanceDrift], int]:
+    """Processa um lote de usuários com sua própria sessão. Retorna (contas, diferenças, corrigidas)."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(_balances_stmt(user_min, user_max)).all()
+        drifts = _drifts(rows)
+        fixed = 0
+        if fix and drifts:
+            drifts = _repair(db, user_min, user_max, {d.conta_id for d in drifts})
+            fixed = len(drifts)
+        return len(rows), drifts, fixed
+    finally:
+        db.close()
+
+def reconcile_balances(
+    db: Session,
+    fix: bool = False,
+    workers: int = RECONCILE_WORKERS,
+    batch_users: int = RECONCILE_BATCH_USERS,
+) -> model.ReconciliationReport:
+    """
+    Confere (e com fix=True corrige) o saldo_atual de todas as contas.
+    'db' só é usada para descobrir a faixa de ids de usuário; cada lote roda
+    em uma thread com sua própria sessão.
+    """
+    started = time.perf_counter()
+    user_min, user_max = db.execute(select(func.min(User.id), func.max(User.id))).one()
+    ranges = []
+    if user_min is not None:
+        ranges = [
+            (start, min(start + batch_users, cast(int, user_max) + 1))
+            for start in range(cast(int, user_min), cast(int, user_max) + 1, batch_users)
+        ]
+
+    checked = fixed = 0
+    drifts: list[model.BalanceDrift] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch_checked, batch_drifts, batch_fixed in pool.map(lambda r: _reconcile_batch(*r, fix), ranges):
+            checked += batch_checked
+            fixed += batch_fixed
+            drifts.extend(batch_drifts)
+
+    drifts.sort(key=lambda d: abs(d.diferenca), reverse=True)
+    return model.ReconciliationReport(
+        contas_verificadas=checked,
+        contas_com_diferenca=len(drifts),
+        diferenca_total=float(sum(Decimal(str(abs(d.diferenca))) for d in drifts)),
+        corrigidas=fixed,
+        lotes=len(ranges),
+        duracao_segundos=round(time.perf_counter() - started, 3),
+        diferencas=drifts[:RECONCILE_MAX_REPORTED],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere (e opcionalmente corrige) o saldo de todas as contas.")
+    parser.add_argument("--corrigir", action="store_true", help="reescreve o saldo_atual das contas com diferença")
+    parser.add_argument("--workers", type=int, default=RECONCILE_WORKERS)
+    parser.add_argument("--lote", type=int, default=RECONCILE_BATCH_USERS, help="usuários por lote")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = reconcile_balances(db, fix=args.corrigir, workers=args.workers, batch_users=args.lote)
+    finally:
+        db.close()
+    for drift in report.diferencas:
+        print(f"conta {drift.conta_id} (usuário {drift.usuario_id}): "
+              f"gravado {drift.saldo_atual:.2f} | calculado {drift.saldo_calculado:.2f} | diferença {drift.diferenca:+.2f}")
+    print(f"✅ {report.contas_verificadas} conta(s) verificada(s) em {report.lotes} lote(s) "
+          f"({report.duracao_segundos:.1f}s): {report.contas_com_diferenca} com diferença "
+          f"(total {report.diferenca_total:.2f}), {report.corrigidas} corrigida(s).")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 # app/accounts/repository.py
+from sqlalchemy import Date, select, update, bindparam, case, cast as sql_cast, func, literal, type_coerce, union_all
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
+from datetime import date
+from decimal import Decimal
+from typing import cast
+from database import add_missing_columns
 from . import model
+from app.categories.model import CategoryType
+from app.users.model import CurrencyType
+from app.transactions.model import Transaction
+from app.transfers.model import Transfer
+
+# --- ESQUEMA (BANCOS ANTIGOS) ---
+
+def ensure_account_columns(bind: Engine):
+    """Cria 'accounts.moeda' em bancos anteriores à coluna (as contas existentes ficam em BRL)."""
+    add_missing_columns(bind, model.Account.__table__, {"moeda": f"'{CurrencyType.BRL.value}'"})
 
 # --- FUNÇÕES DE LEITURA (READ) ---
 
@@ -8,13 +24,105 @@ def get_account(db: Session, id_account: int):
     """Busca uma conta pelo ID."""
     return db.query(model.Account).filter(model.Account.id == id_account).first()
 
+def get_accounts_by_ids(db: Session, ids: set[int]):
+    """Busca várias contas de uma vez (uma única consulta)."""
+    if not ids:
+        return []
+    return db.query(model.Account).filter(model.Account.id.in_(ids)).all()
+
+def lock_accounts(db: Session, ids: set[int]) -> dict[int, model.Account]:
+    """
+    Busca as contas com SELECT ... FOR UPDATE, travando as linhas até o commit/rollback.
+    As linhas são travadas sempre em ordem crescente de id: duas operações que
+    envolvem as mesmas contas (em qualquer sentido) nunca se bloqueiam em ciclo (deadlock).
+    """
+    if not ids:
+        return {}
+    stmt = (
+        select(model.Account)
+        .where(model.Account.id.in_(ids))
+        .order_by(model.Account.id)
+        .with_for_update()
+        .execution_options(populate_existing=True) # Sempre o saldo atual do banco, não o da sessão
+    )
+    return {cast(int, account.id): account for account in db.scalars(stmt)}
+
+def lock_available_funds(db: Session, ids: set[int]) -> dict[int, Decimal]:
+    """
+    Igual a 'lock_accounts' (mesma trava e mesma ordem), mas retorna só o saldo
+    disponível de cada conta (saldo_atual + limite_credito), sem criar objetos ORM.
+    Usado nas escritas em lote (muitas contas por vez).
+    """
+    if not ids:
+        return {}
+    accounts = model.Account.__table__
+    stmt = (
+        select(accounts.c.id, accounts.c.saldo_atual + func.coalesce(accounts.c.limite_credito, 0))
+        .where(accounts.c.id.in_(ids))
+        .order_by(accounts.c.id)
+        .with_for_update()
+    )
+    return {account_id: Decimal(str(available)) for account_id, available in db.execute(stmt)}
+
+def _period_start(db: Session, column, granularity: model.HistoryGranularity):
+    """Expressão SQL do primeiro dia do período (dia/semana/mês) de uma data."""
+    if granularity == model.HistoryGranularity.DAY:
+        return column
+    if db.get_bind().dialect.name == "sqlite":
+        modifiers = ("start of month",) if granularity == model.HistoryGranularity.MONTH else ("-6 days", "weekday 1")
+        return type_coerce(func.date(column, *modifiers), Date)
+    return sql_cast(func.date_trunc(granularity.value, column), Date)
+
+def get_period_balances(
+    db: Session,
+    id_account: int,
+    id_user: int,
+    granularity: model.HistoryGranularity,
+    base: Decimal,
+    start: date | None = None,
+    end: date | None = None,
+) -> list[tuple[date, Decimal]]:
+    """
+    Saldo no fim de cada período com movimento (transações e transferências da conta
+    com data entre 'start' e 'end'), calculado no banco:
+    SUM(variação do período) OVER (ORDER BY período) + 'base'.
+    """
+    transactions = Transaction.__table__
+    transfers = Transfer.__table__
+    # O filtro por usuário deixa cada parte usar os índices (usuario_id, [conta_id,] data)
+    movements = union_all(
+        select(transactions.c.data, case(
+            (transactions.c.tipo == CategoryType.DESPESA, -transactions.c.valor), else_=transactions.c.valor
+        ).label("valor")).where(transactions.c.usuario_id == id_user, transactions.c.conta_id == id_account),
+        select(transfers.c.data, transfers.c.valor).where(
+            transfers.c.usuario_id == id_user, transfers.c.conta_destino_id == id_account
+        ),
+        select(transfers.c.data, -transfers.c.valor).where(
+            transfers.c.usuario_id == id_user, transfers.c.conta_origem_id == id_account
+        ),
+    ).subquery()
+
+    period = _period_start(db, movements.c.data, granularity)
+    per_period = select(period.label("periodo"), func.sum(movements.c.valor).label("variacao"))
+    if start is not None:
+        per_period = per_period.where(movements.c.data >= start)
+    if end is not None:
+        per_period = per_period.where(movements.c.data <= end)
+    per_period = per_period.group_by(period).subquery()
+
+    stmt = select(
+        per_period.c.periodo,
+        literal(base) + func.sum(per_period.c.variacao).over(order_by=per_period.c.periodo),
+    ).order_by(per_period.c.periodo)
+    return [(periodo, Decimal(str(saldo)).quantize(Decimal("0.01"))) for periodo, saldo in db.execute(stmt)]
+
 def get_accounts_by_user(db: Session, id_user: int):
     """Busca todas as contas de um usuário específico."""
     return db.query(model.Account).filter(model.Account.usuario_id == id_user).all()
 
 # --- FUNÇÃO DE CRIAÇÃO (CREATE) ---
 
-def create_account(db: Session, account: model.AccountCreate, id_user: int):
+def create_account(db: Session, account: model.AccountCreate, id_user: int, moeda: CurrencyType):
     """Cria uma nova conta no banco de dados."""
     # O saldo atual começa igual ao saldo inicial
     db_account = model.Account(
@@ -23,6 +131,7 @@ def create_account(db: Session, account: model.AccountCreate, id_user: int):
         saldo_inicial=account.saldo_inicial,
         saldo_atual=account.saldo_inicial, # Saldo atual = Saldo inicial
         limite_credito=account.limite_credito,
+        moeda=account.moeda or moeda, # Sem moeda informada, usa a do usuário
         usuario_id=id_user # Associa ao usuário logado
     )
     db.add(db_account)
@@ -44,6 +153,27 @@ def update_account(db: Session, db_account: model.Account, account_in: model.Acc
     db.refresh(db_account)
     return db_account
 
+def apply_balance_deltas(db: Session, deltas: dict[int, Decimal]):
+    """
+    Soma a variação de saldo de cada conta direto no banco
+    (UPDATE accounts SET saldo_atual = saldo_atual + :delta), sem ler a conta antes.
+    NÃO faz commit: quem chama decide quando confirmar (junto com o resto da operação).
+    """
+    params = [
+        {"b_id": account_id, "b_delta": delta}
+        for account_id, delta in sorted(deltas.items()) # Ordem fixa de ids evita deadlocks
+        if delta != 0
+    ]
+    if not params:
+        return
+    accounts = model.Account.__table__
+    db.execute(
+        update(accounts)
+        .where(accounts.c.id == bindparam("b_id"))
+        .values(saldo_atual=accounts.c.saldo_atual + bindparam("b_delta")),
+        params,
+    )
+
 # --- FUNÇÃO DE DELEÇÃO (DELETE) ---
 
 def delete_account(db: Session, db_account: model.Account):
@@ -52,6 +182,52 @@ def delete_account(db: Session, db_account: model.Account):
     db.commit()
     return db_account
 
-def get_all_accounts(db: Session):
-    """Retorna todas as contas de todos os usuários (para admin)."""
-    return db.query(model.Account).all()
\ No newline at end of file
+def get_balances_by_currency(db: Session, id_user: int | None = None) -> dict[CurrencyType, Decimal]:
+    """
+    Soma do saldo atual por moeda (de um usuário ou de todos), em uma única
+    consulta agregada: no máximo uma linha por moeda, qualquer que seja o número de contas.
+    """
+    accounts = model.Account.__table__
+    stmt = select(accounts.c.moeda, func.sum(accounts.c.saldo_atual)).group_by(accounts.c.moeda)
+    if id_user is not None:
+        stmt = stmt.where(accounts.c.usuario_id == id_user)
+    return {CurrencyType(moeda): Decimal(total) for moeda, total in db.execute(stmt)}
+
+# --- FUNÇÕES ADMIN (TODOS OS USUÁRIOS) ---
+
+def _apply_admin_filters(query, id_user: int | None, moeda: CurrencyType | None):
+    if id_user is not None:
+        query = query.filter(model.Account.usuario_id == id_user)
+    if moeda is not None:
+        query = query.filter(model.Account.moeda == moeda)
+    return query
+
+def get_all_accounts(
+    db: Session,
+    limit: int,
+    after_id: int | None = None,
+    id_user: int | None = None,
+    moeda: CurrencyType | None = None,
+):
+    """
+    Uma página das contas de todos os usuários (para admin), em ordem de id.
+    - after_id: id da última conta da página anterior (paginação keyset)
+    """
+    query = _apply_admin_filters(db.query(model.Account), id_user, moeda)
+    if after_id is not None:
+        query = query.filter(model.Account.id > after_id)
+    return query.order_by(model.Account.id).limit(limit).all()
+
+# Colunas exportadas por GET /accounts/admin/export
+ADMIN_EXPORT_COLUMNS = ["id", "usuario_id", "nome", "tipo", "moeda", "saldo_inicial", "saldo_atual", "limite_credito"]
+
+def iter_all_account_rows(db: Session, id_user: int | None = None, moeda: CurrencyType | None = None, batch_size: int = 1000):
+    """
+    Percorre as contas de todos os usuários como tuplas simples (sem criar objetos ORM),
+    buscando 'batch_size' linhas por vez (cursor no servidor no PostgreSQL).
+    """
+    Account = model.Account
+    stmt = select(*(getattr(Account, column) for column in ADMIN_EXPORT_COLUMNS))
+    stmt = _apply_admin_filters(stmt, id_user, moeda).order_by(Account.id).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt):
+        yield tuple(row)
\ No newline at end of file
@@ -1,8 +1,18 @@
 # app/accounts/service.py
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from . import repository, model
 from typing import cast # <--- IMPORTAR O CAST
+from app.auth.cache import TTLCache
+from app.currency import service as currency_service
+from app.currency.model import NetWorth
+from app.users.model import CurrencyType
+from pagination import decode_cursor, paginate
+from streaming import EXPORT_BATCH_SIZE, ExportFormat, stream_rows
 
 # --- SERVIÇOS DE LEITURA (READ) ---
 
@@ -10,6 +20,11 @@ def get_all_accounts_for_user(db: Session, id_user: int):
     """Retorna todas as contas do usuário logado."""
     return repository.get_accounts_by_user(db, id_user=id_user)
 
+def get_net_worth(db: Session, id_user: int, moeda: CurrencyType) -> NetWorth:
+    """Patrimônio do usuário em 'moeda': saldos somados por moeda no banco e convertidos com as cotações do dia."""
+    totals = repository.get_balances_by_currency(db, id_user=id_user)
+    return currency_service.get_net_worth(db, totals, moeda)
+
 def get_account_by_id(db: Session, id_account: int, id_user: int):
     """Busca uma conta específica, verificando se ela pertence ao usuário logado."""
     db_account = repository.get_account(db, id_account=id_account)
@@ -24,12 +39,106 @@ def get_account_by_id(db: Session, id_account: int, id_user: int):
         
     return db_account
 
+# --- HISTÓRICO DE SALDO ---
+# A série até o início do período atual só muda com lançamentos de data retroativa
+# (que descartam o cache da conta, ver 'invalidate_balance_history'). Ela fica em
+# cache e só o período atual (e os futuros) é recalculado a cada chamada.
+BALANCE_HISTORY_CACHE_TTL_SECONDS = float(os.getenv("BALANCE_HISTORY_CACHE_TTL_SECONDS", "300"))
+BALANCE_HISTORY_MAX_POINTS = 1000
+
+# (conta, granularidade) -> (início do período atual, [(período, saldo no fim do período)])
+balance_history_cache = TTLCache(max_size=1024, ttl_seconds=BALANCE_HISTORY_CACHE_TTL_SECONDS)
+
+def _period_start(value: date, granularity: model.HistoryGranularity) -> date:
+    if granularity == model.HistoryGranularity.MONTH:
+        return value.replace(day=1)
+    if granularity == model.HistoryGranularity.WEEK:
+        return value - timedelta(days=value.weekday())
+    return value
+
+def _next_period(value: date, granularity: model.HistoryGranularity) -> date:
+    if granularity == model.HistoryGranularity.MONTH:
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=7 if granularity == model.HistoryGranularity.WEEK else 1)
+
+def _closed_period_balances(db: Session, db_account: model.Account, granularity: model.HistoryGranularity, current_start: date):
+    """Saldos dos períodos encerrados (antes de 'current_start'), do cache quando possível."""
+    key = (cast(int, db_account.id), granularity)
+    cached = balance_history_cache.get(key)
+    if cached is not None and cached[0] == current_start:
+        return cached[1]
+    points = repository.get_period_balances(
+        db, id_account=cast(int, db_account.id), id_user=cast(int, db_account.usuario_id), granularity=granularity,
+        base=Decimal(str(db_account.saldo_inicial)), end=current_start - timedelta(days=1),
+    )
+    balance_history_cache.set(key, (current_start, points))
+    return points
+
+def get_balance_history(
+    db: Session,
+    id_account: int,
+    id_user: int,
+    granularity: model.HistoryGranularity = model.HistoryGranularity.DAY,
+    inicio: date | None = None,
+    fim: date | None = None,
+) -> model.BalanceHistory:
+    """
+    Saldo da conta no fim de cada período entre 'inicio' e 'fim' (padrão: o último ano),
+    partindo do saldo inicial e somando transações e transferências.
+    """
+    db_account = get_account_by_id(db, id_account=id_account, id_user=id_user)
+    fim = fim or date.today()
+    inicio = inicio or fim - timedelta(days=365)
+    if inicio > fim:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' não pode ser maior que 'to'")
+
+    periods = []
+    period = _period_start(inicio, granularity)
+    while period <= fim:
+        periods.append(period)
+        if len(periods) > BALANCE_HISTORY_MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Intervalo com mais de {BALANCE_HISTORY_MAX_POINTS} pontos: reduza o período ou use uma granularidade maior"
+            )
+        period = _next_period(period, granularity)
+
+    # Períodos encerrados (cache) + período atual em diante (sempre do banco)
+    current_start = _period_start(date.today(), granularity)
+    points = _closed_period_balances(db, db_account, granularity, current_start)
+    if periods[-1] >= current_start:
+        base = points[-1][1] if points else Decimal(str(db_account.saldo_inicial))
+        points = points + repository.get_period_balances(
+            db, id_account=id_account, id_user=id_user, granularity=granularity, base=base, start=current_start,
+        )
+
+    # Completa os períodos sem movimento com o último saldo conhecido
+    saldos = []
+    balance = Decimal(str(db_account.saldo_inicial))
+    index = 0
+    for period in periods:
+        while index < len(points) and points[index][0] <= period:
+            balance = points[index][1]
+            index += 1
+        saldos.append(float(balance))
+    return model.BalanceHistory(conta_id=id_account, granularidade=granularity, datas=periods, saldos=saldos)
+
+def invalidate_balance_history(changes: Iterable[tuple[int, date]]):
+    """
+    Recebe (conta, data do lançamento) de uma escrita já confirmada. Lançamentos com
+    data anterior a hoje podem mudar períodos encerrados: descarta o cache dessas contas.
+    """
+    today = date.today()
+    for account_id in {account_id for account_id, data in changes if data < today}:
+        for granularity in model.HistoryGranularity:
+            balance_history_cache.invalidate((account_id, granularity))
+
 # --- SERVIÇO DE CRIAÇÃO (CREATE) ---
 
-def create_new_account(db: Session, account: model.AccountCreate, id_user: int):
-    """Cria uma nova conta para o usuário logado."""
+def create_new_account(db: Session, account: model.AccountCreate, id_user: int, moeda: CurrencyType = CurrencyType.BRL):
+    """Cria uma nova conta para o usuário logado (na moeda informada ou na do usuário)."""
     # (Opcional) Adicionar lógicas de negócio, ex: limite de contas por usuário
-    return repository.create_account(db=db, account=account, id_user=id_user)
+    return repository.create_account(db=db, account=account, id_user=id_user, moeda=moeda)
 
 # --- SERVIÇO DE ATUALIZAÇÃO (UPDATE) ---
 
@@ -48,6 +157,34 @@ def delete_account_by_id(db: Session, id_account: int, id_user: int):
 
 # --- SERVIÇOS ADMIN ---
 
-def get_all_accounts_admin(db: Session):
-    """Retorna todas as contas de todos os usuários (apenas para admin)."""
-    return repository.get_all_accounts(db)
\ No newline at end of file
+def get_all_accounts_admin(
+    db: Session,
+    limit: int,
+    cursor: str | None = None,
+    id_user: int | None = None,
+    moeda: CurrencyType | None = None,
+):
+    """Uma página das contas de todos os usuários (apenas para admin): (itens, next_cursor)."""
+    after_id = None
+    if cursor is not None:
+        [after_id] = decode_cursor(cursor, size=1)
+        if not isinstance(after_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = repository.get_all_accounts(db, limit=limit + 1, after_id=after_id, id_user=id_user, moeda=moeda)
+    return paginate(rows, limit, key=lambda a: [a.id])
+
+def export_accounts_admin(db: Session, formato: ExportFormat, id_user: int | None = None, moeda: CurrencyType | None = None):
+    """Exporta as contas de todos os usuários em streaming, com memória constante (apenas para admin)."""
+    rows = repository.iter_all_account_rows(db, id_user=id_user, moeda=moeda, batch_size=EXPORT_BATCH_SIZE)
+    return stream_rows(repository.ADMIN_EXPORT_COLUMNS, rows, formato=formato, filename="contas_admin")
+
+def get_net_worth_admin(db: Session, moeda: CurrencyType | None = None) -> NetWorth:
+    """Patrimônio somado de todos os usuários: uma consulta agregada por moeda, não por conta."""
+    totals = repository.get_balances_by_currency(db)
+    return currency_service.get_net_worth(db, totals, moeda or currency_service.EXCHANGE_BASE_CURRENCY)
+
+def reconcile_balances_admin(db: Session, corrigir: bool = False) -> model.ReconciliationReport:
+    """Recalcula o saldo de todas as contas a partir dos lançamentos (ver 'reconciliation')."""
+    # Import local: 'reconciliation' depende dos models de transações/transferências
+    from .reconciliation import reconcile_balances
+    return reconcile_balances(db, fix=corrigir)
@@ -0,0 +1,88 @@
+# app/auth/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# --- CONFIGURAÇÕES DO CACHE DE AUTENTICAÇÃO ---
+# Tempo (em segundos) que um usuário autenticado fica em memória.
+# PRINCIPAL_CACHE_TTL_SECONDS=0 desativa o cache.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache LRU limitado em tamanho, com expiração por tempo (TTL) e contadores
+    de acertos/erros. Seguro para uso entre as threads do servidor.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor guardado para 'key' (ou 'default' se ausente/expirado)."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda 'value' para 'key', descartando o item menos usado se estiver cheio."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove 'key' do cache (se existir)."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Retorna os contadores do cache (útil para monitoramento)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+# Cache dos usuários autenticados, indexado pelo 'sub' (email) do token.
+# Evita ir ao banco em toda requisição protegida.
+principal_cache = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Versão atual dos tokens de cada usuário (id -> token_version), usada no modo
+# stateless para recusar tokens revogados sem consultar o banco a cada requisição.
+token_version_cache = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 
 from database import get_db
 from . import service as auth_service # Renomeado
+from .cache import principal_cache, token_version_cache
+from app.users import service as users_service
 from security import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -25,8 +27,28 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # O 'sub' (subject) é o email, e guardamos o 'role' no token
-    token_data = {"sub": user.email, "role": user.role.name}
+    token_data = auth_service.build_token_data(user)
     access_token = create_access_token(data=token_data)
     
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/cache/stats", dependencies=[Depends(auth_service.require_role("admin"))])
+def get_principal_cache_stats():
+    """
+    Retorna os contadores (hits/misses) do cache de usuários autenticados (apenas para admin).
+    """
+    return {
+        "principal_cache": principal_cache.stats(),
+        "token_version_cache": token_version_cache.stats(),
+    }
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_from_all_devices(
+    db: Session = Depends(get_db),
+    current_user: auth_service.Principal = Depends(auth_service.get_current_principal)
+):
+    """
+    Revoga todos os tokens já emitidos para o usuário logado.
+    """
+    users_service.revoke_user_tokens(db=db, id_user=current_user.id)
+    return
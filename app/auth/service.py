@@ -2,17 +2,29 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from typing import cast
 from jose import JWTError, jwt
 from database import get_db
 from app.users import repository as user_repository # Corrigido
-from security import verify_password, SECRET_KEY, ALGORITHM, TokenData
-from app.users.model import User # Corrigido
+from security import verify_password, SECRET_KEY, ALGORITHM, STATELESS_AUTH, TokenData
+from app.users.model import User, CurrencyType # Corrigido
+from .cache import principal_cache, token_version_cache
 
 # Define o "esquema" de autenticação.
 # 'tokenUrl' é o endpoint que o cliente usará para obter o token (o /auth/login)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+class Principal(BaseModel):
+    """
+    Identidade do usuário autenticado (sem acesso ao banco).
+    Usado pelas rotas que só precisam do 'id' e do 'role' do usuário logado.
+    """
+    id: int
+    email: str
+    role: str
+    moeda: CurrencyType
+
 def authenticate_user(db: Session, email: str, password: str):
     """
 PCA-5.4: Use of Code Generation Tools
@@ -26,15 +38,15 @@ I have generated the following code using a large language model.
     # Retorna o objeto User completo se a autenticação for bem-sucedida
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """
-    Dependência que decodifica o token e retorna o usuário atual.
-    Usado para proteger endpoints.
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_access_token(token: str) -> TokenData:
+    """Decodifica e valida o token JWT, retornando os dados (claims) guardados nele."""
+    credentials_exception = _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         # CORREÇÃO 1: payload.get() pode retornar None
@@ -42,27 +54,108 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         role: str | None = payload.get("role")
         if email is None or role is None:
             raise credentials_exception
-        token_data = TokenData(email=email, role=role)
+        return TokenData(
+            email=email,
+            role=role,
+            user_id=payload.get("uid"),
+            moeda=payload.get("moeda"),
+            version=payload.get("ver"),
+        )
     except (JWTError, ValidationError):
         raise credentials_exception
 
-    # CORREÇÃO 3: Usar a variável 'email' (que já sabemos que não é None)
-    # em vez de 'token_data.email' (que ainda é 'str | None')
-    user = user_repository.get_user_by_email(db, email=email)
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Dependência que decodifica o token e retorna o usuário atual.
+    Usado para proteger endpoints.
+    """
+    token_data = decode_access_token(token)
+    email = cast(str, token_data.email)
+
+    # O token já foi validado acima; se o usuário estiver no cache,
+    # não precisamos ir ao banco nesta requisição.
+    user = principal_cache.get(email)
     if user is None:
-        raise credentials_exception
+        # CORREÇÃO 3: Usar a variável 'email' (que já sabemos que não é None)
+        # em vez de 'token_data.email' (que ainda é 'str | None')
+        user = user_repository.get_user_by_email(db, email=email)
+        if user is None:
+            raise _credentials_exception()
+        _cache_user(db, email, user)
+
+    # Tokens emitidos antes de uma revogação (role alterado, logout geral) são recusados
+    if token_data.version is not None and token_data.version != user.token_version:
+        raise _credentials_exception()
     return user
 
+def _cache_user(db: Session, email: str, user: User):
+    """
+    Desanexa o usuário (e seu role) da sessão antes de guardá-lo no cache.
+    Assim um commit feito nesta requisição não expira os atributos do objeto
+    que será compartilhado com as próximas requisições.
+    """
+    if not principal_cache.enabled:
+        return
+    if user.role is not None:
+        db.expunge(user.role)
+    db.expunge(user)
+    principal_cache.set(email, user)
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Dependência "leve" para rotas que só precisam da identidade do usuário (id, role, moeda).
+    - Com STATELESS_AUTH ativo, os dados vêm do próprio token; o banco só é
+      consultado para conferir a versão do token quando ela não está em cache.
+    - Sem STATELESS_AUTH, usa o mesmo caminho de 'get_current_user'.
+    """
+    token_data = decode_access_token(token)
+
+    if STATELESS_AUTH and token_data.user_id is not None and token_data.version is not None:
+        current_version = token_version_cache.get(token_data.user_id)
+        if current_version is None:
+            current_version = user_repository.get_token_version(db, id_user=token_data.user_id)
+            if current_version is None: # Usuário deletado
+                raise _credentials_exception()
+            token_version_cache.set(token_data.user_id, current_version)
+        if current_version != token_data.version:
+            raise _credentials_exception()
+        return Principal(
+            id=token_data.user_id,
+            email=cast(str, token_data.email),
+            role=cast(str, token_data.role),
+            moeda=CurrencyType(token_data.moeda or CurrencyType.BRL),
+        )
+
+    user = get_current_user(token=token, db=db)
+    return Principal(
+        id=cast(int, user.id),
+        email=cast(str, user.email),
+        role=user.role.name if user.role else "",
+        moeda=cast(CurrencyType, user.moeda),
+    )
+
+def build_token_data(user: User) -> dict:
+    """Monta as claims do token de acesso de um usuário."""
+    # O 'sub' (subject) é o email, e guardamos o 'role' no token.
+    # 'uid', 'moeda' e 'ver' permitem o modo stateless (sem consulta ao banco).
+    return {
+        "sub": user.email,
+        "role": user.role.name,
+        "uid": user.id,
+        "moeda": CurrencyType(user.moeda).value,
+        "ver": user.token_version,
+    }
+
 def require_role(required_role_name: str):
     """
     Factory de dependência que verifica se o usuário atual tem o perfil (role) necessário.
     """
-    def role_checker(current_user: User = Depends(get_current_user)):
-        # Verifica se o usuário tem um 'role' e se o nome do 'role' é o exigido
-        if not current_user.role or current_user.role.name != required_role_name:
+    def role_checker(current_user: Principal = Depends(get_current_principal)):
+        # Verifica se o nome do 'role' do usuário é o exigido
+        if current_user.role != required_role_name:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Operation not permitted for this user role"
             )
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
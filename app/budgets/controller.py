@@ -0,0 +1,52 @@
+# app/budgets/controller.py
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+from typing import List, cast
+
+from database import get_db
+from . import service, model
+from app.auth.service import Principal, get_current_principal
+
+router = APIRouter(prefix="/budgets", tags=["Budgets"])
+
+_YEAR_MONTH = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+@router.post("/", response_model=model.BudgetPublic, status_code=status.HTTP_201_CREATED)
+def create_budget(
+    budget: model.BudgetCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """Define o limite mensal de gastos de uma categoria de despesa."""
+    return service.create_budget(db=db, budget=budget, user_id=cast(int, current_user.id))
+
+@router.get("/", response_model=List[model.BudgetStatus])
+def list_budgets(
+    mes: str | None = Query(default=None, pattern=_YEAR_MONTH, description="Mês (AAAA-MM, padrão: mês atual)"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Orçamentos do usuário logado com o gasto do mês, o percentual usado e o
+    maior alerta atingido (80% ou 100%). Lê do resumo mensal, sem somar transações.
+    """
+    return service.get_budget_statuses(db=db, user_id=cast(int, current_user.id), mes=mes)
+
+@router.put("/{budget_id}", response_model=model.BudgetPublic)
+def update_budget(
+    budget_id: int,
+    budget_in: model.BudgetUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """Altera o limite mensal do orçamento."""
+    return service.update_budget(db=db, budget_id=budget_id, budget_in=budget_in, user_id=cast(int, current_user.id))
+
+@router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_budget(
+    budget_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    service.delete_budget_by_id(db=db, budget_id=budget_id, user_id=cast(int, current_user.id))
+    return
@@ -0,0 +1,59 @@
+# app/budgets/model.py
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, UniqueConstraint
+from sqlalchemy.orm import relationship
+from pydantic import BaseModel, Field, ConfigDict
+from database import Base
+
+# Percentuais do limite que geram alerta quando uma despesa os ultrapassa
+BUDGET_THRESHOLDS = (80, 100)
+
+# 1. Modelo da Tabela (SQLAlchemy)
+class Budget(Base):
+    """
+    Limite mensal de gastos de uma categoria de despesa. O gasto do mês não é
+    guardado aqui: vem da linha (usuário, mês, categoria, Despesa) do resumo
+    mensal, que já é atualizada a cada escrita de transação.
+    """
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    limite = Column(Numeric(15, 2), nullable=False) # Limite por mês
+
+    owner = relationship("User")
+    category = relationship("Category")
+
+    # Um orçamento por categoria; também é o índice da busca (usuario_id, categoria_id)
+    __table_args__ = (UniqueConstraint("usuario_id", "categoria_id", name="_usuario_categoria_orcamento_uc"),)
+
+# 2. Schemas (Pydantic)
+class BudgetCreate(BaseModel):
+    categoria_id: int
+    limite: float = Field(gt=0)
+
+class BudgetUpdate(BaseModel):
+    limite: float = Field(gt=0)
+
+class BudgetPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    categoria_id: int
+    limite: float
+
+class BudgetStatus(BudgetPublic):
+    """Situação do orçamento em um mês."""
+    ano_mes: str # AAAA-MM
+    gasto: float
+    restante: float # limite - gasto (negativo quando estourado)
+    percentual: float # gasto / limite * 100
+    alerta: int # Maior limiar atingido (0, 80 ou 100)
+
+class BudgetAlert(BaseModel):
+    """Limiar ultrapassado por uma despesa (o gasto passou de 'limiar'% do limite)."""
+    categoria_id: int
+    ano_mes: str # AAAA-MM
+    limiar: int
+    limite: float
+    gasto: float
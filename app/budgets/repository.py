@@ -0,0 +1,68 @@
+# app/budgets/repository.py
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.categories.model import CategoryType
+from app.reports.model import MonthlySummary
+from . import model
+
+def _spent_join(ano_mes: int):
+    """LEFT JOIN do orçamento com a linha de despesas do mês no resumo (busca pela chave primária)."""
+    return and_(
+        MonthlySummary.usuario_id == model.Budget.usuario_id,
+        MonthlySummary.ano_mes == ano_mes,
+        MonthlySummary.categoria_id == model.Budget.categoria_id,
+        MonthlySummary.tipo == CategoryType.DESPESA,
+    )
+
+# --- FUNÇÕES DE LEITURA (READ) ---
+
+def get_budget(db: Session, budget_id: int):
+    return db.query(model.Budget).filter(model.Budget.id == budget_id).first()
+
+def get_budget_by_category(db: Session, user_id: int, categoria_id: int):
+    return db.query(model.Budget).filter(
+        model.Budget.usuario_id == user_id, model.Budget.categoria_id == categoria_id
+    ).first()
+
+def get_budgets_with_spent(db: Session, user_id: int, ano_mes: int):
+    """(orçamento, gasto no mês) de todos os orçamentos do usuário, em uma consulta."""
+    spent = func.coalesce(MonthlySummary.total, 0)
+    return db.execute(
+        select(model.Budget, spent)
+        .outerjoin(MonthlySummary, _spent_join(ano_mes))
+        .where(model.Budget.usuario_id == user_id)
+        .order_by(model.Budget.categoria_id)
+    ).all()
+
+def get_limit_and_spent(db: Session, user_id: int, categoria_id: int, ano_mes: int):
+    """
+    (limite, gasto no mês) do orçamento da categoria, ou None se ela não tiver orçamento.
+    Custo constante: uma linha pelo índice único e uma pela chave primária do resumo.
+    """
+    return db.execute(
+        select(model.Budget.limite, func.coalesce(MonthlySummary.total, 0))
+        .outerjoin(MonthlySummary, _spent_join(ano_mes))
+        .where(model.Budget.usuario_id == user_id, model.Budget.categoria_id == categoria_id)
+    ).first()
+
+# --- FUNÇÕES DE ESCRITA ---
+
+def create_budget(db: Session, budget: model.BudgetCreate, user_id: int):
+    db_budget = model.Budget(**budget.model_dump(), usuario_id=user_id)
+    db.add(db_budget)
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+def update_budget(db: Session, db_budget: model.Budget, budget_in: model.BudgetUpdate):
+    for key, value in budget_in.model_dump(exclude_unset=True).items():
+        setattr(db_budget, key, value)
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+def delete_budget(db: Session, db_budget: model.Budget):
+    db.delete(db_budget)
+    db.commit()
+    return db_budget
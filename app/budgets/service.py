@@ -0,0 +1,97 @@
+# app/budgets/service.py
+from datetime import date
+from decimal import Decimal
+from typing import cast
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.categories import repository as categories_repository
+from app.categories.model import CategoryType
+from app.reports.repository import year_month
+from . import repository, model
+
+def _format_year_month(ano_mes: int) -> str:
+    return f"{ano_mes // 100:04d}-{ano_mes % 100:02d}"
+
+def _level(limite: Decimal, gasto: Decimal) -> int:
+    """Maior limiar (percentual do limite) já atingido pelo gasto."""
+    reached = [t for t in model.BUDGET_THRESHOLDS if gasto * 100 >= limite * t]
+    return max(reached, default=0)
+
+# --- AVALIAÇÃO A CADA DESPESA (chamado pelas escritas de transações) ---
+
+def check_budget_thresholds(db: Session, user_id: int, categoria_id: int | None, data: date, valor) -> list[model.BudgetAlert]:
+    """
+    Limiares do orçamento da categoria ultrapassados por uma despesa de 'valor'
+    que acabou de entrar no resumo mensal (mesma transação do banco, antes do commit).
+    O gasto lido já inclui a despesa: antes dela era 'gasto - valor'. Custo constante.
+    """
+    if categoria_id is None:
+        return []
+    ano_mes = year_month(data)
+    row = repository.get_limit_and_spent(db, user_id=user_id, categoria_id=categoria_id, ano_mes=ano_mes)
+    if row is None:
+        return []
+    limite, gasto = Decimal(row[0]), Decimal(row[1])
+    anterior = gasto - Decimal(str(valor))
+    return [
+        model.BudgetAlert(
+            categoria_id=categoria_id, ano_mes=_format_year_month(ano_mes),
+            limiar=t, limite=float(limite), gasto=float(gasto),
+        )
+        for t in model.BUDGET_THRESHOLDS
+        if anterior * 100 < limite * t <= gasto * 100
+    ]
+
+# --- SERVIÇOS DE LEITURA (READ) ---
+
+def get_budget_statuses(db: Session, user_id: int, mes: str | None = None) -> list[model.BudgetStatus]:
+    """Orçamentos do usuário com o gasto do mês (padrão: mês atual), lidos do resumo mensal."""
+    if mes is None:
+        ano_mes = year_month(date.today())
+    else:
+        year, month = mes.split("-")
+        ano_mes = int(year) * 100 + int(month)
+    statuses = []
+    for budget, spent in repository.get_budgets_with_spent(db, user_id=user_id, ano_mes=ano_mes):
+        limite, gasto = Decimal(budget.limite), Decimal(spent)
+        statuses.append(model.BudgetStatus(
+            id=budget.id, categoria_id=budget.categoria_id, limite=float(limite),
+            ano_mes=_format_year_month(ano_mes), gasto=float(gasto), restante=float(limite - gasto),
+            percentual=round(float(gasto * 100 / limite), 2), alerta=_level(limite, gasto),
+        ))
+    return statuses
+
+def get_budget_by_id(db: Session, budget_id: int, user_id: int):
+    """Busca um orçamento, verificando se ele pertence ao usuário logado."""
+    db_budget = repository.get_budget(db, budget_id=budget_id)
+    if db_budget is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
+    if cast(int, db_budget.usuario_id) != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this budget")
+    return db_budget
+
+# --- SERVIÇO DE CRIAÇÃO (CREATE) ---
+
+def create_budget(db: Session, budget: model.BudgetCreate, user_id: int):
+    """Cria o orçamento mensal de uma categoria de despesa do usuário."""
+    db_category = categories_repository.get_category(db, category_id=budget.categoria_id)
+    if db_category is None or cast(int, db_category.usuario_id) != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found or does not belong to the user")
+    if db_category.tipo != CategoryType.DESPESA:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Budgets are only allowed for expense categories")
+    if repository.get_budget_by_category(db, user_id=user_id, categoria_id=budget.categoria_id) is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="This category already has a budget")
+    return repository.create_budget(db, budget=budget, user_id=user_id)
+
+# --- SERVIÇO DE ATUALIZAÇÃO (UPDATE) ---
+
+def update_budget(db: Session, budget_id: int, budget_in: model.BudgetUpdate, user_id: int):
+    db_budget = get_budget_by_id(db, budget_id=budget_id, user_id=user_id)
+    return repository.update_budget(db, db_budget=db_budget, budget_in=budget_in)
+
+# --- SERVIÇO DE DELEÇÃO (DELETE) ---
+
+def delete_budget_by_id(db: Session, budget_id: int, user_id: int):
+    db_budget = get_budget_by_id(db, budget_id=budget_id, user_id=user_id)
+    return repository.delete_budget(db, db_budget=db_budget)
@@ -5,9 +5,8 @@ from typing import List, cast # <-- Importa o 'cast' para corrigir o Pylance
 
 from database import get_db
 from . import service, model
-# Importa o 'get_current_user' para proteger as rotas
-from app.auth.service import get_current_user
-from app.users.model import UserPublic # Importa o schema Pydantic 'UserPublic'
+# Importa o 'get_current_principal' para proteger as rotas
+from app.auth.service import Principal, get_current_principal
 
 # Este é o NOVO controller, agora protegido e usando SQLAlchemy
 router = APIRouter(prefix="/categories", tags=["Categories"])
@@ -16,7 +15,7 @@ router = APIRouter(prefix="/categories", tags=["Categories"])
 def create_category(
     category: model.CategoryCreate, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Cria uma nova categoria para o usuário logado.
@@ -27,7 +26,7 @@ def create_category(
 @router.get("/", response_model=List[model.CategoryPublic])
 def list_categories_for_current_user(
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Lista todas as categorias pertencentes ao usuário logado.
@@ -39,7 +38,7 @@ def list_categories_for_current_user(
 def get_category(
     category_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Busca uma categoria específica do usuário logado pelo ID.
@@ -52,7 +51,7 @@ def update_category(
     category_id: int, 
     category_in: model.CategoryUpdate, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Atualiza uma categoria do usuário logado.
@@ -64,7 +63,7 @@ def update_category(
 def delete_category(
     category_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Deleta uma categoria do usuário logado.
@@ -16,6 +16,12 @@ def get_category_by_name_and_type(db: Session, user_id: int, name: str, tipo: mo
         model.Category.tipo == tipo
     ).first()
 
+def get_categories_by_ids(db: Session, ids: set[int]):
+    """Busca várias categorias de uma vez (uma única consulta)."""
+    if not ids:
+        return []
+    return db.query(model.Category).filter(model.Category.id.in_(ids)).all()
+
 def get_categories_by_user(db: Session, user_id: int):
     """Busca todas as categorias de um usuário específico."""
     return db.query(model.Category).filter(model.Category.usuario_id == user_id).all()
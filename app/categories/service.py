@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from . import repository, model
 from typing import cast # <-- Importa o 'cast' para corrigir o Pylance
+from app.transactions.categorizer import invalidate_categorizer # Índice de categorização automática
 
 # --- SERVIÇOS DE LEITURA (READ) ---
 
@@ -56,7 +57,9 @@ def update_existing_category(db: Session, category_id: int, category_in: model.C
         if db_existing_category and cast(int, db_existing_category.id) != category_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category with this name and type already exists")
 
-    return repository.update_category(db=db, db_category=db_category, category_in=category_in)
+    db_category = repository.update_category(db=db, db_category=db_category, category_in=category_in)
+    invalidate_categorizer(user_id) # O tipo pode ter mudado
+    return db_category
 
 # --- SERVIÇO DE DELEÇÃO (DELETE) ---
 
@@ -64,4 +67,6 @@ def delete_category_by_id(db: Session, category_id: int, user_id: int):
     """Deleta uma categoria, verificando a permissão."""
     # (Adicionar verificação se a categoria está em uso antes de deletar)
     db_category = get_category_by_id(db, category_id=category_id, user_id=user_id) # Reusa a lógica de validação
-    return repository.delete_category(db=db, db_category=db_category)
\ No newline at end of file
+    db_category = repository.delete_category(db=db, db_category=db_category)
+    invalidate_categorizer(user_id) # Não sugerir mais a categoria removida
+    return db_category
\ No newline at end of file
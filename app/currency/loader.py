@@ -0,0 +1,68 @@
+# app/currency/loader.py
+"""
+Carrega cotações de um arquivo CSV local para a tabela 'exchange_rates'
+(sem acesso à rede). Formato, com cabeçalho:
+
+    data,moeda,taxa
+    2026-01-02,BRL,5.4821
+    2026-01-02,EUR,0.9132
+
+'taxa' = quantas unidades de 'moeda' valem 1 unidade da moeda base
+(EXCHANGE_BASE_CURRENCY, padrão USD). Um dia já carregado é substituído.
+
+Execute com: python -m app.currency.loader cotacoes.csv
+"""
+import argparse
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from database import SessionLocal, engine, Base
+from app.users.model import CurrencyType
+from . import repository, model, service
+
+LOADER_BATCH_SIZE = 5000 # Linhas por instrução
+
+def parse_rates(path: str) -> tuple[list[dict], list[str]]:
+    """Lê o arquivo e retorna (linhas válidas, erros por linha)."""
+    rows, errors = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                moeda = CurrencyType(record["moeda"].strip().upper())
+                taxa = Decimal(record["taxa"].strip())
+                if taxa <= 0:
+                    raise ValueError("taxa deve ser maior que zero")
+                rows.append({"moeda": moeda, "data": date.fromisoformat(record["data"].strip()), "taxa": taxa})
+            except (KeyError, AttributeError, ValueError, InvalidOperation) as e:
+                errors.append(f"linha {line}: {e}")
+    return rows, errors
+
+def load_rates(path: str) -> tuple[int, list[str]]:
+    """Grava as cotações do arquivo em uma transação. Retorna (linhas gravadas, erros)."""
+    rows, errors = parse_rates(path)
+    # A moeda base vale sempre 1: suas linhas são ignoradas
+    rows = [r for r in rows if r["moeda"] != service.EXCHANGE_BASE_CURRENCY]
+    db = SessionLocal()
+    try:
+        for start in range(0, len(rows), LOADER_BATCH_SIZE):
+            repository.upsert_rates(db, rows[start:start + LOADER_BATCH_SIZE])
+        db.commit()
+    finally:
+        db.close()
+    service.exchange_rate_cache.clear()
+    return len(rows), errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Carrega cotações (CSV data,moeda,taxa) para a tabela exchange_rates.")
+    parser.add_argument("arquivo")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[model.ExchangeRate.__table__])
+    loaded, errors = load_rates(args.arquivo)
+    for error in errors:
+        print(f"⚠️ {error}")
+    print(f"✅ {loaded} cotação(ões) carregada(s) (moeda base: {service.EXCHANGE_BASE_CURRENCY.value}).")
+
+if __name__ == "__main__":
+    main()
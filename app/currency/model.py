@@ -0,0 +1,34 @@
+# app/currency/model.py
+from sqlalchemy import Column, Date, Enum, Numeric, PrimaryKeyConstraint
+from pydantic import BaseModel
+from datetime import date
+from database import Base
+from app.users.model import CurrencyType
+
+# 1. Modelo da Tabela (SQLAlchemy)
+class ExchangeRate(Base):
+    """
+    Cotação de uma moeda em um dia: quantas unidades de 'moeda' valem 1 unidade
+    da moeda base (EXCHANGE_BASE_CURRENCY). A moeda base não precisa de linhas
+    (vale sempre 1). Carregada de arquivo por 'python -m app.currency.loader'.
+    """
+    __tablename__ = "exchange_rates"
+
+    moeda = Column(Enum(CurrencyType), nullable=False)
+    data = Column(Date, nullable=False)
+    taxa = Column(Numeric(20, 8), nullable=False)
+
+    # Também é o índice da busca "última cotação de cada moeda até o dia X"
+    __table_args__ = (PrimaryKeyConstraint(moeda, data),)
+
+# 2. Schemas (Pydantic)
+class CurrencyTotal(BaseModel):
+    moeda: CurrencyType
+    saldo: float # Soma dos saldos das contas nesta moeda
+    convertido: float # O mesmo valor na moeda do patrimônio
+
+class NetWorth(BaseModel):
+    moeda: CurrencyType # Moeda em que o total é expresso
+    data_cotacao: date # Dia das cotações usadas (a última cotação até este dia)
+    total: float
+    por_moeda: list[CurrencyTotal]
@@ -0,0 +1,55 @@
+# app/currency/repository.py
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.users.model import CurrencyType
+from . import model
+
+# --- FUNÇÕES DE LEITURA (READ) ---
+
+def get_rates_on(db: Session, day: date) -> dict[CurrencyType, Decimal]:
+    """
+    Última cotação de cada moeda até 'day' (inclusive), em uma consulta:
+    MAX(data) por moeda e JOIN de volta na chave primária.
+    """
+    rates = model.ExchangeRate.__table__
+    latest = (
+        select(rates.c.moeda, func.max(rates.c.data).label("data"))
+        .where(rates.c.data <= day)
+        .group_by(rates.c.moeda)
+        .subquery()
+    )
+    stmt = select(rates.c.moeda, rates.c.taxa).join(
+        latest, and_(rates.c.moeda == latest.c.moeda, rates.c.data == latest.c.data)
+    )
+    return {CurrencyType(moeda): Decimal(taxa) for moeda, taxa in db.execute(stmt)}
+
+# --- FUNÇÕES DE ESCRITA ---
+
+def upsert_rates(db: Session, rows: list[dict]) -> int:
+    """
+    Grava (moeda, data, taxa), substituindo a taxa de um dia já carregado
+    (INSERT ... ON CONFLICT DO UPDATE, uma instrução para todas as linhas). NÃO faz commit.
+    """
+    if not rows:
+        return 0
+    table = model.ExchangeRate.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.moeda, table.c.data], set_={"taxa": stmt.excluded.taxa}
+        )
+        db.execute(stmt, rows)
+        return len(rows)
+    # Outros bancos: UPDATE e, se a linha não existir, INSERT
+    for row in rows:
+        result = db.execute(
+            update(table).where(table.c.moeda == row["moeda"], table.c.data == row["data"]).values(taxa=row["taxa"])
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table), row)
+    return len(rows)
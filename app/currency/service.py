@@ -0,0 +1,63 @@
+# app/currency/service.py
+import os
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.auth.cache import TTLCache
+from app.users.model import CurrencyType
+from . import repository, model
+
+# Moeda de referência das cotações (taxa = unidades da moeda por 1 unidade da base)
+EXCHANGE_BASE_CURRENCY = CurrencyType(os.getenv("EXCHANGE_BASE_CURRENCY", "USD"))
+# Tempo que as cotações de um dia ficam em memória (o loader roda em outro processo)
+EXCHANGE_RATE_CACHE_TTL_SECONDS = float(os.getenv("EXCHANGE_RATE_CACHE_TTL_SECONDS", "3600"))
+
+_CENT = Decimal("0.01")
+
+# Cotações por dia: dia -> {moeda: taxa}. Uma consulta por dia (e por TTL), não por conta.
+exchange_rate_cache = TTLCache(max_size=64, ttl_seconds=EXCHANGE_RATE_CACHE_TTL_SECONDS)
+
+def get_rates(db: Session, day: date | None = None) -> dict[CurrencyType, Decimal]:
+    """Última cotação de cada moeda até 'day' (padrão: hoje), com a moeda base valendo 1."""
+    day = day or date.today()
+    rates = exchange_rate_cache.get(day)
+    if rates is None:
+        rates = repository.get_rates_on(db, day)
+        rates[EXCHANGE_BASE_CURRENCY] = Decimal("1")
+        exchange_rate_cache.set(day, rates)
+    return rates
+
+def convert_totals(
+    totals: dict[CurrencyType, Decimal], target: CurrencyType, rates: dict[CurrencyType, Decimal]
+) -> model.NetWorth | None:
+    """
+    Converte os totais de cada moeda para 'target' de uma vez (valor / taxa da origem * taxa do destino).
+    Retorna None se faltar a cotação de alguma moeda.
+    """
+    if target not in rates or any(moeda not in rates for moeda in totals):
+        return None
+    por_moeda = []
+    total = Decimal("0")
+    for moeda, saldo in sorted(totals.items()):
+        convertido = saldo if moeda == target else saldo / rates[moeda] * rates[target]
+        total += convertido
+        por_moeda.append(model.CurrencyTotal(
+            moeda=moeda, saldo=float(saldo), convertido=float(convertido.quantize(_CENT))
+        ))
+    return model.NetWorth(moeda=target, data_cotacao=date.today(), total=float(total.quantize(_CENT)), por_moeda=por_moeda)
+
+def get_net_worth(db: Session, totals: dict[CurrencyType, Decimal], target: CurrencyType, day: date | None = None) -> model.NetWorth:
+    """
+    Soma os totais por moeda em 'target'. Se todos já estão em 'target', as
+    cotações nem são consultadas. Responde 404 se faltar alguma cotação.
+    """
+    day = day or date.today()
+    rates = {target: Decimal("1")} if set(totals) <= {target} else get_rates(db, day)
+    net_worth = convert_totals(totals, target, rates)
+    if net_worth is None:
+        missing = sorted(m.value for m in ({target} | set(totals)) - set(rates))
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exchange rate not found for: {missing}")
+    net_worth.data_cotacao = day
+    return net_worth
@@ -0,0 +1,23 @@
+# app/dashboard/controller.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from . import service, model
+from app.auth.service import get_current_user
+from app.users.model import User
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+@router.get("", response_model=model.DashboardPublic)
+def get_dashboard(
+    recentes: int = Query(default=10, ge=0, le=model.DASHBOARD_MAX_RECENT, description="Quantidade de transações recentes"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user) # <- Proteção (usa o cache de usuários)
+):
+    """
+    Dados da tela inicial em uma única chamada: usuário, contas e saldos, patrimônio,
+    receitas x despesas do mês atual e as últimas transações.
+    Substitui a sequência /users/me, /accounts, /transactions, ... na abertura do app.
+    """
+    return service.get_dashboard(db=db, user=current_user, recentes=recentes)
@@ -0,0 +1,19 @@
+# app/dashboard/model.py
+from pydantic import BaseModel
+from app.users.model import UserPublic
+from app.accounts.model import AccountPublic
+from app.transactions.model import TransactionPublic
+from app.reports.model import MonthlyReport
+from app.users.model import CurrencyType
+
+# Máximo de transações recentes no painel
+DASHBOARD_MAX_RECENT = 50
+
+class DashboardPublic(BaseModel):
+    """Tudo que a tela inicial do app precisa, em uma única resposta."""
+    usuario: UserPublic
+    contas: list[AccountPublic]
+    patrimonio: float # Saldo atual de todas as contas, convertido para a moeda do usuário
+    moedas_sem_cotacao: list[CurrencyType] = [] # Moedas sem cotação (contas fora do patrimônio)
+    mes_atual: MonthlyReport # Receitas x despesas do mês corrente (com as categorias)
+    ultimas_transacoes: list[TransactionPublic]
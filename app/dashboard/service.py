@@ -0,0 +1,61 @@
+# app/dashboard/service.py
+from datetime import date
+from decimal import Decimal
+from typing import cast
+from sqlalchemy.orm import Session
+
+from app.accounts import repository as accounts_repository
+from app.currency import service as currency_service
+from app.transactions import repository as transactions_repository
+from app.reports import service as reports_service
+from app.reports.model import MonthlyReport
+from app.users.model import CurrencyType, User
+from . import model
+
+def _net_worth(db: Session, accounts, moeda: CurrencyType) -> tuple[Decimal, list[CurrencyType]]:
+    """
+    Patrimônio na moeda do usuário a partir das contas já carregadas. As cotações
+    só são lidas (do cache do dia) se houver conta em outra moeda; as moedas sem
+    cotação ficam de fora e são informadas em vez de derrubar o painel.
+    """
+    totals: dict[CurrencyType, Decimal] = {}
+    for a in accounts:
+        conta_moeda = cast(CurrencyType, a.moeda)
+        totals[conta_moeda] = totals.get(conta_moeda, Decimal("0")) + Decimal(str(a.saldo_atual))
+    rates = {moeda: Decimal("1")} if set(totals) <= {moeda} else currency_service.get_rates(db)
+    if moeda not in rates:
+        sem_cotacao = sorted(m for m in totals if m != moeda)
+    else:
+        sem_cotacao = sorted(m for m in totals if m not in rates)
+    patrimonio = sum(
+        (valor if m == moeda else valor / rates[m] * rates[moeda] for m, valor in totals.items() if m not in sem_cotacao),
+        Decimal("0"),
+    )
+    return patrimonio.quantize(Decimal("0.01")), sem_cotacao
+
+def get_dashboard(db: Session, user: User, recentes: int = 10) -> model.DashboardPublic:
+    """
+    Monta o painel com um número fixo de consultas na mesma sessão
+    (o usuário já vem da autenticação, normalmente do cache):
+      1. contas do usuário (saldos e patrimônio);
+      2. totais do mês atual (tabela de resumo mensal, sem somar transações);
+      3. últimas 'recentes' transações (índice usuario_id, data, id).
+    Com contas em outra moeda, as cotações do dia vêm do cache (uma consulta por dia).
+    """
+    user_id = cast(int, user.id)
+    accounts = accounts_repository.get_accounts_by_user(db, id_user=user_id)
+    patrimonio, sem_cotacao = _net_worth(db, accounts, cast(CurrencyType, user.moeda))
+
+    mes = date.today().strftime("%Y-%m")
+    reports = reports_service.get_monthly_report(db, user_id=user_id, inicio=mes, fim=mes)
+    mes_atual = reports[0] if reports else MonthlyReport(ano_mes=mes, receitas=0, despesas=0, saldo=0, categorias=[])
+
+    recent = transactions_repository.get_transactions_by_user(db, user_id=user_id, limit=recentes) if recentes else []
+    return model.DashboardPublic.model_validate({
+        "usuario": user,
+        "contas": accounts,
+        "patrimonio": float(patrimonio),
+        "moedas_sem_cotacao": sem_cotacao,
+        "mes_atual": mes_atual,
+        "ultimas_transacoes": recent,
+    }, from_attributes=True)
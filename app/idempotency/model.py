@@ -0,0 +1,28 @@
+# app/idempotency/model.py
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, PrimaryKeyConstraint, SmallInteger, String, Text
+from database import Base
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# 1. Modelo da Tabela (SQLAlchemy)
+class IdempotencyKey(Base):
+    """
+    Chave 'Idempotency-Key' já usada por um usuário e a resposta que ela gerou.
+    A linha é gravada no mesmo commit da escrita e da resposta ('status_code' e
+    'resposta' só são nulos antes desse commit). Linhas vencidas ('expira_em')
+    são apagadas periodicamente.
+    """
+    __tablename__ = "idempotency_keys"
+
+    usuario_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    chave = Column(String(IDEMPOTENCY_KEY_MAX_LENGTH), nullable=False)
+    hash_requisicao = Column(String(64), nullable=False) # SHA-256 da rota + corpo da requisição
+    status_code = Column(SmallInteger, nullable=True)
+    resposta = Column(Text, nullable=True) # Corpo da resposta (JSON)
+    expira_em = Column(DateTime(timezone=True), nullable=False)
+
+    # A chave primária é o índice da consulta de cada requisição (uma leitura por chave)
+    __table_args__ = (
+        PrimaryKeyConstraint(usuario_id, chave),
+        Index("ix_idempotency_keys_expira_em", expira_em), # Para a limpeza das vencidas
+    )
@@ -0,0 +1,61 @@
+# app/idempotency/repository.py
+from datetime import datetime
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import model
+
+# --- FUNÇÕES DE LEITURA (READ) ---
+
+def get_key(db: Session, user_id: int, key: str, now: datetime):
+    """Busca uma chave ainda válida pela chave primária (as vencidas contam como inexistentes)."""
+    table = model.IdempotencyKey.__table__
+    stmt = select(table.c.hash_requisicao, table.c.status_code, table.c.resposta).where(
+        table.c.usuario_id == user_id, table.c.chave == key, table.c.expira_em > now
+    )
+    return db.execute(stmt).first()
+
+# --- FUNÇÕES DE ESCRITA ---
+
+def claim_key(db: Session, user_id: int, key: str, request_hash: str, now: datetime, expires_at: datetime) -> bool:
+    """
+    Registra a chave (ou reaproveita uma vencida) e retorna True se esta requisição
+    ficou com ela. NÃO faz commit: a linha só aparece para as outras requisições junto
+    com a escrita que ela protege (e a resposta), e uma requisição concorrente com a
+    mesma chave fica esperando neste INSERT até o commit (ou rollback) desta.
+    """
+    table = model.IdempotencyKey.__table__
+    values = {
+        "usuario_id": user_id, "chave": key, "hash_requisicao": request_hash,
+        "status_code": None, "resposta": None, "expira_em": expires_at,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.usuario_id, table.c.chave],
+            set_={k: stmt.excluded[k] for k in ("hash_requisicao", "status_code", "resposta", "expira_em")},
+            where=table.c.expira_em <= now, # Só toma o lugar de uma chave vencida
+        )
+        return db.execute(stmt.returning(table.c.usuario_id)).first() is not None
+    # Outros bancos: apaga a vencida e insere (a chave primária barra a concorrente)
+    db.execute(delete(table).where(table.c.usuario_id == user_id, table.c.chave == key, table.c.expira_em <= now))
+    if db.execute(select(table.c.usuario_id).where(table.c.usuario_id == user_id, table.c.chave == key)).first():
+        return False
+    db.execute(insert(table).values(values))
+    return True
+
+def save_response(db: Session, user_id: int, key: str, status_code: int, body: str):
+    """Guarda a resposta da requisição original. NÃO faz commit."""
+    table = model.IdempotencyKey.__table__
+    db.execute(
+        update(table)
+        .where(table.c.usuario_id == user_id, table.c.chave == key)
+        .values(status_code=status_code, resposta=body)
+    )
+
+def delete_expired(db: Session, now: datetime) -> int:
+    """Apaga as chaves vencidas (usa o índice de 'expira_em'). NÃO faz commit."""
+    table = model.IdempotencyKey.__table__
+    return db.execute(delete(table).where(table.c.expira_em <= now)).rowcount
@@ -0,0 +1,149 @@
+# app/idempotency/service.py
+"""
+Chaves de idempotência ('Idempotency-Key') para as rotas que movimentam dinheiro.
+
+O cliente repete a requisição (ex.: rede instável) com a mesma chave e recebe a
+MESMA resposta da primeira vez, sem escrever nada de novo:
+  1. uma leitura pela chave primária (usuario_id, chave): se já há resposta, ela
+     é devolvida (cabeçalho 'Idempotent-Replayed: true');
+  2. senão, a chave é registrada na MESMA transação do banco da escrita e recebe a
+     resposta antes do commit: uma requisição concorrente com a mesma chave espera
+     esse commit e então devolve a resposta da primeira;
+  3. a resposta é guardada por IDEMPOTENCY_KEY_TTL_SECONDS.
+Se a requisição original falha antes do commit, nada fica gravado (nem a chave),
+e ela pode ser repetida.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from fastapi import Header, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from . import model, repository
+
+IDEMPOTENCY_KEY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+# Intervalo da limpeza das chaves vencidas dentro da API (0 desativa)
+IDEMPOTENCY_EVICTION_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_EVICTION_INTERVAL_SECONDS", "3600"))
+IDEMPOTENT_REPLAY_HEADER = "Idempotent-Replayed"
+
+def get_idempotency_key(
+    idempotency_key: str | None = Header(
+        default=None, alias="Idempotency-Key", min_length=1, max_length=model.IDEMPOTENCY_KEY_MAX_LENGTH,
+        description="Chave única da operação: repetir a requisição com a mesma chave devolve a resposta original",
+    ),
+) -> str | None:
+    return idempotency_key
+
+def _request_hash(route: str, payload: BaseModel) -> str:
+    return hashlib.sha256(f"{route}\n{payload.model_dump_json()}".encode("utf-8")).hexdigest()
+
+def _replay(row, request_hash: str) -> JSONResponse:
+    if row.hash_requisicao != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request",
+        )
+    return JSONResponse(
+        content=json.loads(row.resposta), status_code=row.status_code,
+        headers={IDEMPOTENT_REPLAY_HEADER: "true"},
+    )
+
+def _claim(db: Session, user_id: int, key: str, request_hash: str):
+    """Retorna None se esta requisição ficou com a chave, ou a linha com a resposta guardada."""
+    while True:
+        now = datetime.now(timezone.utc)
+        row = repository.get_key(db, user_id, key, now)
+        if row is not None:
+            return row
+        expires_at = now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+        if repository.claim_key(db, user_id, key, request_hash, now, expires_at):
+            return None
+        # Outra requisição gravou a chave enquanto esperávamos no INSERT: lê de novo
+
+def run_idempotent(
+    db: Session,
+    user_id: int,
+    key: str | None,
+    route: str,
+    payload: BaseModel,
+    handler: Callable[[Callable[[Any], None] | None], Any],
+    response_model: type[BaseModel],
+    status_code: int,
+):
+    """
+    Executa 'handler' uma única vez por chave. O handler recebe 'before_commit' e o
+    chama com a resposta logo antes do seu único commit: a escrita, a chave e a
+    resposta são gravadas juntas (ou nada é gravado). Sem chave, apenas executa.
+    """
+    if key is None:
+        return handler(None)
+    request_hash = _request_hash(route, payload)
+    stored = _claim(db, user_id, key, request_hash)
+    if stored is not None:
+        db.rollback()
+        return _replay(stored, request_hash)
+
+    saved: list = []
+    def before_commit(result):
+        body = jsonable_encoder(response_model.model_validate(result, from_attributes=True))
+        repository.save_response(db, user_id, key, status_code, json.dumps(body))
+        saved.append(body)
+
+    try:
+        handler(before_commit)
+    except Exception:
+        # Antes do commit, a chave sai junto com a escrita; depois dele, a resposta já
+        # está guardada e a repetição recebe a resposta (sem escrever de novo)
+        db.rollback()
+        raise
+    return JSONResponse(content=saved[0], status_code=status_code)
+
+# --- LIMPEZA DAS CHAVES VENCIDAS ---
+
+def evict_expired_keys(db: Session) -> int:
+    deleted = repository.delete_expired(db, datetime.now(timezone.utc))
+    db.commit()
+    return deleted
+
+class IdempotencyKeyEvictor:
+    """Thread em segundo plano que apaga as chaves vencidas a cada 'interval' segundos."""
+
+    def __init__(self, interval: float = IDEMPOTENCY_EVICTION_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="idempotency-evictor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                deleted = evict_expired_keys(db)
+                if deleted:
+                    print(f"🧹 Idempotência: {deleted} chave(s) vencida(s) apagada(s)")
+            except Exception as e:
+                # Não derruba a thread: tenta de novo na próxima execução
+                print(f"⚠️ Erro ao apagar chaves de idempotência vencidas: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            self._stop.wait(self.interval)
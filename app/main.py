@@ -1,7 +1,11 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from database import engine, Base, SessionLocal
+from security import PasswordHasherBusy
+from pagination import NEXT_CURSOR_HEADER
 
 # 1. Importa todos os seus controllers
 from .users import controller as users_controller
@@ -11,12 +15,26 @@ from .accounts import controller as accounts_controller
 from .categories import controller as categories_controller
 from .transactions import controller as transactions_controller
 from .transfers import controller as transfers_controller
+from .reports import controller as reports_controller
+from .dashboard import controller as dashboard_controller
+from .recurring import controller as recurring_controller
+from .budgets import controller as budgets_controller
+from .recurring.runner import RecurringScheduler
+from .idempotency.service import IDEMPOTENT_REPLAY_HEADER, IdempotencyKeyEvictor
+from .transactions.search import ensure_search_indexes
+from .transactions.dedup import ensure_fingerprint_column
+from .users.migrate_avatars import ensure_user_columns
+from .accounts.repository import ensure_account_columns
 
 # Importa modelos para criação de roles padrão
 from .roles.model import Role
 
 # 2. Cria todas as tabelas (definidas em models.py) que herdam de 'Base'
 Base.metadata.create_all(bind=engine)
+ensure_user_columns(engine) # Colunas novas de 'users' em bancos antigos (o create_all não altera tabelas)
+ensure_account_columns(engine) # Idem para 'accounts.moeda'
+ensure_fingerprint_column(engine) # Coluna de duplicatas em bancos antigos; índice hash só no PostgreSQL
+ensure_search_indexes(engine) # Coluna da busca em bancos antigos; índice de trigramas só no PostgreSQL
 
 # 3. Cria roles padrão se não existirem
 def create_default_roles():
@@ -40,7 +58,18 @@ def create_default_roles():
 
 create_default_roles()
 
-app = FastAPI(title="API do Meu Projeto", version="0.1.0")
+# 4. Tarefas em segundo plano (lançamentos recorrentes e limpeza das chaves de idempotência)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler = RecurringScheduler()
+    evictor = IdempotencyKeyEvictor()
+    scheduler.start()
+    evictor.start()
+    yield
+    evictor.stop()
+    scheduler.stop()
+
+app = FastAPI(title="API do Meu Projeto", version="0.1.0", lifespan=lifespan)
 
 # CORS - permite requisições do Flutter Web
 app.add_middleware(
@@ -49,8 +78,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos os métodos (GET, POST, PUT, DELETE, OPTIONS)
     allow_headers=["*"],  # Permite todos os headers
+    expose_headers=[NEXT_CURSOR_HEADER, IDEMPOTENT_REPLAY_HEADER],  # Permite ao front ler o cursor da próxima página e saber se a resposta foi repetida
 )
 
+# Pool de hashing de senhas saturado (rajada de logins/cadastros):
+# rejeita rápido em vez de prender uma thread do servidor esperando.
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many concurrent authentication requests, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 # 3. Inclui os roteadores de cada módulo na aplicação principal
 app.include_router(users_controller.router)
 app.include_router(roles_controller.router) 
@@ -59,6 +99,10 @@ app.include_router(accounts_controller.router)
 app.include_router(categories_controller.router)
 app.include_router(transactions_controller.router)
 app.include_router(transfers_controller.router)
+app.include_router(reports_controller.router)
+app.include_router(dashboard_controller.router)
+app.include_router(recurring_controller.router)
+app.include_router(budgets_controller.router)
 
 @app.get("/")
 def read_root():
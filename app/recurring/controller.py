@@ -0,0 +1,58 @@
+# app/recurring/controller.py
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from typing import List, cast
+
+from database import get_db
+from . import service, model, runner
+from app.auth.service import Principal, get_current_principal, require_role
+
+router = APIRouter(prefix="/recurring", tags=["Recurring"])
+
+@router.post("/", response_model=model.RecurringRulePublic, status_code=status.HTTP_201_CREATED)
+def create_recurring_rule(
+    rule: model.RecurringRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Cria uma regra recorrente (transação ou transferência), mensal ou semanal.
+    As ocorrências vencidas são lançadas automaticamente pelo agendador.
+    """
+    return service.create_rule(db=db, rule=rule, user_id=cast(int, current_user.id))
+
+@router.get("/", response_model=List[model.RecurringRulePublic])
+def list_recurring_rules(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """Lista as regras recorrentes do usuário logado."""
+    return service.get_all_rules_for_user(db=db, user_id=cast(int, current_user.id))
+
+@router.get("/{rule_id}", response_model=model.RecurringRulePublic)
+def get_recurring_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    return service.get_rule_by_id(db=db, rule_id=rule_id, user_id=cast(int, current_user.id))
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_recurring_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """Deleta a regra (os lançamentos já feitos continuam)."""
+    service.delete_rule_by_id(db=db, rule_id=rule_id, user_id=cast(int, current_user.id))
+    return
+
+# --- ENDPOINTS ADMIN ---
+
+@router.post("/admin/run", response_model=model.RunSummary)
+def run_recurring_now(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """Lança agora todas as ocorrências vencidas (o agendador faz isso periodicamente)."""
+    return runner.run_due_rules(db)
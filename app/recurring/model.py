@@ -0,0 +1,117 @@
+# app/recurring/model.py
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Numeric, Date, Boolean, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import relationship
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from database import Base
+from datetime import date
+import enum
+from app.categories.model import CategoryType
+
+class RuleKind(str, enum.Enum):
+    TRANSACAO = "transacao"
+    TRANSFERENCIA = "transferencia"
+
+class Frequency(str, enum.Enum):
+    MENSAL = "mensal" # Todo 'dia_do_mes' (ajustado para o último dia em meses mais curtos)
+    SEMANAL = "semanal" # Toda 'dia_da_semana' (0 = segunda ... 6 = domingo)
+
+class OccurrenceStatus(str, enum.Enum):
+    LANCADA = "lancada"
+    SEM_SALDO = "sem_saldo" # Transferência agendada sem saldo suficiente: não é lançada
+
+# 1. Modelos das Tabelas (SQLAlchemy)
+class RecurringRule(Base):
+    """
+    Regra de lançamento recorrente (aluguel, salário, assinaturas...) de uma
+    transação ou de uma transferência. 'proxima_data' é a próxima ocorrência
+    ainda não lançada; o agendador lança tudo que já venceu (ver 'runner').
+    """
+    __tablename__ = "recurring_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    tipo_regra = Column(Enum(RuleKind), nullable=False)
+    descricao = Column(String(500))
+    valor = Column(Numeric(15, 2), nullable=False)
+    tipo = Column(Enum(CategoryType), nullable=True) # Só para transações
+    conta_id = Column(Integer, ForeignKey("accounts.id"), nullable=False) # Conta da transação / origem da transferência
+    conta_destino_id = Column(Integer, ForeignKey("accounts.id"), nullable=True) # Só para transferências
+    categoria_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+
+    frequencia = Column(Enum(Frequency), nullable=False)
+    intervalo = Column(Integer, nullable=False, default=1) # A cada N meses/semanas
+    dia_do_mes = Column(Integer, nullable=True)
+    dia_da_semana = Column(Integer, nullable=True)
+    data_inicio = Column(Date, nullable=False)
+    data_fim = Column(Date, nullable=True)
+    proxima_data = Column(Date, nullable=True) # None = encerrada
+    ativa = Column(Boolean, nullable=False, default=True)
+
+    owner = relationship("User")
+
+    # O agendador busca: WHERE ativa AND proxima_data <= hoje ORDER BY id
+    __table_args__ = (
+        Index("ix_recurring_rules_ativa_proxima_data", ativa, proxima_data),
+    )
+
+class RecurringOccurrence(Base):
+    """
+    Cada ocorrência já processada de uma regra. A chave (regra_id, data) garante
+    que a mesma ocorrência nunca é lançada duas vezes (reinícios, vários processos).
+    """
+    __tablename__ = "recurring_occurrences"
+
+    regra_id = Column(Integer, ForeignKey("recurring_rules.id", ondelete="CASCADE"), nullable=False)
+    data = Column(Date, nullable=False)
+    status = Column(Enum(OccurrenceStatus), nullable=False, default=OccurrenceStatus.LANCADA)
+
+    __table_args__ = (
+        PrimaryKeyConstraint(regra_id, data),
+    )
+
+# 2. Schemas (Pydantic)
+class RecurringRuleBase(BaseModel):
+    tipo_regra: RuleKind
+    descricao: str | None = Field(default=None, max_length=500)
+    valor: float = Field(gt=0)
+    tipo: CategoryType | None = Field(default=None, description="Obrigatório para transações")
+    conta_id: int = Field(description="Conta da transação ou conta de origem da transferência")
+    conta_destino_id: int | None = Field(default=None, description="Obrigatório para transferências")
+    categoria_id: int | None = None
+    frequencia: Frequency
+    intervalo: int = Field(default=1, ge=1, le=24)
+    dia_do_mes: int | None = Field(default=None, ge=1, le=31, description="Padrão: dia de 'data_inicio'")
+    dia_da_semana: int | None = Field(default=None, ge=0, le=6, description="0 = segunda. Padrão: dia de 'data_inicio'")
+    data_inicio: date
+    data_fim: date | None = None
+
+class RecurringRuleCreate(RecurringRuleBase):
+    @model_validator(mode="after")
+    def campos_por_tipo(self):
+        if self.tipo_regra == RuleKind.TRANSACAO and self.tipo is None:
+            raise ValueError("'tipo' é obrigatório para transações recorrentes")
+        if self.tipo_regra == RuleKind.TRANSFERENCIA:
+            if self.conta_destino_id is None:
+                raise ValueError("'conta_destino_id' é obrigatório para transferências recorrentes")
+            if self.conta_destino_id == self.conta_id:
+                raise ValueError("Conta de origem e destino não podem ser a mesma")
+        if self.data_fim is not None and self.data_fim < self.data_inicio:
+            raise ValueError("data_fim não pode ser anterior a data_inicio")
+        return self
+
+class RecurringRulePublic(RecurringRuleBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    usuario_id: int
+    proxima_data: date | None
+    ativa: bool
+
+class RunSummary(BaseModel):
+    """Resultado de uma execução do agendador."""
+    regras: int # Regras com ocorrências processadas
+    transacoes: int
+    transferencias: int
+    sem_saldo: int # Transferências não lançadas por falta de saldo
+    lotes: int
+    duracao_segundos: float
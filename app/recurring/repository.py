@@ -0,0 +1,115 @@
+# app/recurring/repository.py
+from datetime import date
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.transactions.model import Transaction
+from app.transfers.model import Transfer
+from . import model
+
+# --- FUNÇÕES DE CRIAÇÃO / LEITURA / DELEÇÃO DAS REGRAS ---
+
+def create_rule(db: Session, rule: model.RecurringRuleCreate, user_id: int, proxima_data: date | None):
+    """Cria uma regra recorrente no banco de dados."""
+    db_rule = model.RecurringRule(
+        **rule.model_dump(),
+        usuario_id=user_id,
+        proxima_data=proxima_data,
+        ativa=proxima_data is not None,
+    )
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+def get_rule(db: Session, rule_id: int):
+    return db.query(model.RecurringRule).filter(model.RecurringRule.id == rule_id).first()
+
+def get_rules_by_user(db: Session, user_id: int):
+    return db.query(model.RecurringRule).filter(
+        model.RecurringRule.usuario_id == user_id
+    ).order_by(model.RecurringRule.id).all()
+
+def delete_rule(db: Session, db_rule: model.RecurringRule):
+    """Deleta a regra e o registro das suas ocorrências (os lançamentos feitos continuam)."""
+    db.query(model.RecurringOccurrence).filter(model.RecurringOccurrence.regra_id == db_rule.id).delete()
+    db.delete(db_rule)
+    db.commit()
+    return db_rule
+
+# --- FUNÇÕES DO AGENDADOR (sem commit: um commit por lote, no runner) ---
+
+def lock_due_rules(db: Session, today: date, limit: int, after_id: int = 0):
+    """
+    Próximas 'limit' regras vencidas com id maior que 'after_id' (percorre a tabela
+    pela chave primária, um lote depois do outro), travadas com FOR UPDATE SKIP LOCKED:
+    vários processos podem rodar o agendador ao mesmo tempo sem pegar a mesma regra.
+    Retorna linhas simples (sem objetos ORM), com os mesmos atributos do model.
+    """
+    rules = model.RecurringRule.__table__
+    stmt = (
+        select(rules)
+        .where(rules.c.id > after_id, rules.c.ativa.is_(True), rules.c.proxima_data <= today)
+        .order_by(rules.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(stmt).all()
+
+def claim_occurrences(db: Session, keys: list[tuple[int, date]]) -> set[tuple[int, date]]:
+    """
+    Registra as ocorrências (regra_id, data) e retorna só as que ainda não existiam
+    (INSERT ... ON CONFLICT DO NOTHING RETURNING): uma ocorrência nunca é lançada duas vezes.
+    """
+    if not keys:
+        return set()
+    table = model.RecurringOccurrence.__table__
+    params = [{"regra_id": rule_id, "data": day, "status": model.OccurrenceStatus.LANCADA} for rule_id, day in keys]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.regra_id, table.c.data])
+        result = db.execute(stmt.returning(table.c.regra_id, table.c.data), params)
+        return {(rule_id, day) for rule_id, day in result}
+    # Outros bancos: descarta as que já existem e insere o resto
+    existing = set(db.execute(
+        select(table.c.regra_id, table.c.data).where(tuple_(table.c.regra_id, table.c.data).in_(keys))
+    ).tuples())
+    new = [p for p in params if (p["regra_id"], p["data"]) not in existing]
+    if new:
+        db.execute(insert(table), new)
+    return {(p["regra_id"], p["data"]) for p in new}
+
+def mark_occurrences(db: Session, keys: list[tuple[int, date]], status: model.OccurrenceStatus):
+    if not keys:
+        return
+    table = model.RecurringOccurrence.__table__
+    db.execute(
+        update(table)
+        .where(table.c.regra_id == bindparam("b_regra_id"), table.c.data == bindparam("b_data"))
+        .values(status=status),
+        [{"b_regra_id": rule_id, "b_data": day} for rule_id, day in keys],
+    )
+
+def advance_rules(db: Session, updates: list[dict]):
+    """Grava a nova 'proxima_data' de cada regra (None = regra encerrada) em lote."""
+    if not updates:
+        return
+    table = model.RecurringRule.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(proxima_data=bindparam("b_proxima_data"), ativa=bindparam("b_ativa")),
+        updates,
+    )
+
+def insert_transactions(db: Session, rows: list[dict]):
+    """INSERT em lote de transações de vários usuários (cada linha com seu usuario_id)."""
+    if rows:
+        db.execute(insert(Transaction.__table__), rows) # Core: sem o custo do ORM por linha
+
+def insert_transfers(db: Session, rows: list[dict]):
+    """INSERT em lote de transferências de vários usuários."""
+    if rows:
+        db.execute(insert(Transfer.__table__), rows)
@@ -0,0 +1,192 @@
+# app/recurring/runner.py
+"""
+Agendador dos lançamentos recorrentes.
+
+Lança todas as ocorrências vencidas de todas as regras, em lotes de regras.
+Cada lote é UMA transação do banco:
+  1. trava as regras vencidas (FOR UPDATE SKIP LOCKED);
+  2. registra as ocorrências (regra_id, data) - as já registradas são ignoradas;
+  3. trava as contas envolvidas (em ordem de id, como as transferências);
+  4. insere as transações e transferências em lote, aplica os saldos
+     (saldo_atual + delta) e o resumo mensal, avança 'proxima_data';
+  5. commit.
+Se o processo cair no meio de um lote, nada dele é gravado; ao reiniciar, o lote
+é refeito do zero. Nada é lançado duas vezes.
+
+Roda em uma thread dentro da API (ver 'RecurringScheduler') ou manualmente:
+    python -m app.recurring.runner
+"""
+import os
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from typing import cast
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from app.accounts import repository as accounts_repository
+from app.accounts.service import invalidate_balance_history
+from app.categories.model import CategoryType
+from app.reports import repository as reports_repository
+from app.reports.service import add_summary_delta
+from app.transactions import categorizer
+from app.transactions.search import invalidate_search_index
+from app.users.model import User  # noqa: F401 (registra o model usado nas relações, para o modo linha de comando)
+from . import model, repository, schedule
+
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", "1000")) # Regras por lote (por commit)
+# Intervalo entre execuções do agendador dentro da API (0 desativa)
+RECURRING_RUNNER_INTERVAL_SECONDS = float(os.getenv("RECURRING_RUNNER_INTERVAL_SECONDS", "3600"))
+# Ocorrências atrasadas lançadas por regra em cada passada (o resto fica para a próxima)
+RECURRING_MAX_CATCH_UP = 366
+
+def _signed(valor, tipo: CategoryType) -> Decimal:
+    return -Decimal(valor) if tipo == CategoryType.DESPESA else Decimal(valor)
+
+def _process_batch(db: Session, rules: list, today: date, summary: model.RunSummary):
+    rules_by_id = {cast(int, r.id): r for r in rules}
+
+    # Datas vencidas de cada regra e a nova 'proxima_data'
+    due: list[tuple[int, date]] = []
+    advances = []
+    for rule in rules:
+        dates, proxima = schedule.occurrences_until(rule, today, RECURRING_MAX_CATCH_UP)
+        due.extend((cast(int, rule.id), d) for d in dates)
+        advances.append({"b_id": rule.id, "b_proxima_data": proxima, "b_ativa": proxima is not None})
+    claimed = sorted(repository.claim_occurrences(db, due), key=lambda k: (k[1], k[0]))
+
+    # Trava todas as contas do lote de uma vez (ordem de id) antes de mexer em saldos
+    account_ids: set[int] = set()
+    for rule_id, _ in claimed:
+        rule = rules_by_id[rule_id]
+        account_ids.add(cast(int, rule.conta_id))
+        if rule.conta_destino_id is not None:
+            account_ids.add(cast(int, rule.conta_destino_id))
+    available = accounts_repository.lock_available_funds(db, account_ids)
+
+    deltas: dict[int, Decimal] = {}
+    summary_deltas: dict = {}
+    transactions: list[dict] = []
+    transfers: list[dict] = []
+    skipped: list[tuple[int, date]] = []
+    touched: list[tuple[int, date]] = []
+
+    # Transações primeiro: receitas do dia ajudam a cobrir as transferências do dia
+    for rule_id, day in claimed:
+        rule = rules_by_id[rule_id]
+        if rule.tipo_regra != model.RuleKind.TRANSACAO:
+            continue
+        conta_id, tipo = cast(int, rule.conta_id), cast(CategoryType, rule.tipo)
+        transactions.append({
+            "descricao": rule.descricao, "valor": rule.valor, "tipo": tipo, "data": day,
+            "conta_id": conta_id, "categoria_id": rule.categoria_id, "usuario_id": rule.usuario_id,
+        })
+        deltas[conta_id] = deltas.get(conta_id, Decimal("0")) + _signed(rule.valor, tipo)
+        add_summary_delta(summary_deltas, cast(int, rule.usuario_id), day, rule.categoria_id, tipo, rule.valor)
+        touched.append((conta_id, day))
+
+    # Transferências: mesmo teste de saldo das transferências manuais (saldo + limite de crédito)
+    for rule_id, day in claimed:
+        rule = rules_by_id[rule_id]
+        if rule.tipo_regra != model.RuleKind.TRANSFERENCIA:
+            continue
+        origem, destino = cast(int, rule.conta_id), cast(int, rule.conta_destino_id)
+        valor = Decimal(rule.valor)
+        if available[origem] + deltas.get(origem, Decimal("0")) < valor:
+            skipped.append((rule_id, day))
+            continue
+        transfers.append({
+            "valor": valor, "data": day, "conta_origem_id": origem,
+            "conta_destino_id": destino, "usuario_id": rule.usuario_id,
+        })
+        deltas[origem] = deltas.get(origem, Decimal("0")) - valor
+        deltas[destino] = deltas.get(destino, Decimal("0")) + valor
+        touched.extend([(origem, day), (destino, day)])
+
+    repository.insert_transactions(db, transactions)
+    repository.insert_transfers(db, transfers)
+    accounts_repository.apply_balance_deltas(db, deltas)
+    reports_repository.apply_summary_deltas(db, summary_deltas)
+    repository.mark_occurrences(db, skipped, model.OccurrenceStatus.SEM_SALDO)
+    repository.advance_rules(db, advances)
+    db.commit()
+    invalidate_balance_history(touched)
+    invalidate_search_index(t["usuario_id"] for t in transactions)
+    for t in transactions:
+        categorizer.learn(t["usuario_id"], t["descricao"], t["tipo"], t["categoria_id"])
+
+    summary.regras += len({rule_id for rule_id, _ in claimed})
+    summary.transacoes += len(transactions)
+    summary.transferencias += len(transfers)
+    summary.sem_saldo += len(skipped)
+    summary.lotes += 1
+
+def run_due_rules(db: Session, today: date | None = None, batch_size: int = RECURRING_BATCH_SIZE) -> model.RunSummary:
+    """Lança todas as ocorrências vencidas até 'today' (padrão: hoje), um commit por lote."""
+    today = today or date.today()
+    started = time.perf_counter()
+    summary = model.RunSummary(regras=0, transacoes=0, transferencias=0, sem_saldo=0, lotes=0, duracao_segundos=0)
+    last_id = 0
+    while True:
+        rules = repository.lock_due_rules(db, today, batch_size, after_id=last_id)
+        if not rules:
+            db.rollback() # Encerra a transação da consulta
+            break
+        try:
+            _process_batch(db, rules, today, summary)
+        except Exception:
+            db.rollback()
+            raise
+        last_id = rules[-1].id
+    summary.duracao_segundos = round(time.perf_counter() - started, 3)
+    return summary
+
+class RecurringScheduler:
+    """Thread em segundo plano que roda 'run_due_rules' a cada 'interval' segundos."""
+
+    def __init__(self, interval: float = RECURRING_RUNNER_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="recurring-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                summary = run_due_rules(db)
+                if summary.regras:
+                    print(f"✅ Recorrências: {summary.transacoes} transação(ões) e "
+                          f"{summary.transferencias} transferência(s) lançadas em {summary.duracao_segundos:.1f}s")
+            except Exception as e:
+                # Não derruba a thread: tenta de novo na próxima execução
+                print(f"⚠️ Erro ao lançar recorrências: {e}")
+            finally:
+                db.close()
+            self._stop.wait(self.interval)
+
+def main():
+    db = SessionLocal()
+    try:
+        summary = run_due_rules(db)
+    finally:
+        db.close()
+    print(f"✅ {summary.regras} regra(s) processada(s) em {summary.lotes} lote(s) ({summary.duracao_segundos:.1f}s): "
+          f"{summary.transacoes} transação(ões), {summary.transferencias} transferência(s), "
+          f"{summary.sem_saldo} sem saldo.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# app/recurring/schedule.py
+"""
+Cálculo das datas de ocorrência das regras recorrentes (funções puras, sem banco).
+"""
+import calendar
+from datetime import date, timedelta
+
+from .model import Frequency
+
+def _add_months(year: int, month: int, months: int) -> tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+def _monthly(year: int, month: int, day: int) -> date:
+    """Dia 'day' do mês, ou o último dia se o mês for mais curto (31 -> 28/29/30)."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+def first_on_or_after(
+    frequencia: Frequency,
+    intervalo: int,
+    data_inicio: date,
+    dia_do_mes: int | None,
+    dia_da_semana: int | None,
+    when: date,
+) -> date:
+    """Primeira ocorrência da regra em 'when' ou depois (nunca antes de 'data_inicio')."""
+    when = max(when, data_inicio)
+    if frequencia == Frequency.MENSAL:
+        day = dia_do_mes or data_inicio.day
+        months = (when.year - data_inicio.year) * 12 + when.month - data_inicio.month
+        step = -(-months // intervalo) * intervalo if months > 0 else 0 # Arredonda para cima
+        while True:
+            candidate = _monthly(*_add_months(data_inicio.year, data_inicio.month, step), day)
+            if candidate >= when:
+                return candidate
+            step += intervalo
+    # Semanal: a primeira ocorrência é o 'dia_da_semana' em 'data_inicio' ou depois
+    weekday = data_inicio.weekday() if dia_da_semana is None else dia_da_semana
+    first = data_inicio + timedelta(days=(weekday - data_inicio.weekday()) % 7)
+    if when <= first:
+        return first
+    period = 7 * intervalo
+    periods = -(-(when - first).days // period)
+    return first + timedelta(days=periods * period)
+
+def occurrences_until(rule, until: date, limit: int) -> tuple[list[date], date | None]:
+    """
+    Ocorrências da regra de 'rule.proxima_data' até 'until' (no máximo 'limit'),
+    e a próxima data depois delas (None se a regra terminou em 'data_fim').
+    """
+    dates: list[date] = []
+    current = rule.proxima_data
+    while current is not None and current <= until and len(dates) < limit:
+        if rule.data_fim is not None and current > rule.data_fim:
+            current = None
+            break
+        dates.append(current)
+        current = first_on_or_after(
+            rule.frequencia, rule.intervalo, rule.data_inicio,
+            rule.dia_do_mes, rule.dia_da_semana, current + timedelta(days=1),
+        )
+    if current is not None and rule.data_fim is not None and current > rule.data_fim:
+        current = None
+    return dates, current
@@ -0,0 +1,55 @@
+# app/recurring/service.py
+from datetime import date
+from typing import cast
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+
+from app.accounts import repository as accounts_repository
+from app.categories import repository as categories_repository
+from . import repository, model, schedule
+
+# --- SERVIÇO DE CRIAÇÃO (CREATE) ---
+
+def create_rule(db: Session, rule: model.RecurringRuleCreate, user_id: int):
+    """Cria uma regra recorrente, validando as contas/categoria e calculando a primeira ocorrência."""
+    account_ids = {rule.conta_id} | ({rule.conta_destino_id} if rule.conta_destino_id is not None else set())
+    owned = {
+        cast(int, a.id): a for a in accounts_repository.get_accounts_by_ids(db, account_ids)
+        if cast(int, a.usuario_id) == user_id
+    }
+    if account_ids - owned.keys():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found or does not belong to the user")
+    if len({a.moeda for a in owned.values()}) > 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Accounts have different currencies")
+    if rule.categoria_id is not None:
+        categories = categories_repository.get_categories_by_ids(db, {rule.categoria_id})
+        if not categories or cast(int, categories[0].usuario_id) != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found or does not belong to the user")
+
+    proxima_data: date | None = schedule.first_on_or_after(
+        rule.frequencia, rule.intervalo, rule.data_inicio, rule.dia_do_mes, rule.dia_da_semana, rule.data_inicio
+    )
+    if rule.data_fim is not None and proxima_data > rule.data_fim:
+        proxima_data = None # Nenhuma ocorrência dentro do período
+    return repository.create_rule(db, rule=rule, user_id=user_id, proxima_data=proxima_data)
+
+# --- SERVIÇOS DE LEITURA (READ) ---
+
+def get_all_rules_for_user(db: Session, user_id: int):
+    return repository.get_rules_by_user(db, user_id=user_id)
+
+def get_rule_by_id(db: Session, rule_id: int, user_id: int):
+    """Busca uma regra, verificando se ela pertence ao usuário logado."""
+    db_rule = repository.get_rule(db, rule_id=rule_id)
+    if db_rule is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recurring rule not found")
+    if cast(int, db_rule.usuario_id) != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this recurring rule")
+    return db_rule
+
+# --- SERVIÇO DE DELEÇÃO (DELETE) ---
+
+def delete_rule_by_id(db: Session, rule_id: int, user_id: int):
+    """Deleta a regra (os lançamentos já feitos continuam)."""
+    db_rule = get_rule_by_id(db, rule_id=rule_id, user_id=user_id)
+    return repository.delete_rule(db, db_rule=db_rule)
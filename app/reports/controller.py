@@ -0,0 +1,24 @@
+# app/reports/controller.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, cast
+
+from database import get_db
+from . import service, model
+from app.auth.service import Principal, get_current_principal
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+_YEAR_MONTH = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+@router.get("/monthly", response_model=List[model.MonthlyReport])
+def monthly_report(
+    inicio: str | None = Query(default=None, pattern=_YEAR_MONTH, description="Primeiro mês (AAAA-MM)"),
+    fim: str | None = Query(default=None, pattern=_YEAR_MONTH, description="Último mês (AAAA-MM)"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Receitas x despesas do usuário logado por mês, com o total de cada categoria.
+    """
+    return service.get_monthly_report(db=db, user_id=cast(int, current_user.id), inicio=inicio, fim=fim)
@@ -0,0 +1,43 @@
+# app/reports/model.py
+from sqlalchemy import Column, Integer, Enum, ForeignKey, Numeric, PrimaryKeyConstraint
+from pydantic import BaseModel
+from database import Base
+from app.categories.model import CategoryType
+
+# Transações sem categoria entram no resumo com categoria_id = 0
+NO_CATEGORY = 0
+
+# 1. Modelo da Tabela (SQLAlchemy)
+class MonthlySummary(Base):
+    """
+    Totais por (usuário, mês, categoria, tipo), mantidos a cada escrita de transação
+    (ver 'repository.apply_summary_deltas'). Os relatórios leem daqui em vez de
+    somar a tabela de transações.
+    """
+    __tablename__ = "monthly_summary"
+
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    ano_mes = Column(Integer, nullable=False) # AAAAMM (ex: 202601)
+    categoria_id = Column(Integer, nullable=False, default=NO_CATEGORY) # 0 = sem categoria
+    tipo = Column(Enum(CategoryType), nullable=False)
+    total = Column(Numeric(15, 2), nullable=False, default=0)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+    # A chave primária também é o índice das consultas: WHERE usuario_id = ? AND ano_mes BETWEEN ...
+    __table_args__ = (
+        PrimaryKeyConstraint(usuario_id, ano_mes, categoria_id, tipo),
+    )
+
+# 2. Schemas (Pydantic)
+class CategoryTotal(BaseModel):
+    categoria_id: int | None # None = sem categoria
+    tipo: CategoryType
+    total: float
+    quantidade: int
+
+class MonthlyReport(BaseModel):
+    ano_mes: str # AAAA-MM
+    receitas: float
+    despesas: float
+    saldo: float # receitas - despesas
+    categorias: list[CategoryTotal]
@@ -0,0 +1,29 @@
+# app/reports/rebuild.py
+"""
+Recalcula a tabela 'monthly_summary' a partir das transações existentes
+(necessário uma vez para os dados anteriores ao resumo, ou após correções manuais).
+Execute com: python -m app.reports.rebuild [--usuario ID]
+"""
+import argparse
+from database import Base, SessionLocal, engine
+from app.roles.model import Role  # noqa: F401 (registra as tabelas referenciadas)
+from app.users.model import User  # noqa: F401
+from app.accounts.model import Account  # noqa: F401
+from app.categories.model import Category  # noqa: F401
+from . import service
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula o resumo mensal de transações.")
+    parser.add_argument("--usuario", type=int, default=None, help="apenas este usuário (padrão: todos)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine) # Cria a tabela se ainda não existir
+    db = SessionLocal()
+    try:
+        rows = service.rebuild_monthly_summary(db, user_id=args.usuario)
+        print(f"✅ Resumo mensal recalculado: {rows} linha(s).")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
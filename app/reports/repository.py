@@ -0,0 +1,99 @@
+# app/reports/repository.py
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import Integer, cast, delete, extract, func, insert, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.categories.model import CategoryType
+from app.transactions.model import Transaction
+from . import model
+
+# Chave de uma linha do resumo: (usuario_id, ano_mes, categoria_id, tipo)
+SummaryKey = tuple[int, int, int, CategoryType]
+
+def year_month(value: date) -> int:
+    """2026-01-15 -> 202601"""
+    return value.year * 100 + value.month
+
+# --- FUNÇÕES DE ESCRITA ---
+
+def apply_summary_deltas(db: Session, deltas: dict[SummaryKey, tuple[Decimal, int]]):
+    """
+    Soma (total, quantidade) em cada linha do resumo, criando a linha se não existir
+    (INSERT ... ON CONFLICT DO UPDATE, uma instrução para todas as linhas).
+    NÃO faz commit: roda na mesma transação da escrita da transação.
+    """
+    params = [
+        {"usuario_id": key[0], "ano_mes": key[1], "categoria_id": key[2], "tipo": key[3],
+         "total": total, "quantidade": count}
+        for key, (total, count) in sorted(deltas.items()) # Ordem fixa evita deadlocks
+        if total != 0 or count != 0
+    ]
+    if not params:
+        return
+    table = model.MonthlySummary.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.usuario_id, table.c.ano_mes, table.c.categoria_id, table.c.tipo],
+            set_={
+                "total": table.c.total + stmt.excluded.total,
+                "quantidade": table.c.quantidade + stmt.excluded.quantidade,
+            },
+        )
+        db.execute(stmt, params)
+        return
+    # Outros bancos: UPDATE e, se a linha não existir, INSERT
+    for row in params:
+        result = db.execute(
+            update(table)
+            .where(table.c.usuario_id == row["usuario_id"], table.c.ano_mes == row["ano_mes"],
+                   table.c.categoria_id == row["categoria_id"], table.c.tipo == row["tipo"])
+            .values(total=table.c.total + row["total"], quantidade=table.c.quantidade + row["quantidade"])
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table), row)
+
+def rebuild_summary(db: Session, user_id: int | None = None) -> int:
+    """
+    Recalcula o resumo a partir da tabela de transações (de um usuário ou de todos)
+    com um único INSERT ... SELECT ... GROUP BY. NÃO faz commit. Retorna as linhas geradas.
+    """
+    table = model.MonthlySummary.__table__
+    transactions = Transaction.__table__
+    # literal_column: o mesmo texto no SELECT e no GROUP BY (sem parâmetros diferentes)
+    ano_mes = cast(
+        extract("year", transactions.c.data) * literal_column("100") + extract("month", transactions.c.data), Integer
+    )
+    source = select(
+        transactions.c.usuario_id,
+        ano_mes,
+        func.coalesce(transactions.c.categoria_id, model.NO_CATEGORY),
+        transactions.c.tipo,
+        func.sum(transactions.c.valor),
+        func.count(),
+    ).group_by(transactions.c.usuario_id, ano_mes, transactions.c.categoria_id, transactions.c.tipo)
+
+    clear = delete(table)
+    if user_id is not None:
+        clear = clear.where(table.c.usuario_id == user_id)
+        source = source.where(transactions.c.usuario_id == user_id)
+    db.execute(clear)
+    result = db.execute(insert(table).from_select(
+        ["usuario_id", "ano_mes", "categoria_id", "tipo", "total", "quantidade"], source
+    ))
+    return result.rowcount
+
+# --- FUNÇÕES DE LEITURA (READ) ---
+
+def get_summary_by_user(db: Session, user_id: int, ano_mes_inicio: int | None = None, ano_mes_fim: int | None = None):
+    """Linhas do resumo do usuário, em ordem de mês (usa a chave primária)."""
+    Summary = model.MonthlySummary
+    query = db.query(Summary).filter(Summary.usuario_id == user_id, Summary.quantidade != 0)
+    if ano_mes_inicio is not None:
+        query = query.filter(Summary.ano_mes >= ano_mes_inicio)
+    if ano_mes_fim is not None:
+        query = query.filter(Summary.ano_mes <= ano_mes_fim)
+    return query.order_by(Summary.ano_mes, Summary.categoria_id, Summary.tipo).all()
@@ -0,0 +1,74 @@
+# app/reports/service.py
+from datetime import date
+from decimal import Decimal
+from typing import cast
+from sqlalchemy.orm import Session
+
+from app.categories.model import CategoryType
+from . import repository, model
+
+# --- MANUTENÇÃO DO RESUMO (chamado pelas escritas de transações) ---
+
+def add_summary_delta(
+    deltas: dict[repository.SummaryKey, tuple[Decimal, int]],
+    user_id: int,
+    data: date,
+    categoria_id: int | None,
+    tipo: CategoryType,
+    valor,
+    sign: int = 1,
+):
+    """
+    Acumula em 'deltas' o efeito de uma transação no resumo mensal:
+    sign=1 ao criar, sign=-1 ao deletar (numa edição, -1 no valor antigo e +1 no novo).
+    """
+    key = (user_id, repository.year_month(data), categoria_id or model.NO_CATEGORY, tipo)
+    total, count = deltas.get(key, (Decimal("0"), 0))
+    deltas[key] = (total + sign * Decimal(str(valor)), count + sign)
+
+def rebuild_monthly_summary(db: Session, user_id: int | None = None) -> int:
+    """Recalcula o resumo a partir das transações (de um usuário ou de todos) e confirma."""
+    rows = repository.rebuild_summary(db, user_id=user_id)
+    db.commit()
+    return rows
+
+# --- SERVIÇOS DE LEITURA (READ) ---
+
+def _parse_year_month(value: str | None) -> int | None:
+    """'2026-01' -> 202601"""
+    if value is None:
+        return None
+    year, month = value.split("-")
+    return int(year) * 100 + int(month)
+
+def get_monthly_report(db: Session, user_id: int, inicio: str | None = None, fim: str | None = None) -> list[model.MonthlyReport]:
+    """
+    Receitas x despesas por mês e por categoria, lidas do resumo mensal
+    (custo proporcional a meses x categorias, não ao número de transações).
+    """
+    rows = repository.get_summary_by_user(
+        db, user_id=user_id, ano_mes_inicio=_parse_year_month(inicio), ano_mes_fim=_parse_year_month(fim)
+    )
+    reports: dict[int, model.MonthlyReport] = {}
+    for row in rows:
+        ano_mes = cast(int, row.ano_mes)
+        report = reports.get(ano_mes)
+        if report is None:
+            report = reports[ano_mes] = model.MonthlyReport(
+                ano_mes=f"{ano_mes // 100:04d}-{ano_mes % 100:02d}",
+                receitas=0, despesas=0, saldo=0, categorias=[],
+            )
+        total = float(cast(Decimal, row.total))
+        if row.tipo == CategoryType.RECEITA:
+            report.receitas += total
+        else:
+            report.despesas += total
+        report.categorias.append(model.CategoryTotal(
+            categoria_id=cast(int, row.categoria_id) or None, # 0 = sem categoria
+            tipo=cast(CategoryType, row.tipo), total=total, quantidade=cast(int, row.quantidade),
+        ))
+    for report in reports.values():
+        report.receitas = round(report.receitas, 2)
+        report.despesas = round(report.despesas, 2)
+        report.saldo = round(report.receitas - report.despesas, 2)
+    return list(reports.values())
@@ -0,0 +1,123 @@
+# app/transactions/categorizer.py
+"""
+Categorização automática das transações a partir do histórico do usuário.
+
+Para cada usuário, um índice em memória conta quantas vezes cada palavra da
+descrição apareceu em cada categoria (separado por tipo: Despesa/Receita).
+Ele é montado na primeira vez que o usuário precisa dele (UMA consulta nas
+transações mais recentes já categorizadas) e depois atualizado a cada
+criação, edição ou exclusão, sem voltar ao banco. Sugerir uma categoria é só
+olhar algumas chaves em dicionários: nenhuma consulta por linha.
+
+A sugestão é a categoria com mais "votos": cada palavra conhecida vota em suas
+categorias na proporção em que apareceu em cada uma; a confiança é a fração
+dos votos que a vencedora recebeu.
+"""
+import os
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.auth.cache import TTLCache
+from app.categories.model import CategoryType
+from . import model
+from .text import tokenize
+
+# Transações (as mais recentes, já categorizadas) usadas para montar o índice de um usuário
+CATEGORIZER_HISTORY_LIMIT = int(os.getenv("CATEGORIZER_HISTORY_LIMIT", "20000"))
+# Confiança mínima (0 a 1) para a categoria ser atribuída automaticamente
+CATEGORIZER_MIN_CONFIDENCE = float(os.getenv("CATEGORIZER_MIN_CONFIDENCE", "0.6"))
+CATEGORIZER_CACHE_MAX_USERS = int(os.getenv("CATEGORIZER_CACHE_MAX_USERS", "1024"))
+CATEGORIZER_CACHE_TTL_SECONDS = float(os.getenv("CATEGORIZER_CACHE_TTL_SECONDS", "3600"))
+
+def _keywords(tokens) -> set[str]:
+    """Palavras que identificam a transação (sem números soltos, como datas e códigos)."""
+    return {token for token in tokens if len(token) > 1 and not token.isdigit()}
+
+class CategoryIndex:
+    """(tipo, palavra) -> {categoria_id: ocorrências} das transações de um usuário."""
+
+    def __init__(self):
+        self.counts: dict[tuple[CategoryType, str], dict[int, int]] = {}
+        self.totals: dict[tuple[CategoryType, str], int] = {}
+        self._lock = threading.Lock()
+
+    def learn(self, tokens, tipo: CategoryType, categoria_id: int, weight: int = 1):
+        """Soma (weight=1) ou retira (weight=-1) uma transação da contagem."""
+        with self._lock:
+            for token in _keywords(tokens):
+                key = (tipo, token)
+                by_category = self.counts.setdefault(key, {})
+                previous = by_category.get(categoria_id, 0)
+                count = max(previous + weight, 0)
+                if count > 0:
+                    by_category[categoria_id] = count
+                else:
+                    by_category.pop(categoria_id, None)
+                # Só o que a categoria realmente mudou: retirar uma transação que o índice
+                # não contou (fora do histórico carregado) não mexe no total
+                total = self.totals.get(key, 0) + (count - previous)
+                if total > 0 and by_category:
+                    self.totals[key] = total
+                else:
+                    self.counts.pop(key, None)
+                    self.totals.pop(key, None)
+
+    def suggest(self, tokens, tipo: CategoryType) -> tuple[int, float] | None:
+        """(categoria_id, confiança) mais provável para a descrição, ou None se nenhuma palavra for conhecida."""
+        votes: dict[int, float] = {}
+        voters = 0
+        with self._lock:
+            for token in _keywords(tokens):
+                key = (tipo, token)
+                by_category = self.counts.get(key)
+                if not by_category:
+                    continue
+                voters += 1
+                total = self.totals[key]
+                for categoria_id, count in by_category.items():
+                    votes[categoria_id] = votes.get(categoria_id, 0.0) + count / total
+        if not votes:
+            return None
+        categoria_id, score = max(votes.items(), key=lambda item: (item[1], -item[0]))
+        return categoria_id, round(score / voters, 4)
+
+categorizer_cache = TTLCache(max_size=CATEGORIZER_CACHE_MAX_USERS, ttl_seconds=CATEGORIZER_CACHE_TTL_SECONDS)
+
+def get_index(db: Session, user_id: int) -> CategoryIndex:
+    """Índice do usuário (do cache, ou montado com uma consulta no histórico recente)."""
+    index = categorizer_cache.get(user_id)
+    if index is None:
+        Transaction = model.Transaction
+        rows = db.execute(
+            select(Transaction.descricao_busca, Transaction.tipo, Transaction.categoria_id)
+            .where(Transaction.usuario_id == user_id, Transaction.categoria_id.is_not(None))
+            .order_by(Transaction.data.desc(), Transaction.id.desc()) # Índice (usuario_id, data, id)
+            .limit(CATEGORIZER_HISTORY_LIMIT)
+        )
+        index = CategoryIndex()
+        for descricao_busca, tipo, categoria_id in rows:
+            index.learn((descricao_busca or "").split(), tipo, categoria_id)
+        categorizer_cache.set(user_id, index)
+    return index
+
+def suggest_category(db: Session, user_id: int, descricao: str | None, tipo: CategoryType) -> tuple[int, float] | None:
+    tokens = tokenize(descricao)
+    if not tokens:
+        return None
+    return get_index(db, user_id).suggest(tokens, tipo)
+
+def learn(user_id: int, descricao: str | None, tipo: CategoryType, categoria_id: int | None, weight: int = 1):
+    """
+    Atualiza o índice do usuário com uma transação gravada (weight=1) ou removida (weight=-1).
+    Se o índice não estiver em memória, nada a fazer: ele será montado do banco, já com ela.
+    """
+    if categoria_id is None:
+        return
+    index = categorizer_cache.get(user_id)
+    if index is not None:
+        index.learn(tokenize(descricao), tipo, categoria_id, weight)
+
+def invalidate_categorizer(user_id: int):
+    """Descarta o índice do usuário (ex: categoria removida ou com o tipo alterado)."""
+    categorizer_cache.invalidate(user_id)
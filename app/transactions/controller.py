@@ -1,45 +1,182 @@
 # app/transactions/controller.py
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, File, Form, Query, Response, UploadFile, status
 from sqlalchemy.orm import Session
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from typing import List, cast # <-- Importa o 'cast' para corrigir o Pylance
+from datetime import date
 
 from database import get_db
 from . import service, model
-# Importa o 'get_current_user' para proteger as rotas
-from app.auth.service import get_current_user
-from app.users.model import UserPublic # Importa o schema Pydantic 'UserPublic'
+from .importer import ImportFormat, detect_format
+# Importa o 'get_current_principal' para proteger as rotas
+from app.auth.service import Principal, get_current_principal
+from app.idempotency.service import get_idempotency_key, run_idempotent
+from pagination import MAX_PAGE_SIZE, set_next_cursor
+from streaming import ExportFormat
 
 # Este é o NOVO controller, agora protegido e usando SQLAlchemy
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
-@router.post("/", response_model=model.TransactionPublic, status_code=status.HTTP_201_CREATED)
+def get_transaction_filters(
+    data_inicio: date | None = Query(default=None, description="Data inicial (inclusive)"),
+    data_fim: date | None = Query(default=None, description="Data final (inclusive)"),
+    conta_id: int | None = None,
+    categoria_id: int | None = None,
+    tipo: model.CategoryType | None = None,
+    valor_min: float | None = Query(default=None, ge=0),
+    valor_max: float | None = Query(default=None, ge=0),
+) -> model.TransactionFilter:
+    """Dependência que monta (e valida) os filtros da listagem a partir da query string."""
+    try:
+        return model.TransactionFilter(
+            data_inicio=data_inicio, data_fim=data_fim, conta_id=conta_id, categoria_id=categoria_id,
+            tipo=tipo, valor_min=valor_min, valor_max=valor_max,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False, include_context=False))
+
+@router.post("/", response_model=model.TransactionCreated, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     transaction: model.TransactionCreate, 
+    idempotency_key: str | None = Depends(get_idempotency_key),
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Cria uma nova transação (receita ou despesa) para o usuário logado.
+    Responde 409 se já existir uma igual (mesma conta, data, valor, tipo e descrição),
+    a menos que 'permitir_duplicada' seja true. Se for uma despesa que fez a categoria passar de 80% ou 100% do orçamento
+    do mês, os limiares ultrapassados vêm em 'alertas_orcamento'.
+    Com o cabeçalho 'Idempotency-Key', repetir a requisição devolve a resposta original sem criar outra transação.
     """
     # Passa o ID do usuário logado para o serviço (com 'cast' para Pylance)
-    return service.create_new_transaction(db=db, transaction=transaction, user_id=cast(int, current_user.id))
+    user_id = cast(int, current_user.id)
+    return run_idempotent(
+        db, user_id, idempotency_key, "POST /transactions", transaction,
+        lambda before_commit: service.create_new_transaction(
+            db=db, transaction=transaction, user_id=user_id, before_commit=before_commit
+        ),
+        response_model=model.TransactionCreated, status_code=status.HTTP_201_CREATED,
+    )
+
+@router.post("/bulk", response_model=List[model.TransactionPublic], status_code=status.HTTP_201_CREATED)
+def create_transactions_bulk(
+    transactions: List[model.TransactionCreate] = Body(min_length=1, max_length=model.BULK_MAX_TRANSACTIONS),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Cria várias transações do usuário logado em uma única requisição (e um único commit).
+    Se alguma conta ou categoria não pertencer ao usuário, nada é criado.
+    """
+    return service.create_transactions_bulk(db=db, transactions=transactions, user_id=cast(int, current_user.id))
+
+@router.post("/import", response_model=model.ImportSummary)
+def import_statement(
+    arquivo: UploadFile = File(description="Extrato em CSV (colunas data, descricao, valor) ou OFX"),
+    conta_id: int = Form(),
+    formato: ImportFormat | None = Form(default=None, description="csv ou ofx (padrão: pela extensão do arquivo)"),
+    encoding: str | None = Form(default=None, description="Codificação do arquivo (padrão: utf-8 para CSV, latin-1 para OFX)"),
+    permitir_duplicadas: bool = Form(default=False, description="Grava também as linhas iguais a transações já existentes"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Importa um extrato bancário para uma conta do usuário logado.
+    O arquivo é lido em streaming e gravado em lotes; retorna um relatório
+    com linhas lidas, importadas, rejeitadas (e o motivo), duplicadas (já
+    gravadas antes, ignoradas) e lotes gravados. Se o arquivo ficar ilegível no
+    meio (ex: aspas sem fechamento), as linhas anteriores continuam gravadas e o
+    motivo vem em 'erro_arquivo'.
+    """
+    return service.import_transactions(
+        db=db,
+        user_id=cast(int, current_user.id),
+        conta_id=conta_id,
+        stream=arquivo.file,
+        formato=formato or detect_format(arquivo.filename),
+        encoding=encoding,
+        permitir_duplicadas=permitir_duplicadas,
+    )
 
 @router.get("/", response_model=List[model.TransactionPublic])
 def list_transactions_for_current_user(
+    response: Response,
+    filters: model.TransactionFilter = Depends(get_transaction_filters),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    cursor: str | None = Query(default=None, description="Valor do header X-Next-Cursor da página anterior"),
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
-    Lista todas as transações do usuário logado.
+    Lista as transações do usuário logado (mais recentes primeiro).
+    Filtros opcionais: data_inicio/data_fim, conta_id, categoria_id, tipo, valor_min/valor_max.
+    Com 'limit', retorna uma página; se houver mais, o header X-Next-Cursor
+    traz o 'cursor' da próxima página (repita os mesmos filtros).
     """
     # Passa o ID do usuário logado para o serviço (com 'cast' para Pylance)
-    return service.get_all_transactions_for_user(db=db, user_id=cast(int, current_user.id))
+    items, next_cursor = service.get_all_transactions_for_user(
+        db=db, user_id=cast(int, current_user.id), limit=limit, cursor=cursor, filters=filters
+    )
+    set_next_cursor(response, next_cursor)
+    return items
+
+# IMPORTANTE: /suggest-category, /search e /export devem vir ANTES de /{transaction_id}
+@router.get("/suggest-category", response_model=model.CategorySuggestion)
+def suggest_category(
+    descricao: str = Query(min_length=1, max_length=500),
+    tipo: model.CategoryType = model.CategoryType.DESPESA,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Sugere a categoria de uma nova transação pela descrição, com base nas transações
+    já categorizadas do usuário logado. Ao criar uma transação sem 'categoria_id', a
+    sugestão é aplicada automaticamente quando a confiança é suficiente
+    (envie 'categorizar': false para desativar).
+    """
+    return service.suggest_category(db=db, user_id=cast(int, current_user.id), descricao=descricao, tipo=tipo)
+
+@router.get("/search", response_model=List[model.TransactionSearchResult])
+def search_transactions(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200, description="Texto buscado na descrição (tolera acentos e erros de digitação)"),
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    cursor: str | None = Query(default=None, description="Valor do header X-Next-Cursor da página anterior"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Busca transações do usuário logado pela descrição, das mais parecidas para as menos
+    ('relevancia' de 0 a 1). Se houver mais resultados, o header X-Next-Cursor traz o
+    'cursor' da próxima página (repita o mesmo 'q').
+    """
+    items, next_cursor = service.search_transactions(
+        db=db, user_id=cast(int, current_user.id), q=q, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return items
+
+
+@router.get("/export")
+def export_transactions(
+    formato: ExportFormat = ExportFormat.CSV,
+    filters: model.TransactionFilter = Depends(get_transaction_filters),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Exporta as transações do usuário logado em CSV ou NDJSON (aceita os mesmos filtros da listagem).
+    O arquivo é enviado em streaming, sem carregar o histórico inteiro em memória.
+    """
+    return service.export_transactions(db=db, user_id=cast(int, current_user.id), formato=formato, filters=filters)
 
 @router.get("/{transaction_id}", response_model=model.TransactionPublic)
 def get_transaction(
     transaction_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Busca uma transação específica do usuário logado.
@@ -52,7 +189,7 @@ def update_transaction(
     transaction_id: int, 
     transaction_in: model.TransactionUpdate, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Atualiza uma transação do usuário logado.
@@ -69,7 +206,7 @@ def update_transaction(
 def delete_transaction(
     transaction_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Deleta uma transação do usuário logado.
@@ -0,0 +1,70 @@
+# app/transactions/dedup.py
+"""
+Manutenção da impressão digital das transações ('fingerprint'), usada para
+recusar/ignorar duplicatas (ver 'text.transaction_fingerprint').
+
+Em um banco criado antes da coluna, preenche as transações antigas:
+    python -m app.transactions.dedup
+"""
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, add_missing_columns, engine
+from app.users.model import User  # noqa: F401 (registra os models das relações, para o modo linha de comando)
+from app.accounts.model import Account  # noqa: F401
+from app.categories.model import Category  # noqa: F401
+from . import model
+from .text import transaction_fingerprint
+
+BACKFILL_BATCH_SIZE = 5000
+
+_FINGERPRINT_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_transactions_fingerprint ON transactions USING hash (fingerprint)",
+]
+
+def ensure_fingerprint_column(bind: Engine = engine):
+    """
+    Cria a coluna em bancos anteriores a ela (o create_all não altera tabelas existentes)
+    e, no PostgreSQL, o índice hash.
+    """
+    add_missing_columns(bind, model.Transaction.__table__, {"fingerprint": None})
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as conn:
+        for ddl in _FINGERPRINT_DDL:
+            conn.execute(text(ddl))
+
+def backfill_fingerprints(db: Session) -> int:
+    """Preenche 'fingerprint' das transações gravadas antes da coluna existir."""
+    Transaction = model.Transaction
+    filled = 0
+    while True:
+        rows = db.execute(
+            select(
+                Transaction.id, Transaction.usuario_id, Transaction.conta_id, Transaction.data,
+                Transaction.valor, Transaction.tipo, Transaction.descricao,
+            )
+            .where(Transaction.fingerprint.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return filled
+        db.execute(
+            update(Transaction), # UPDATE em lote pela chave primária
+            [{"id": row.id, "fingerprint": transaction_fingerprint(*row[1:])} for row in rows],
+        )
+        db.commit()
+        filled += len(rows)
+
+def main():
+    ensure_fingerprint_column()
+    db = SessionLocal()
+    try:
+        filled = backfill_fingerprints(db)
+    finally:
+        db.close()
+    print(f"✅ Impressões digitais preenchidas: {filled} transação(ões).")
+
+if __name__ == "__main__":
+    main()
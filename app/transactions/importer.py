@@ -0,0 +1,173 @@
+# app/transactions/importer.py
+"""
+Leitura de extratos bancários (CSV e OFX) em streaming.
+
+Os parsers leem o arquivo aos poucos e produzem uma linha por vez, então a
+memória usada não depende do tamanho do arquivo. Cada linha vira um
+'TransactionCreate' (o tipo Despesa/Receita é inferido pelo sinal do valor
+quando o arquivo não informa).
+"""
+import csv
+import enum
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+from typing import BinaryIO, Iterator
+
+from app.categories.model import CategoryType
+from .model import TransactionCreate
+from .text import strip_accents
+
+IMPORT_BATCH_SIZE = 500 # Linhas gravadas por commit
+IMPORT_MAX_REPORTED_ERRORS = 100 # Erros detalhados no relatório (o total é sempre contado)
+_OFX_CHUNK_SIZE = 64 * 1024
+# Maior trecho sem '<' aceito no OFX (cabeçalho ou valor de uma tag): acima disso não é OFX
+_OFX_MAX_PENDING_SIZE = 8 * 1024
+
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    OFX = "ofx"
+
+# Nomes de coluna aceitos no CSV (já normalizados: minúsculas, sem acento)
+_CSV_COLUMNS = {
+    "data": ("data", "date", "data lancamento", "data_lancamento"),
+    "descricao": ("descricao", "description", "historico", "memo", "lancamento"),
+    "valor": ("valor", "amount", "value", "valor (r$)"),
+    "tipo": ("tipo", "type"),
+    "categoria_id": ("categoria_id", "category_id"),
+}
+
+# --- CONVERSÃO DOS CAMPOS ---
+
+def parse_amount(text: str) -> Decimal:
+    """Converte '1.234,56', '1,234.56', '-50.00' ou 'R$ 10,00' em Decimal."""
+    cleaned = re.sub(r"[^\d,.\-]", "", text or "")
+    if "," in cleaned and "." in cleaned:
+        # O último separador é o decimal
+        if cleaned.rfind(",") > cleaned.rfind("."):
+            cleaned = cleaned.replace(".", "").replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    elif "," in cleaned:
+        cleaned = cleaned.replace(",", ".")
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"valor inválido: {text!r}")
+
+def parse_date(text: str) -> date:
+    """Aceita AAAA-MM-DD, DD/MM/AAAA e AAAAMMDD[hhmmss...] (formato OFX)."""
+    text = (text or "").strip()
+    for fmt, size in (("%Y-%m-%d", 10), ("%d/%m/%Y", 10), ("%Y%m%d", 8)):
+        try:
+            return datetime.strptime(text[:size], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {text!r}")
+
+def build_transaction(raw: dict, conta_id: int) -> TransactionCreate:
+    """Converte uma linha do extrato em TransactionCreate (ValueError se inválida)."""
+    amount = parse_amount(raw.get("valor") or "")
+    tipo_text = strip_accents(raw.get("tipo") or "")
+    if tipo_text in ("despesa", "debito", "debit", "d"):
+        tipo = CategoryType.DESPESA
+    elif tipo_text in ("receita", "credito", "credit", "c"):
+        tipo = CategoryType.RECEITA
+    else:
+        # Sem tipo explícito: valor negativo é Despesa, positivo é Receita
+        tipo = CategoryType.DESPESA if amount < 0 else CategoryType.RECEITA
+    if amount == 0:
+        raise ValueError("valor zerado")
+
+    categoria_id = (raw.get("categoria_id") or "").strip()
+    descricao = (raw.get("descricao") or "").strip() or None
+    return TransactionCreate(
+        descricao=descricao[:500] if descricao else None,
+        valor=float(abs(amount)),
+        tipo=tipo,
+        data=parse_date(raw.get("data") or ""),
+        conta_id=conta_id,
+        categoria_id=int(categoria_id) if categoria_id else None,
+    )
+
+# --- PARSERS (STREAMING) ---
+
+def iter_csv_rows(stream: BinaryIO, encoding: str = "utf-8-sig") -> Iterator[tuple[int, dict]]:
+    """Produz (número da linha, campos) de um CSV separado por ',' ou ';'."""
+    text = io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline="")
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    reader = csv.reader(chain([header], text), delimiter=delimiter)
+    columns = [strip_accents(c) for c in next(reader, [])]
+
+    # Mapeia cada campo conhecido para a posição da coluna no arquivo
+    positions = {}
+    for field, aliases in _CSV_COLUMNS.items():
+        for index, column in enumerate(columns):
+            if column in aliases:
+                positions[field] = index
+                break
+    if "data" not in positions or "valor" not in positions:
+        raise ValueError("O CSV precisa ter as colunas 'data' e 'valor'")
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {
+            field: row[index] if index < len(row) else ""
+            for field, index in positions.items()
+        }
+
+def _iter_ofx_tags(stream: BinaryIO, encoding: str) -> Iterator[tuple[str, str]]:
+    """Produz (TAG, valor) de um arquivo OFX (SGML ou XML), lendo em blocos."""
+    text = io.TextIOWrapper(stream, encoding=encoding, errors="replace")
+    buffer = ""
+    while True:
+        chunk = text.read(_OFX_CHUNK_SIZE)
+        buffer += chunk
+        pieces = buffer.split("<")
+        # O último pedaço pode estar incompleto: fica para o próximo bloco
+        buffer = pieces.pop() if chunk else ""
+        if len(buffer) > _OFX_MAX_PENDING_SIZE:
+            # Sem '<' (ex: CSV ou binário enviado como .ofx): não acumula o arquivo em memória
+            raise ValueError("arquivo OFX inválido")
+        for piece in pieces:
+            if ">" not in piece:
+                continue
+            tag, _, value = piece.partition(">")
+            yield tag.strip().upper(), value.strip()
+        if not chunk:
+            if buffer and ">" in buffer:
+                tag, _, value = buffer.partition(">")
+                yield tag.strip().upper(), value.strip()
+            return
+
+def iter_ofx_rows(stream: BinaryIO, encoding: str = "latin-1") -> Iterator[tuple[int, dict]]:
+    """Produz (número do lançamento, campos) de cada <STMTTRN> de um OFX."""
+    current: dict | None = None
+    number = 0
+    for tag, value in _iter_ofx_tags(stream, encoding):
+        if tag == "STMTTRN":
+            current = {}
+        elif tag == "/STMTTRN" and current is not None:
+            number += 1
+            yield number, {
+                "data": current.get("DTPOSTED", ""),
+                "valor": current.get("TRNAMT", ""),
+                "descricao": current.get("MEMO") or current.get("NAME", ""),
+            }
+            current = None
+        elif current is not None and not tag.startswith("/"):
+            current[tag] = value
+
+def iter_statement_rows(stream: BinaryIO, formato: ImportFormat, encoding: str | None = None) -> Iterator[tuple[int, dict]]:
+    if formato == ImportFormat.OFX:
+        return iter_ofx_rows(stream, encoding=encoding or "latin-1")
+    return iter_csv_rows(stream, encoding=encoding or "utf-8-sig")
+
+def detect_format(filename: str | None) -> ImportFormat:
+    if filename and filename.lower().endswith(".ofx"):
+        return ImportFormat.OFX
+    return ImportFormat.CSV
@@ -1,11 +1,23 @@
 # app/transactions/model.py
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Numeric, Date
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Numeric, Date, Index
 from sqlalchemy.orm import relationship
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from database import Base
 from datetime import date
 # Importa o Enum de Categoria para reuso (Despesa/Receita)
 from app.categories.model import CategoryType 
+from app.budgets.model import BudgetAlert
+from .text import normalize_description, transaction_fingerprint
+
+def _search_text(context) -> str:
+    return normalize_description(context.get_current_parameters().get("descricao"))
+
+def _fingerprint(context) -> str:
+    params = context.get_current_parameters()
+    return transaction_fingerprint(
+        params["usuario_id"], params["conta_id"], params.get("data") or date.today(),
+        params["valor"], params["tipo"], params.get("descricao"),
+    )
 
 # 2. Modelo da Tabela (SQLAlchemy)
 class Transaction(Base):
@@ -13,6 +25,9 @@ class Transaction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     descricao = Column(String(500))
+    # Descrição normalizada (minúsculas, sem acento) para a busca: preenchida
+    # automaticamente em todo INSERT, inclusive os em lote (ver 'text.py')
+    descricao_busca = Column(String(500), default=_search_text)
     # Usamos Numeric para dinheiro
     valor = Column(Numeric(15, 2), nullable=False)
     tipo = Column(Enum(CategoryType), nullable=False) # Reusa o Enum 'Despesa'/'Receita'
@@ -23,12 +38,25 @@ class Transaction(Base):
     conta_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     # Uma transação pode não ter categoria (ex: transferência interna)
     categoria_id = Column(Integer, ForeignKey("categories.id"), nullable=True) 
+    # Impressão digital (ver 'text.transaction_fingerprint') para detectar duplicatas;
+    # preenchida automaticamente em todo INSERT, como 'descricao_busca'
+    fingerprint = Column(String(64), default=_fingerprint)
     
     # Relacionamentos (para o SQLAlchemy 'entender' as ligações)
     owner = relationship("User")
     account = relationship("Account")
     category = relationship("Category")
 
+    # Índice da listagem paginada (keyset): WHERE usuario_id = ? ORDER BY data DESC, id DESC
+    # (também atende os filtros por período). Os demais atendem os filtros por conta/categoria.
+    __table_args__ = (
+        Index("ix_transactions_usuario_data_id", usuario_id, data.desc(), id.desc()),
+        Index("ix_transactions_usuario_conta_data_id", usuario_id, conta_id, data.desc(), id.desc()),
+        Index("ix_transactions_usuario_categoria_data_id", usuario_id, categoria_id, data.desc(), id.desc()),
+        # Só igualdade (fingerprint IN (...)): no PostgreSQL, índice hash (menor que um B-tree de 64 caracteres)
+        Index("ix_transactions_fingerprint", fingerprint, postgresql_using="hash"),
+    )
+
 # 3. Schemas (Pydantic)
 # Schema base com campos comuns
 class TransactionBase(BaseModel):
@@ -41,18 +69,82 @@ class TransactionBase(BaseModel):
 
 # Schema para criar uma transação
 class TransactionCreate(TransactionBase):
-    pass
+    # Sem 'categoria_id', usa a categoria sugerida pelo histórico do usuário (ver 'categorizer')
+    categorizar: bool = True
+    # Por padrão, uma transação igual a outra já gravada (mesma conta, data, valor, tipo e
+    # descrição) é recusada como duplicada; True grava mesmo assim (ex: dois cafés no mesmo dia)
+    permitir_duplicada: bool = False
+
+# Máximo de transações por chamada de POST /transactions/bulk
+BULK_MAX_TRANSACTIONS = 1000
 
-# Schema para atualizar uma transação (não se pode mudar o tipo ou valor)
+# Schema para atualizar uma transação (o saldo das contas é ajustado pela diferença)
 class TransactionUpdate(BaseModel):
     descricao: str | None = Field(default=None, max_length=500)
+    valor: float | None = Field(default=None, gt=0)
+    tipo: CategoryType | None = None
     data: date | None = None
     conta_id: int | None = None
     categoria_id: int | None = None
 
+    @model_validator(mode="after")
+    def campos_obrigatorios(self):
+        # Estes campos podem ser omitidos, mas não apagados (são obrigatórios na tabela)
+        for field in ("valor", "tipo", "data", "conta_id"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} não pode ser nulo")
+        return self
+
 # Schema público (o que a API retorna)
 class TransactionPublic(TransactionBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
-    usuario_id: int
\ No newline at end of file
+    usuario_id: int
+
+# Schema dos filtros da listagem (query parameters de GET /transactions)
+class TransactionFilter(BaseModel):
+    data_inicio: date | None = Field(default=None, description="Data inicial (inclusive)")
+    data_fim: date | None = Field(default=None, description="Data final (inclusive)")
+    conta_id: int | None = None
+    categoria_id: int | None = None
+    tipo: CategoryType | None = None
+    valor_min: float | None = Field(default=None, ge=0)
+    valor_max: float | None = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def intervalos_validos(self):
+        if self.data_inicio and self.data_fim and self.data_inicio > self.data_fim:
+            raise ValueError("data_inicio não pode ser maior que data_fim")
+        if self.valor_min is not None and self.valor_max is not None and self.valor_min > self.valor_max:
+            raise ValueError("valor_min não pode ser maior que valor_max")
+        return self
+
+# Schemas do relatório de importação de extrato (POST /transactions/import)
+class ImportRowError(BaseModel):
+    linha: int # Linha do CSV ou número do lançamento no OFX
+    erro: str
+
+class ImportSummary(BaseModel):
+    formato: str
+    linhas_lidas: int = 0
+    importadas: int = 0
+    rejeitadas: int = 0
+    duplicadas: int = 0 # Linhas já gravadas antes (ex: extrato importado de novo), ignoradas
+    lotes: int = 0 # Quantidade de lotes gravados (um commit por lote)
+    erros: list[ImportRowError] = []
+    erro_arquivo: str | None = None # Erro que interrompeu a leitura (as linhas anteriores foram importadas)
+
+# Resultado de GET /transactions/suggest-category
+class CategorySuggestion(BaseModel):
+    categoria_id: int | None # None = nenhuma palavra da descrição é conhecida
+    confianca: float # 0 a 1
+
+# Resultado de GET /transactions/search
+class TransactionSearchResult(TransactionPublic):
+    relevancia: float # 0 a 1 (1 = todas as palavras da busca encontradas)
+
+# Resposta da criação: a transação e, para despesas, os limiares de orçamento
+# (80%, 100%) que ela ultrapassou
+class TransactionCreated(TransactionPublic):
+    alertas_orcamento: list[BudgetAlert] = []
@@ -1,6 +1,8 @@
 # app/transactions/repository.py
+from sqlalchemy import func, tuple_, insert, select
 from sqlalchemy.orm import Session
 from . import model
+from .text import normalize_description, transaction_fingerprint
 from datetime import date
 
 # --- FUNÇÕES DE LEITURA (READ) ---
@@ -9,16 +11,89 @@ def get_transaction(db: Session, transaction_id: int):
     """Busca uma transação pelo ID."""
     return db.query(model.Transaction).filter(model.Transaction.id == transaction_id).first()
 
-def get_transactions_by_user(db: Session, user_id: int):
-    """Busca todas as transações de um usuário específico, ordenadas pela mais recente."""
-    return db.query(model.Transaction).filter(
-        model.Transaction.usuario_id == user_id
-    ).order_by(model.Transaction.data.desc()).all()
+def _apply_filters(query, filters: model.TransactionFilter):
+    """Adiciona ao WHERE apenas os filtros informados (todos combinados com AND)."""
+    Transaction = model.Transaction
+    if filters.data_inicio is not None:
+        query = query.filter(Transaction.data >= filters.data_inicio)
+    if filters.data_fim is not None:
+        query = query.filter(Transaction.data <= filters.data_fim)
+    if filters.conta_id is not None:
+        query = query.filter(Transaction.conta_id == filters.conta_id)
+    if filters.categoria_id is not None:
+        query = query.filter(Transaction.categoria_id == filters.categoria_id)
+    if filters.tipo is not None:
+        query = query.filter(Transaction.tipo == filters.tipo)
+    if filters.valor_min is not None:
+        query = query.filter(Transaction.valor >= filters.valor_min)
+    if filters.valor_max is not None:
+        query = query.filter(Transaction.valor <= filters.valor_max)
+    return query
+
+def get_transactions_by_user(
+    db: Session,
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[date, int] | None = None,
+    filters: model.TransactionFilter | None = None,
+):
+    """
+    Busca as transações de um usuário, ordenadas pela mais recente (data, id).
+    - limit: quantidade máxima de linhas (None = todas)
+    - after: (data, id) da última linha da página anterior (paginação keyset)
+    - filters: período, conta, categoria, tipo e faixa de valor
+    """
+    query = db.query(model.Transaction).filter(model.Transaction.usuario_id == user_id)
+    if filters is not None:
+        query = _apply_filters(query, filters)
+    if after is not None:
+        query = query.filter(tuple_(model.Transaction.data, model.Transaction.id) < tuple_(*after))
+    query = query.order_by(model.Transaction.data.desc(), model.Transaction.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def find_by_fingerprints(db: Session, user_id: int, fingerprints: set[str]) -> dict[str, int]:
+    """
+    Transações já gravadas com alguma das impressões digitais: {fingerprint: id}.
+    Uma consulta para o lote inteiro (índice em 'fingerprint').
+    """
+    if not fingerprints:
+        return {}
+    Transaction = model.Transaction
+    rows = db.execute(
+        select(Transaction.fingerprint, func.min(Transaction.id))
+        .where(Transaction.usuario_id == user_id, Transaction.fingerprint.in_(fingerprints))
+        .group_by(Transaction.fingerprint)
+    )
+    return {fingerprint: transaction_id for fingerprint, transaction_id in rows}
+
+# Colunas exportadas por GET /transactions/export
+EXPORT_COLUMNS = ["id", "data", "descricao", "valor", "tipo", "conta_id", "categoria_id"]
+
+def iter_transaction_rows(db: Session, user_id: int, filters: model.TransactionFilter | None = None, batch_size: int = 1000):
+    """
+    Percorre as transações do usuário como tuplas simples (sem criar objetos ORM),
+    buscando 'batch_size' linhas por vez (cursor no servidor no PostgreSQL).
+    """
+    Transaction = model.Transaction
+    stmt = select(*(getattr(Transaction, column) for column in EXPORT_COLUMNS)).filter(
+        Transaction.usuario_id == user_id
+    )
+    if filters is not None:
+        stmt = _apply_filters(stmt, filters)
+    stmt = stmt.order_by(Transaction.data.desc(), Transaction.id.desc()).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt):
+        yield tuple(row)
 
 # --- FUNÇÃO DE CRIAÇÃO (CREATE) ---
 
 def create_transaction(db: Session, transaction: model.TransactionCreate, user_id: int):
-    """Cria uma nova transação no banco de dados."""
+    """
+    Cria uma nova transação no banco de dados.
+    NÃO faz commit (apenas flush, para obter o id): o serviço confirma
+    junto com a atualização do saldo da conta.
+    """
     
     # Cria o objeto do SQLAlchemy
     db_transaction = model.Transaction(
@@ -32,29 +107,60 @@ def create_transaction(db: Session, transaction: model.TransactionCreate, user_i
     )
     
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    db.flush()
     return db_transaction
 
+def create_transactions_bulk(db: Session, transactions: list[model.TransactionCreate], user_id: int, returning: bool = True):
+    """
+    Insere várias transações em um único INSERT em lote.
+    Com returning=True retorna os objetos criados (INSERT ... RETURNING).
+    NÃO faz commit: o serviço confirma junto com a atualização dos saldos.
+    """
+    rows = [
+        {
+            "descricao": t.descricao,
+            "valor": t.valor,
+            "tipo": t.tipo,
+            "data": t.data,
+            "conta_id": t.conta_id,
+            "categoria_id": t.categoria_id,
+            "usuario_id": user_id,
+        }
+        for t in transactions
+    ]
+    if not returning:
+        db.execute(insert(model.Transaction), rows)
+        return []
+    return list(db.scalars(
+        insert(model.Transaction).returning(model.Transaction, sort_by_parameter_order=True),
+        rows,
+    ))
+
 # --- FUNÇÃO DE ATUALIZAÇÃO (UPDATE) ---
 
 def update_transaction(db: Session, db_transaction: model.Transaction, transaction_in: model.TransactionUpdate):
-    """Atualiza os dados de uma transação."""
+    """Atualiza os dados de uma transação (sem commit, ver 'create_transaction')."""
     # Converte o schema Pydantic para um dicionário, excluindo campos não enviados
     update_data = transaction_in.model_dump(exclude_unset=True)
     
     for key, value in update_data.items():
          setattr(db_transaction, key, value)
+    if "descricao" in update_data:
+        setattr(db_transaction, "descricao_busca", normalize_description(transaction_in.descricao))
+    if update_data.keys() & {"conta_id", "data", "valor", "tipo", "descricao"}:
+        setattr(db_transaction, "fingerprint", transaction_fingerprint(
+            db_transaction.usuario_id, db_transaction.conta_id, db_transaction.data,
+            db_transaction.valor, db_transaction.tipo, db_transaction.descricao,
+        ))
          
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    db.flush()
     return db_transaction
 
 # --- FUNÇÃO DE DELEÇÃO (DELETE) ---
 
 def delete_transaction(db: Session, db_transaction: model.Transaction):
-    """Deleta uma transação do banco de dados."""
+    """Deleta uma transação do banco de dados (sem commit, ver 'create_transaction')."""
     db.delete(db_transaction)
-    db.commit()
+    db.flush()
     return db_transaction
\ No newline at end of file
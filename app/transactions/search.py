@@ -0,0 +1,206 @@
+# app/transactions/search.py
+"""
+Busca aproximada nas descrições das transações (GET /transactions/search).
+
+PostgreSQL: índice GIN de trigramas (pg_trgm) na coluna 'descricao_busca' e o
+operador 'q <% descricao_busca' (word_similarity), que tolera erros de digitação e
+palavras incompletas. O resultado vem ordenado pela similaridade.
+
+Outros bancos (SQLite local): índice invertido em memória por usuário
+(palavra -> transações, trigrama -> palavras), montado na primeira busca e
+descartado a cada escrita de transação do usuário, com a mesma normalização e
+uma pontuação equivalente (trigramas em comum / trigramas no total).
+
+Para criar o índice (e preencher 'descricao_busca' de transações antigas):
+    python -m app.transactions.search
+"""
+import os
+from sqlalchemy import and_, func, literal, or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, add_missing_columns, engine
+from app.auth.cache import TTLCache
+from app.users.model import User  # noqa: F401 (registra os models das relações, para o modo linha de comando)
+from app.accounts.model import Account  # noqa: F401
+from app.categories.model import Category  # noqa: F401
+from . import model
+from .text import normalize_description, trigrams
+
+# Similaridade mínima (0 a 1) para uma transação entrar no resultado
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", "0.5"))
+# Índices em memória (fora do PostgreSQL): quantos usuários e por quanto tempo
+SEARCH_INDEX_CACHE_MAX_USERS = int(os.getenv("SEARCH_INDEX_CACHE_MAX_USERS", "256"))
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+BACKFILL_BATCH_SIZE = 5000
+
+_SEARCH_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_descricao_busca_trgm "
+    "ON transactions USING gin (descricao_busca gin_trgm_ops)",
+]
+
+def ensure_search_indexes(bind: Engine = engine):
+    """
+    Cria a coluna em bancos anteriores a ela (o create_all não altera tabelas existentes)
+    e, no PostgreSQL, a extensão e o índice de trigramas.
+    """
+    # Fora do bloco abaixo: sem a extensão, a coluna ainda precisa existir
+    add_missing_columns(bind, model.Transaction.__table__, {"descricao_busca": None})
+    if bind.dialect.name != "postgresql":
+        return
+    try:
+        with bind.begin() as conn:
+            for ddl in _SEARCH_INDEX_DDL:
+                conn.execute(text(ddl))
+    except Exception as e:
+        # Sem permissão para CREATE EXTENSION, a busca funciona, mas sem índice
+        print(f"⚠️ Não foi possível criar o índice de busca (pg_trgm): {e}")
+
+# --- ÍNDICE INVERTIDO EM MEMÓRIA ---
+
+class InvertedIndex:
+    """Palavra -> ids das transações e trigrama -> palavras, das transações de um usuário."""
+
+    def __init__(self, rows):
+        self.postings: dict[str, set[int]] = {}
+        self.by_trigram: dict[str, set[str]] = {}
+        for transaction_id, descricao_busca in rows:
+            for token in (descricao_busca or "").split():
+                ids = self.postings.get(token)
+                if ids is None:
+                    ids = self.postings[token] = set()
+                    for trigram in trigrams(token):
+                        self.by_trigram.setdefault(trigram, set()).add(token)
+                ids.add(transaction_id)
+
+    def _similar_tokens(self, query_token: str) -> dict[str, float]:
+        """Palavras do índice parecidas com 'query_token' e a similaridade de cada uma."""
+        query_trigrams = trigrams(query_token)
+        shared: dict[str, int] = {}
+        for trigram in query_trigrams:
+            for token in self.by_trigram.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        similar = {}
+        for token, count in shared.items():
+            if token.startswith(query_token):
+                score = 1.0 if token == query_token else max(0.8, count / len(query_trigrams | trigrams(token)))
+            else:
+                score = count / len(query_trigrams | trigrams(token))
+            if score >= SEARCH_MIN_SIMILARITY:
+                similar[token] = score
+        return similar
+
+    def search(self, query_tokens: list[str]) -> dict[int, float]:
+        """
+        id -> relevância: média, entre as palavras da busca, da melhor similaridade
+        com alguma palavra da transação (0 para as palavras sem correspondência).
+        """
+        totals: dict[int, float] = {}
+        for query_token in query_tokens:
+            best: dict[int, float] = {}
+            for token, score in self._similar_tokens(query_token).items():
+                for transaction_id in self.postings[token]:
+                    if score > best.get(transaction_id, 0.0):
+                        best[transaction_id] = score
+            for transaction_id, score in best.items():
+                totals[transaction_id] = totals.get(transaction_id, 0.0) + score
+        return {
+            transaction_id: round(total / len(query_tokens), 6)
+            for transaction_id, total in totals.items()
+            if total / len(query_tokens) >= SEARCH_MIN_SIMILARITY
+        }
+
+search_index_cache = TTLCache(max_size=SEARCH_INDEX_CACHE_MAX_USERS, ttl_seconds=SEARCH_INDEX_TTL_SECONDS)
+
+def invalidate_search_index(user_ids):
+    """Descarta o índice em memória dos usuários cujas transações mudaram."""
+    for user_id in set(user_ids):
+        search_index_cache.invalidate(user_id)
+
+def _user_index(db: Session, user_id: int) -> InvertedIndex:
+    index = search_index_cache.get(user_id)
+    if index is None:
+        Transaction = model.Transaction
+        rows = db.execute(
+            select(Transaction.id, Transaction.descricao_busca).where(Transaction.usuario_id == user_id)
+        )
+        index = InvertedIndex(rows)
+        search_index_cache.set(user_id, index)
+    return index
+
+# --- BUSCA ---
+
+def _search_postgresql(db: Session, user_id: int, query: str, limit: int, after: tuple[float, int] | None):
+    Transaction = model.Transaction
+    # Limiar do operador '<%' só para esta transação do banco
+    db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"), {"t": str(SEARCH_MIN_SIMILARITY)})
+    score = func.word_similarity(literal(query), Transaction.descricao_busca)
+    stmt = select(Transaction, score.label("relevancia")).where(
+        Transaction.usuario_id == user_id,
+        literal(query).op("<%")(Transaction.descricao_busca), # Usa o índice GIN de trigramas
+    )
+    if after is not None:
+        stmt = stmt.where(or_(score < after[0], and_(score == after[0], Transaction.id < after[1])))
+    stmt = stmt.order_by(score.desc(), Transaction.id.desc()).limit(limit)
+    return [(transaction, float(relevancia)) for transaction, relevancia in db.execute(stmt)]
+
+def _search_in_memory(db: Session, user_id: int, query: str, limit: int, after: tuple[float, int] | None):
+    scores = _user_index(db, user_id).search(query.split())
+    ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    if after is not None:
+        ranked = [(i, s) for i, s in ranked if (s, i) < after]
+    page = ranked[:limit]
+    if not page:
+        return []
+    Transaction = model.Transaction
+    by_id = {
+        t.id: t for t in db.query(Transaction).filter(Transaction.id.in_([i for i, _ in page]))
+    }
+    return [(by_id[i], s) for i, s in page if i in by_id]
+
+def search_transactions(db: Session, user_id: int, query: str, limit: int, after: tuple[float, int] | None = None):
+    """
+    Até 'limit' (transação, relevância) do usuário parecidas com 'query', da mais
+    relevante para a menos (empate: id mais recente). 'after' = (relevância, id)
+    da última linha da página anterior.
+    """
+    normalized = normalize_description(query)
+    if not normalized:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgresql(db, user_id, normalized, limit, after)
+    return _search_in_memory(db, user_id, normalized, limit, after)
+
+# --- MANUTENÇÃO ---
+
+def backfill_search_text(db: Session) -> int:
+    """Preenche 'descricao_busca' das transações gravadas antes da coluna existir."""
+    Transaction = model.Transaction
+    filled = 0
+    while True:
+        rows = db.execute(
+            select(Transaction.id, Transaction.descricao)
+            .where(Transaction.descricao_busca.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return filled
+        db.execute(
+            update(Transaction), # UPDATE em lote pela chave primária
+            [{"id": transaction_id, "descricao_busca": normalize_description(descricao)} for transaction_id, descricao in rows],
+        )
+        db.commit()
+        filled += len(rows)
+
+def main():
+    ensure_search_indexes()
+    db = SessionLocal()
+    try:
+        filled = backfill_search_text(db)
+    finally:
+        db.close()
+    print(f"✅ Índice de busca pronto ({filled} descrição(ões) normalizada(s)).")
+
+if __name__ == "__main__":
+    main()
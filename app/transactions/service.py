@@ -1,59 +1,340 @@
 # app/transactions/service.py
+import codecs
+import csv
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import cast
+from pydantic import ValidationError
+from typing import Callable, cast
 from decimal import Decimal
+from datetime import date
 
-from . import repository, model
+from . import repository, model, importer, search, categorizer
 from app.accounts import repository as accounts_repository # Para validar a conta
+from app.accounts.service import invalidate_balance_history # Cache do histórico de saldo
+from app.budgets.service import check_budget_thresholds # Alertas de orçamento
+from app.categories import repository as categories_repository # Para validar a categoria
 from app.categories.model import CategoryType
+from app.reports import repository as reports_repository # Resumo mensal (relatórios)
+from app.reports.service import add_summary_delta
+from pagination import decode_cursor, paginate
+from .text import tokenize, transaction_fingerprint
+from streaming import EXPORT_BATCH_SIZE, ExportFormat, stream_rows
 
-def _update_account_balance_after_transaction(db: Session, account_id: int, valor: float, tipo: CategoryType, is_new: bool = True):
+def _signed_amount(valor, tipo: CategoryType) -> Decimal:
+    """Efeito da transação no saldo da conta: Receita soma, Despesa subtrai."""
+    valor_decimal = Decimal(str(valor))
+    return -valor_decimal if tipo == CategoryType.DESPESA else valor_decimal
+
+def _apply_summary(db: Session, user_id: int, transactions, sign: int = 1):
+    """Atualiza o resumo mensal (relatórios) com o efeito das transações, sem commit."""
+    deltas: dict = {}
+    for t in transactions:
+        add_summary_delta(deltas, user_id, t.data, t.categoria_id, t.tipo, t.valor, sign)
+    reports_repository.apply_summary_deltas(db, deltas)
+
+def _categorize(db: Session, user_id: int, transactions: list[model.TransactionCreate]) -> list[model.TransactionCreate]:
     """
-    Atualiza o saldo da conta após uma transação.
-    - Despesa: subtrai do saldo
-    - Receita: adiciona ao saldo
-    - is_new=True para nova transação, is_new=False para reverter (delete)
+    Preenche 'categoria_id' das transações sem categoria com a sugestão do histórico
+    do usuário (quando a confiança basta). Só dicionários em memória: nenhuma consulta por linha.
     """
-    db_account = accounts_repository.get_account(db, id_account=account_id)
-    if db_account:
-        valor_decimal = Decimal(str(valor))
-        saldo_atual = Decimal(str(db_account.saldo_atual))
-        
-        if is_new:
-            if tipo == CategoryType.DESPESA:
-                db_account.saldo_atual = float(saldo_atual - valor_decimal)
-            else:  # RECEITA
-                db_account.saldo_atual = float(saldo_atual + valor_decimal)
-        else:
-            # Reverter transação (ao deletar)
-            if tipo == CategoryType.DESPESA:
-                db_account.saldo_atual = float(saldo_atual + valor_decimal)
-            else:  # RECEITA
-                db_account.saldo_atual = float(saldo_atual - valor_decimal)
-        db.commit()
-        db.refresh(db_account)
+    pending = [t for t in transactions if t.categoria_id is None and t.categorizar and t.descricao]
+    if not pending:
+        return transactions
+    index = categorizer.get_index(db, user_id)
+    result = []
+    for t in transactions:
+        if t.categoria_id is None and t.categorizar and t.descricao:
+            suggestion = index.suggest(tokenize(t.descricao), t.tipo)
+            if suggestion is not None and suggestion[1] >= categorizer.CATEGORIZER_MIN_CONFIDENCE:
+                t = t.model_copy(update={"categoria_id": suggestion[0]})
+        result.append(t)
+    return result
+
+def _learn(user_id: int, transactions, weight: int = 1):
+    """Atualiza o índice de categorização com transações gravadas (ou removidas, weight=-1)."""
+    for t in transactions:
+        categorizer.learn(user_id, t.descricao, t.tipo, t.categoria_id, weight)
+
+def _fingerprints(user_id: int, transactions: list[model.TransactionCreate]) -> list[str]:
+    return [
+        transaction_fingerprint(user_id, t.conta_id, t.data, t.valor, t.tipo, t.descricao)
+        for t in transactions
+    ]
+
+def _find_duplicates(db: Session, user_id: int, transactions: list[model.TransactionCreate]) -> dict[int, int]:
+    """
+    Posição -> id da transação já gravada, para as transações iguais a uma já existente
+    (exceto as marcadas com 'permitir_duplicada'). Uma consulta para todas.
+    """
+    fingerprints = _fingerprints(user_id, transactions)
+    checked = {fp for fp, t in zip(fingerprints, transactions) if not t.permitir_duplicada}
+    existing = repository.find_by_fingerprints(db, user_id, checked)
+    return {
+        position: existing[fp]
+        for position, (fp, t) in enumerate(zip(fingerprints, transactions))
+        if not t.permitir_duplicada and fp in existing
+    }
+
+def _validate_ownership(db: Session, user_id: int, account_ids: set[int], category_ids: set[int]):
+    """Valida (uma consulta por tabela) que todas as contas e categorias pertencem ao usuário."""
+    owned_accounts = {
+        cast(int, a.id) for a in accounts_repository.get_accounts_by_ids(db, account_ids)
+        if cast(int, a.usuario_id) == user_id
+    }
+    if account_ids - owned_accounts:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Accounts not found or do not belong to the user: {sorted(account_ids - owned_accounts)}"
+        )
+    owned_categories = {
+        cast(int, c.id) for c in categories_repository.get_categories_by_ids(db, category_ids)
+        if cast(int, c.usuario_id) == user_id
+    }
+    if category_ids - owned_categories:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Categories not found or do not belong to the user: {sorted(category_ids - owned_categories)}"
+        )
 
 # --- SERVIÇO DE CRIAÇÃO (CREATE) ---
-def create_new_transaction(db: Session, transaction: model.TransactionCreate, user_id: int):
-    """Cria uma nova transação, validando se a conta pertence ao usuário."""
+def create_new_transaction(
+    db: Session,
+    transaction: model.TransactionCreate,
+    user_id: int,
+    before_commit: Callable[[model.TransactionCreated], None] | None = None,
+):
+    """
+    Cria uma nova transação, validando se a conta pertence ao usuário.
+    'before_commit' recebe a resposta antes do commit, para ser gravada na mesma transação do banco
+    (ver app/idempotency).
+    """
     # Valida se a conta informada pertence ao usuário
     db_account = accounts_repository.get_account(db, id_account=transaction.conta_id)
     if not db_account or cast(int, db_account.usuario_id) != user_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found or does not belong to the user")
+    duplicates = _find_duplicates(db, user_id, [transaction])
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Duplicate of transaction {duplicates[0]} (same account, date, amount, type and description); "
+                   "send permitir_duplicada=true to create it anyway",
+        )
+    [transaction] = _categorize(db, user_id, [transaction]) # Sem categoria: usa a sugerida pelo histórico
     
-    # Cria a transação
+    # Cria a transação e atualiza o saldo da conta (saldo_atual = saldo_atual + delta,
+    # direto no banco) na MESMA transação do banco: um único commit, sem perder
+    # atualizações quando várias escritas chegam juntas na mesma conta.
     db_transaction = repository.create_transaction(db=db, transaction=transaction, user_id=user_id)
-    
-    # Atualiza o saldo da conta
-    _update_account_balance_after_transaction(db, transaction.conta_id, transaction.valor, transaction.tipo, is_new=True)
-    
-    return db_transaction
+    accounts_repository.apply_balance_deltas(db, {transaction.conta_id: _signed_amount(transaction.valor, transaction.tipo)})
+    _apply_summary(db, user_id, [transaction])
+    # O resumo mensal já tem o gasto da categoria com esta despesa: basta comparar com o limite
+    alerts = []
+    if transaction.tipo == CategoryType.DESPESA:
+        alerts = check_budget_thresholds(db, user_id, transaction.categoria_id, transaction.data, transaction.valor)
+    db.refresh(db_transaction) # Ainda na transação: os valores como gravados
+    created = model.TransactionCreated.model_validate(db_transaction)
+    created.alertas_orcamento = alerts
+    if before_commit is not None:
+        before_commit(created)
+    db.commit()
+    invalidate_balance_history([(transaction.conta_id, transaction.data)])
+    search.invalidate_search_index([user_id])
+    _learn(user_id, [transaction])
+    return created
+
+def create_transactions_bulk(db: Session, transactions: list[model.TransactionCreate], user_id: int):
+    """
+    Cria várias transações de uma vez, em uma única transação do banco:
+    - valida cada conta/categoria distinta uma única vez;
+    - insere todas as linhas em um INSERT em lote;
+    - aplica UMA variação de saldo agregada por conta;
+    - faz um único commit.
+    """
+    account_ids = {t.conta_id for t in transactions}
+    category_ids = {t.categoria_id for t in transactions if t.categoria_id is not None}
+    _validate_ownership(db, user_id, account_ids, category_ids)
+    duplicates = _find_duplicates(db, user_id, transactions)
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Duplicate transactions (position -> existing transaction id): {duplicates}; "
+                   "send permitir_duplicada=true on those items to create them anyway",
+        )
+    transactions = _categorize(db, user_id, transactions)
+
+    db_transactions = repository.create_transactions_bulk(db=db, transactions=transactions, user_id=user_id)
+
+    deltas: dict[int, Decimal] = {}
+    for t in transactions:
+        deltas[t.conta_id] = deltas.get(t.conta_id, Decimal("0")) + _signed_amount(t.valor, t.tipo)
+    accounts_repository.apply_balance_deltas(db, deltas)
+    _apply_summary(db, user_id, transactions)
+
+    # Converte antes do commit (o commit expira os objetos e forçaria um SELECT por linha)
+    result = [model.TransactionPublic.model_validate(t) for t in db_transactions]
+    db.commit()
+    invalidate_balance_history((t.conta_id, t.data) for t in transactions)
+    search.invalidate_search_index([user_id])
+    _learn(user_id, transactions)
+    return result
+
+def import_transactions(
+    db: Session,
+    user_id: int,
+    conta_id: int,
+    stream,
+    formato: importer.ImportFormat,
+    encoding: str | None = None,
+    permitir_duplicadas: bool = False,
+) -> model.ImportSummary:
+    """
+    Importa um extrato (CSV/OFX) para a conta informada, lendo o arquivo em streaming.
+    As linhas válidas são gravadas em lotes de IMPORT_BATCH_SIZE (um INSERT em lote,
+    uma variação de saldo e um commit por lote); as inválidas entram no relatório.
+    Linhas já gravadas antes (mesma conta, data, valor, tipo e descrição) são contadas
+    em 'duplicadas' e ignoradas: importar o mesmo extrato de novo não duplica nada.
+    """
+    if encoding is not None:
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown encoding: {encoding}")
+    _validate_ownership(db, user_id, {conta_id}, set())
+    summary = model.ImportSummary(formato=formato.value)
+    owned_categories: set[int] = set()
+    rejected_categories: set[int] = set()
+    batch: list[tuple[int, model.TransactionCreate]] = []
+    # Impressões digitais gravadas por ESTA importação: linhas iguais dentro do mesmo
+    # extrato (ex: dois cafés no mesmo dia) não são duplicatas
+    imported_fingerprints: set[str] = set()
+
+    def reject(line: int, error: str):
+        summary.rejeitadas += 1
+        if len(summary.erros) < importer.IMPORT_MAX_REPORTED_ERRORS:
+            summary.erros.append(model.ImportRowError(linha=line, erro=error))
+
+    def flush():
+        # Valida de uma vez as categorias ainda não vistas neste lote
+        new_categories = {
+            t.categoria_id for _, t in batch
+            if t.categoria_id is not None and t.categoria_id not in owned_categories | rejected_categories
+        }
+        for category in categories_repository.get_categories_by_ids(db, new_categories):
+            if cast(int, category.usuario_id) == user_id:
+                owned_categories.add(cast(int, category.id))
+        rejected_categories.update(new_categories - owned_categories)
+
+        valid = []
+        for line, t in batch:
+            if t.categoria_id is not None and t.categoria_id in rejected_categories:
+                reject(line, f"categoria {t.categoria_id} não encontrada")
+            else:
+                valid.append(t)
+        batch.clear()
+        if not permitir_duplicadas:
+            fingerprints = _fingerprints(user_id, valid)
+            existing = repository.find_by_fingerprints(db, user_id, set(fingerprints) - imported_fingerprints)
+            new_rows = [(fp, t) for fp, t in zip(fingerprints, valid) if fp not in existing]
+            summary.duplicadas += len(valid) - len(new_rows)
+            imported_fingerprints.update(fp for fp, _ in new_rows)
+            valid = [t for _, t in new_rows]
+        if not valid:
+            return
+        valid = _categorize(db, user_id, valid)
+
+        repository.create_transactions_bulk(db=db, transactions=valid, user_id=user_id, returning=False)
+        delta = sum((_signed_amount(t.valor, t.tipo) for t in valid), Decimal("0"))
+        accounts_repository.apply_balance_deltas(db, {conta_id: delta})
+        _apply_summary(db, user_id, valid)
+        db.commit()
+        invalidate_balance_history((conta_id, t.data) for t in valid)
+        search.invalidate_search_index([user_id])
+        _learn(user_id, valid)
+        summary.importadas += len(valid)
+        summary.lotes += 1
+
+    try:
+        for line, raw in importer.iter_statement_rows(stream, formato, encoding=encoding):
+            summary.linhas_lidas += 1
+            try:
+                batch.append((line, importer.build_transaction(raw, conta_id=conta_id)))
+            except ValidationError as e:
+                error = e.errors()[0]
+                reject(line, f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+                continue
+            except ValueError as e:
+                reject(line, str(e))
+                continue
+            if len(batch) >= importer.IMPORT_BATCH_SIZE:
+                flush()
+        flush()
+    except (ValueError, csv.Error) as e:
+        # Erro no arquivo como um todo (ex: CSV sem as colunas obrigatórias, aspas sem fechamento)
+        if summary.linhas_lidas == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        # Os lotes anteriores já foram gravados: grava as linhas válidas pendentes e
+        # informa no relatório onde a leitura parou
+        flush()
+        summary.erro_arquivo = f"Leitura interrompida após {summary.linhas_lidas} linha(s): {e}"
+    return summary
 
 # --- SERVIÇOS DE LEITURA (READ) ---
-def get_all_transactions_for_user(db: Session, user_id: int):
-    """Retorna todas as transações do usuário."""
-    return repository.get_transactions_by_user(db, user_id=user_id)
+def get_all_transactions_for_user(
+    db: Session,
+    user_id: int,
+    limit: int | None = None,
+    cursor: str | None = None,
+    filters: model.TransactionFilter | None = None,
+):
+    """
+    Retorna as transações do usuário (filtradas), da mais recente para a mais antiga.
+    Com 'limit', retorna uma página e o cursor da próxima: (itens, next_cursor).
+    """
+    after = None
+    if cursor is not None:
+        data, transaction_id = decode_cursor(cursor, size=2)
+        try:
+            after = (date.fromisoformat(data), int(transaction_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = repository.get_transactions_by_user(
+        db, user_id=user_id, limit=limit + 1 if limit is not None else None, after=after, filters=filters
+    )
+    return paginate(rows, limit, key=lambda t: [t.data.isoformat(), t.id])
+
+def suggest_category(db: Session, user_id: int, descricao: str, tipo: CategoryType) -> model.CategorySuggestion:
+    """Categoria mais provável para a descrição, pelo histórico do usuário (sem consultar as transações)."""
+    suggestion = categorizer.suggest_category(db, user_id, descricao, tipo)
+    if suggestion is None:
+        return model.CategorySuggestion(categoria_id=None, confianca=0)
+    return model.CategorySuggestion(categoria_id=suggestion[0], confianca=suggestion[1])
+
+def search_transactions(db: Session, user_id: int, q: str, limit: int, cursor: str | None = None):
+    """
+    Busca nas descrições das transações do usuário, da mais relevante para a menos.
+    Retorna uma página e o cursor da próxima: (itens, next_cursor).
+    """
+    after = None
+    if cursor is not None:
+        relevancia, transaction_id = decode_cursor(cursor, size=2)
+        try:
+            after = (float(relevancia), int(transaction_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = search.search_transactions(db, user_id=user_id, query=q, limit=limit + 1, after=after)
+    page, next_cursor = paginate(rows, limit, key=lambda row: [row[1], row[0].id])
+    items = [
+        model.TransactionSearchResult.model_validate(
+            {**model.TransactionPublic.model_validate(transaction).model_dump(), "relevancia": relevancia}
+        )
+        for transaction, relevancia in page
+    ]
+    return items, next_cursor
+
+def export_transactions(db: Session, user_id: int, formato: ExportFormat, filters: model.TransactionFilter | None = None):
+    """Exporta as transações do usuário (CSV/NDJSON) em streaming, com memória constante."""
+    rows = repository.iter_transaction_rows(db, user_id=user_id, filters=filters, batch_size=EXPORT_BATCH_SIZE)
+    return stream_rows(repository.EXPORT_COLUMNS, rows, formato=formato, filename="transacoes")
 
 def get_transaction_by_id(db: Session, transaction_id: int, user_id: int):
     """Busca uma transação, verificando se ela pertence ao usuário."""
@@ -68,14 +349,52 @@ def get_transaction_by_id(db: Session, transaction_id: int, user_id: int):
 
 # --- SERVIÇO DE ATUALIZAÇÃO (UPDATE) ---
 def update_existing_transaction(db: Session, transaction_id: int, transaction_in: model.TransactionUpdate, user_id: int):
-    """Atualiza uma transação, verificando a permissão."""
+    """
+    Atualiza uma transação, verificando a permissão. Se 'valor', 'tipo' ou
+    'conta_id' mudarem, o saldo das contas recebe só a diferença (efeito novo
+    menos efeito antigo, somado por conta), no mesmo commit da alteração.
+    """
     # Reutiliza a lógica que verifica se a transação existe e pertence ao usuário
     db_transaction = get_transaction_by_id(db, transaction_id=transaction_id, user_id=user_id)
-    
-    # (Opcional) Adicionar validações extras se necessário
-    # ...
+    changes = transaction_in.model_dump(exclude_unset=True)
+
+    # Nova conta/categoria também precisam pertencer ao usuário
+    _validate_ownership(
+        db, user_id,
+        account_ids={changes["conta_id"]} if "conta_id" in changes else set(),
+        category_ids={changes["categoria_id"]} if changes.get("categoria_id") is not None else set(),
+    )
 
-    return repository.update_transaction(db=db, db_transaction=db_transaction, transaction_in=transaction_in)
+    old_account = cast(int, db_transaction.conta_id)
+    new_account = changes.get("conta_id", old_account)
+    deltas: dict[int, Decimal] = {old_account: -_signed_amount(db_transaction.valor, db_transaction.tipo)}
+    deltas[new_account] = deltas.get(new_account, Decimal("0")) + _signed_amount(
+        changes.get("valor", db_transaction.valor), changes.get("tipo", db_transaction.tipo)
+    )
+
+    # Resumo mensal: retira o efeito antigo e soma o novo (mudança de data/categoria/tipo/valor)
+    summary: dict = {}
+    add_summary_delta(summary, user_id, db_transaction.data, db_transaction.categoria_id,
+                      db_transaction.tipo, db_transaction.valor, sign=-1)
+    add_summary_delta(summary, user_id, changes.get("data", db_transaction.data),
+                      changes.get("categoria_id", db_transaction.categoria_id),
+                      changes.get("tipo", db_transaction.tipo), changes.get("valor", db_transaction.valor))
+
+    touched = [(old_account, db_transaction.data), (new_account, changes.get("data", db_transaction.data))]
+    # Antes da alteração, para tirar do índice de categorização (a correção manual ensina a categoria certa)
+    previous = model.TransactionCreate.model_validate(db_transaction, from_attributes=True)
+
+    repository.update_transaction(db=db, db_transaction=db_transaction, transaction_in=transaction_in)
+    accounts_repository.apply_balance_deltas(db, deltas) # Ignora contas com diferença zero
+    reports_repository.apply_summary_deltas(db, summary) # Ignora linhas sem mudança
+    db.commit()
+    db.refresh(db_transaction)
+    invalidate_balance_history(touched)
+    search.invalidate_search_index([user_id])
+    if changes.keys() & {"descricao", "tipo", "categoria_id"}:
+        _learn(user_id, [previous], weight=-1)
+        _learn(user_id, [db_transaction])
+    return db_transaction
 
 # --- SERVIÇO DE DELEÇÃO (DELETE) ---
 def delete_transaction_by_id(db: Session, transaction_id: int, user_id: int):
@@ -83,13 +402,16 @@ def delete_transaction_by_id(db: Session, transaction_id: int, user_id: int):
     # Reutiliza a lógica que verifica se a transação existe e pertence ao usuário
     db_transaction = get_transaction_by_id(db, transaction_id=transaction_id, user_id=user_id)
     
-    # Reverter o saldo antes de deletar
-    _update_account_balance_after_transaction(
-        db, 
-        cast(int, db_transaction.conta_id), 
-        cast(float, db_transaction.valor), 
-        db_transaction.tipo, 
-        is_new=False
+    # Reverte o saldo e deleta a transação no mesmo commit
+    accounts_repository.apply_balance_deltas(
+        db, {cast(int, db_transaction.conta_id): -_signed_amount(db_transaction.valor, db_transaction.tipo)}
     )
-    
-    return repository.delete_transaction(db=db, db_transaction=db_transaction)
\ No newline at end of file
+    _apply_summary(db, user_id, [db_transaction], sign=-1)
+    touched = [(cast(int, db_transaction.conta_id), db_transaction.data)]
+    previous = model.TransactionCreate.model_validate(db_transaction, from_attributes=True)
+    repository.delete_transaction(db=db, db_transaction=db_transaction)
+    db.commit()
+    invalidate_balance_history(touched)
+    search.invalidate_search_index([user_id])
+    _learn(user_id, [previous], weight=-1)
+    return db_transaction
\ No newline at end of file
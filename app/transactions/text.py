@@ -0,0 +1,44 @@
+# app/transactions/text.py
+"""
+Normalização de texto das descrições, usada na gravação (coluna 'descricao_busca')
+e na busca, para que os dois lados comparem exatamente a mesma forma:
+minúsculas, sem acentos, só letras/números separados por um espaço.
+Também gera a impressão digital usada para detectar transações duplicadas.
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def strip_accents(text: str) -> str:
+    """' Pão de Açúcar ' -> 'pao de acucar' (minúsculas, sem acento, sem espaços nas pontas)."""
+    text = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+def normalize_description(text: str | None) -> str:
+    """'PAG*Padaria  Pão-Quente 12/01' -> 'pag padaria pao quente 12 01'"""
+    if not text:
+        return ""
+    return _NON_WORD.sub(" ", strip_accents(text)).strip()
+
+def tokenize(text: str | None) -> list[str]:
+    """Palavras da descrição normalizada."""
+    return normalize_description(text).split()
+
+def trigrams(token: str) -> set[str]:
+    """Trigramas de uma palavra, no mesmo formato do pg_trgm ('  p', ' pa', 'pad', ..., 'ia ')."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def transaction_fingerprint(usuario_id, conta_id, data: date, valor, tipo, descricao: str | None) -> str:
+    """
+    SHA-256 (hex) de (usuário, conta, data, valor, tipo, descrição normalizada):
+    a mesma transação importada de novo ou reenviada pelo app gera o mesmo valor.
+    """
+    tipo_value = getattr(tipo, "value", tipo)
+    valor_text = f"{Decimal(str(valor)).quantize(Decimal('0.01'))}"
+    key = f"{usuario_id}|{conta_id}|{data.isoformat()}|{valor_text}|{tipo_value}|{normalize_description(descricao)}"
+    return hashlib.sha256(key.encode()).hexdigest()
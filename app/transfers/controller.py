@@ -1,13 +1,18 @@
 # app/transfers/controller.py
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from typing import List, cast # <-- Importa o 'cast' para corrigir o Pylance
+from datetime import date
 
 from database import get_db
 from . import service, model # Irá importar o service (próximo passo)
-# Importa o 'get_current_user' para proteger as rotas
-from app.auth.service import get_current_user, require_role
-from app.users.model import UserPublic, User as SQLAlchemyUser # Importa o schema Pydantic 'UserPublic'
+# Importa o 'get_current_principal' para proteger as rotas
+from app.auth.service import Principal, get_current_principal, require_role
+from app.idempotency.service import get_idempotency_key, run_idempotent
+from pagination import MAX_PAGE_SIZE, set_next_cursor
+from streaming import ExportFormat
 
 # Este é o NOVO controller, agora protegido e usando SQLAlchemy
 router = APIRouter(prefix="/transfers", tags=["Transfers"])
@@ -15,19 +20,28 @@ router = APIRouter(prefix="/transfers", tags=["Transfers"])
 @router.post("/", response_model=model.TransferPublic, status_code=status.HTTP_201_CREATED)
 def create_transfer(
     transfer: model.TransferCreate, 
+    idempotency_key: str | None = Depends(get_idempotency_key),
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Cria uma nova transferência entre contas do usuário logado.
+    Com o cabeçalho 'Idempotency-Key', repetir a requisição devolve a resposta original sem transferir de novo.
     """
     # Passa o ID do usuário logado para o serviço (com 'cast' para Pylance)
-    return service.create_new_transfer(db=db, transfer=transfer, id_user=cast(int, current_user.id))
+    id_user = cast(int, current_user.id)
+    return run_idempotent(
+        db, id_user, idempotency_key, "POST /transfers", transfer,
+        lambda before_commit: service.create_new_transfer(
+            db=db, transfer=transfer, id_user=id_user, before_commit=before_commit
+        ),
+        response_model=model.TransferPublic, status_code=status.HTTP_201_CREATED,
+    )
 
 @router.get("/", response_model=List[model.TransferPublic])
 def list_transfers_for_current_user(
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Lista todas as transferências pertencentes ao usuário logado.
@@ -35,11 +49,23 @@ def list_transfers_for_current_user(
     # Passa o ID do usuário logado para o serviço (com 'cast' para Pylance)
     return service.get_all_transfers_for_user(db=db, id_user=cast(int, current_user.id))
 
+# IMPORTANTE: /export deve vir ANTES de /{transfer_id}
+@router.get("/export")
+def export_transfers(
+    formato: ExportFormat = ExportFormat.CSV,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
+):
+    """
+    Exporta as transferências do usuário logado em CSV ou NDJSON, em streaming.
+    """
+    return service.export_transfers(db=db, id_user=cast(int, current_user.id), formato=formato)
+
 @router.get("/{transfer_id}", response_model=model.TransferPublic)
 def get_transfer(
     transfer_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Busca uma transferência específica do usuário logado pelo ID.
@@ -50,7 +76,7 @@ def get_transfer(
 def delete_transfer(
     transfer_id: int, 
     db: Session = Depends(get_db), 
-    current_user: UserPublic = Depends(get_current_user) # <- Proteção
+    current_user: Principal = Depends(get_current_principal) # <- Proteção
 ):
     """
     Deleta uma transferência do usuário logado.
@@ -61,12 +87,44 @@ def delete_transfer(
 
 # --- ENDPOINTS ADMIN ---
 
+def get_transfer_filters(
+    usuario_id: int | None = None,
+    data_inicio: date | None = Query(default=None, description="Data inicial (inclusive)"),
+    data_fim: date | None = Query(default=None, description="Data final (inclusive)"),
+) -> model.TransferFilter:
+    """Dependência que monta (e valida) os filtros das rotas admin a partir da query string."""
+    try:
+        return model.TransferFilter(usuario_id=usuario_id, data_inicio=data_inicio, data_fim=data_fim)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False, include_context=False))
+
 @router.get("/admin/all", response_model=List[model.TransferPublic])
 def list_all_transfers_admin(
+    response: Response,
+    filters: model.TransferFilter = Depends(get_transfer_filters),
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página"),
+    cursor: str | None = Query(default=None, description="Valor do header X-Next-Cursor da página anterior"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Lista as transferências de todos os usuários, da mais recente para a mais antiga (apenas para admin).
+    Filtros opcionais: usuario_id, data_inicio/data_fim. Se houver mais, o header X-Next-Cursor
+    traz o 'cursor' da próxima página (repita os mesmos filtros). Para tudo de uma vez, use /admin/export.
+    """
+    items, next_cursor = service.get_all_transfers_admin(db=db, limit=limit, cursor=cursor, filters=filters)
+    set_next_cursor(response, next_cursor)
+    return items
+
+@router.get("/admin/export")
+def export_transfers_admin(
+    formato: ExportFormat = ExportFormat.NDJSON,
+    filters: model.TransferFilter = Depends(get_transfer_filters),
     db: Session = Depends(get_db),
-    current_user: SQLAlchemyUser = Depends(require_role("admin"))
+    current_user: Principal = Depends(require_role("admin"))
 ):
     """
-    Lista todas as transferências de todos os usuários (apenas para admin).
+    Exporta as transferências de todos os usuários em NDJSON (ou CSV), em streaming
+    (aceita os mesmos filtros da listagem; apenas para admin).
     """
-    return service.get_all_transfers_admin(db=db)
\ No newline at end of file
+    return service.export_transfers_admin(db=db, formato=formato, filters=filters)
\ No newline at end of file
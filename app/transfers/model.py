@@ -1,7 +1,7 @@
 # app/transfers/model.py
-from sqlalchemy import Column, Integer, ForeignKey, Numeric, Date, CheckConstraint
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, Date, CheckConstraint, Index
 from sqlalchemy.orm import relationship
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from database import Base
 from datetime import date
 
@@ -27,6 +27,10 @@ class Transfer(Base):
     # Regra de negócio (baseada no seu script SQL)
     __table_args__ = (
         CheckConstraint("conta_origem_id <> conta_destino_id", name="chk_conta_origem_destino_diferentes"),
+        # Listagem/exportação do usuário: WHERE usuario_id = ? ORDER BY data DESC, id DESC
+        Index("ix_transfers_usuario_data_id", usuario_id, data.desc(), id.desc()),
+        # Listagem/exportação do admin (todos os usuários): ORDER BY data DESC, id DESC
+        Index("ix_transfers_data_id", data.desc(), id.desc()),
     )
 
 # 2. Schemas (Pydantic) - O que a API usa
@@ -55,4 +59,16 @@ class TransferPublic(TransferBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: int
-    usuario_id: int
\ No newline at end of file
+    usuario_id: int
+
+class TransferFilter(BaseModel):
+    """Filtros da listagem/exportação de transferências do admin."""
+    usuario_id: int | None = None
+    data_inicio: date | None = Field(default=None, description="Data inicial (inclusive)")
+    data_fim: date | None = Field(default=None, description="Data final (inclusive)")
+
+    @model_validator(mode="after")
+    def intervalo_valido(self):
+        if self.data_inicio and self.data_fim and self.data_inicio > self.data_fim:
+            raise ValueError("data_inicio não pode ser maior que data_fim")
+        return self
@@ -1,4 +1,6 @@
 # app/transfers/repository.py
+from datetime import date
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 from . import model # Importa o model.py de 'transfers'
 
@@ -7,6 +9,7 @@ from . import model # Importa o model.py de 'transfers'
 def create_transfer(db: Session, transfer: model.TransferCreate, user_id: int):
     """
     Cria uma nova transferência no banco de dados.
+    NÃO faz commit: o saldo das contas é atualizado na mesma transação (ver service).
     """
     # Cria o objeto do SQLAlchemy
     db_transfer = model.Transfer(
@@ -18,8 +21,7 @@ def create_transfer(db: Session, transfer: model.TransferCreate, user_id: int):
     )
     
     db.add(db_transfer)
-    db.commit()
-    db.refresh(db_transfer)
+    db.flush() # Gera o ID sem confirmar
     return db_transfer
 
 # --- FUNÇÕES DE LEITURA (READ) ---
@@ -36,14 +38,69 @@ def get_transfers_by_user(db: Session, user_id: int):
         model.Transfer.usuario_id == user_id
     ).order_by(model.Transfer.data.desc()).all()
 
+# Colunas exportadas por GET /transfers/export
+EXPORT_COLUMNS = ["id", "data", "valor", "conta_origem_id", "conta_destino_id"]
+
+def iter_transfer_rows(db: Session, user_id: int, batch_size: int = 1000):
+    """
+    Percorre as transferências do usuário como tuplas simples (sem criar objetos ORM),
+    buscando 'batch_size' linhas por vez (cursor no servidor no PostgreSQL).
+    """
+    Transfer = model.Transfer
+    stmt = select(*(getattr(Transfer, column) for column in EXPORT_COLUMNS)).filter(
+        Transfer.usuario_id == user_id
+    ).order_by(Transfer.data.desc(), Transfer.id.desc()).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt):
+        yield tuple(row)
+
 # --- FUNÇÃO DE DELEÇÃO (DELETE) ---
 
 def delete_transfer(db: Session, db_transfer: model.Transfer):
-    """Deleta uma transferência do banco de dados."""
+    """Deleta uma transferência do banco de dados (sem commit, ver service)."""
     db.delete(db_transfer)
-    db.commit()
+    db.flush()
     return db_transfer
 
-def get_all_transfers(db: Session):
-    """Retorna todas as transferências de todos os usuários (para admin)."""
-    return db.query(model.Transfer).order_by(model.Transfer.data.desc()).all()
\ No newline at end of file
+# --- FUNÇÕES ADMIN (TODOS OS USUÁRIOS) ---
+
+def _apply_filters(query, filters: model.TransferFilter):
+    """Adiciona ao WHERE apenas os filtros informados (todos combinados com AND)."""
+    Transfer = model.Transfer
+    if filters.usuario_id is not None:
+        query = query.filter(Transfer.usuario_id == filters.usuario_id)
+    if filters.data_inicio is not None:
+        query = query.filter(Transfer.data >= filters.data_inicio)
+    if filters.data_fim is not None:
+        query = query.filter(Transfer.data <= filters.data_fim)
+    return query
+
+def get_all_transfers(
+    db: Session,
+    limit: int,
+    after: tuple[date, int] | None = None,
+    filters: model.TransferFilter | None = None,
+):
+    """
+    Uma página das transferências de todos os usuários (para admin), da mais recente
+    para a mais antiga (data, id).
+    - after: (data, id) da última linha da página anterior (paginação keyset)
+    """
+    query = db.query(model.Transfer)
+    if filters is not None:
+        query = _apply_filters(query, filters)
+    if after is not None:
+        query = query.filter(tuple_(model.Transfer.data, model.Transfer.id) < tuple_(*after))
+    return query.order_by(model.Transfer.data.desc(), model.Transfer.id.desc()).limit(limit).all()
+
+# Colunas exportadas por GET /transfers/admin/export
+ADMIN_EXPORT_COLUMNS = ["id", "usuario_id", "data", "valor", "conta_origem_id", "conta_destino_id"]
+
+def iter_all_transfer_rows(db: Session, filters: model.TransferFilter | None = None, batch_size: int = 1000):
+    """Como 'iter_transfer_rows', mas para as transferências de todos os usuários (para admin)."""
+    Transfer = model.Transfer
+    stmt = select(*(getattr(Transfer, column) for column in ADMIN_EXPORT_COLUMNS))
+    if filters is not None:
+        stmt = _apply_filters(stmt, filters)
+    stmt = stmt.order_by(Transfer.data.desc(), Transfer.id.desc()).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt):
+        yield tuple(row)
@@ -1,46 +1,53 @@
 # app/transfers/service.py
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import cast # <-- Importa o 'cast' para corrigir o Pylance
+from typing import Callable, cast # <-- Importa o 'cast' para corrigir o Pylance
 from decimal import Decimal
+from datetime import date
 
 from . import repository, model
 # Importa o 'service' de contas para reusar a lógica de validação
 from app.accounts import service as accounts_service
 from app.accounts import repository as accounts_repository
+from app.accounts.service import invalidate_balance_history # Cache do histórico de saldo
+from pagination import decode_cursor, paginate
+from streaming import EXPORT_BATCH_SIZE, ExportFormat, stream_rows
 
 # --- LÓGICA DE NEGÓCIO ---
-def _update_account_balances_for_transfer(db: Session, conta_origem_id: int, conta_destino_id: int, valor: float, is_new: bool = True):
+
+def _lock_transfer_accounts(db: Session, conta_origem_id: int, conta_destino_id: int, id_user: int):
     """
-    Atualiza os saldos das contas após uma transferência.
-    - Conta origem: subtrai o valor
-    - Conta destino: adiciona o valor
-    - is_new=True para nova transferência, is_new=False para reverter (delete)
+    Trava as duas contas (SELECT ... FOR UPDATE, em ordem de id) e valida se
+    existem e pertencem ao usuário. Em caso de erro desfaz a transação (solta as travas).
     """
-    db_origem = accounts_repository.get_account(db, id_account=conta_origem_id)
-    db_destino = accounts_repository.get_account(db, id_account=conta_destino_id)
-    
-    if db_origem and db_destino:
-        valor_decimal = Decimal(str(valor))
-        saldo_origem = Decimal(str(db_origem.saldo_atual))
-        saldo_destino = Decimal(str(db_destino.saldo_atual))
-        
-        if is_new:
-            db_origem.saldo_atual = float(saldo_origem - valor_decimal)
-            db_destino.saldo_atual = float(saldo_destino + valor_decimal)
-        else:
-            # Reverter transferência (ao deletar)
-            db_origem.saldo_atual = float(saldo_origem + valor_decimal)
-            db_destino.saldo_atual = float(saldo_destino - valor_decimal)
-        db.commit()
-        db.refresh(db_origem)
-        db.refresh(db_destino)
+    locked = accounts_repository.lock_accounts(db, {conta_origem_id, conta_destino_id})
+    for account_id in (conta_origem_id, conta_destino_id):
+        db_account = locked.get(account_id)
+        if db_account is None:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
+        if cast(int, db_account.usuario_id) != id_user:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this account")
+    return locked[conta_origem_id], locked[conta_destino_id]
+
+def _available_funds(db_account) -> Decimal:
+    """Saldo disponível para saída: saldo atual + limite de crédito (se houver)."""
+    return Decimal(db_account.saldo_atual) + Decimal(db_account.limite_credito or 0)
 
 # --- SERVIÇO DE CRIAÇÃO (CREATE) ---
 
-def create_new_transfer(db: Session, transfer: model.TransferCreate, id_user: int):
+def create_new_transfer(
+    db: Session,
+    transfer: model.TransferCreate,
+    id_user: int,
+    before_commit: Callable[[model.Transfer], None] | None = None,
+):
     """
-    Cria uma nova transferência, validando ambas as contas e o saldo.
+    Cria uma nova transferência em UMA transação: trava as duas contas, valida
+    o saldo (incluindo o limite de crédito), grava a transferência e os dois
+    saldos, e faz um único commit. 'before_commit' recebe a transferência antes
+    do commit, para a resposta ser gravada na mesma transação (ver app/idempotency).
     """
     
     # 1. Se conta_origem_id não foi informado, usa a primeira conta do usuário
@@ -54,25 +61,29 @@ def create_new_transfer(db: Session, transfer: model.TransferCreate, id_user: in
                 detail="Usuário não possui nenhuma conta. Crie uma conta antes de fazer transferências."
             )
         conta_origem_id = cast(int, first_account[0].id)
+    if conta_origem_id == transfer.conta_destino_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Conta de origem e destino não podem ser a mesma"
+        )
     
-    # 2. Valida a Conta de Origem:
-    db_account_origem = accounts_service.get_account_by_id(
-        db, id_account=conta_origem_id, id_user=id_user
-    )
-    
-    # 3. Valida a Conta de Destino:
-    db_account_destino = accounts_service.get_account_by_id(
-        db, id_account=transfer.conta_destino_id, id_user=id_user
-    )
+    # 2. Trava e valida as duas contas (origem e destino)
+    db_account_origem, db_account_destino = _lock_transfer_accounts(db, conta_origem_id, transfer.conta_destino_id, id_user)
+    if db_account_origem.moeda != db_account_destino.moeda:
+        # O mesmo 'valor' sai de uma conta e entra na outra: só faz sentido na mesma moeda
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Accounts have different currencies")
     
-    # 4. Valida Saldo Suficiente:
-    if cast(float, db_account_origem.saldo_atual) < transfer.valor:
+    # 3. Valida Saldo Suficiente (com a linha travada, ninguém muda o saldo até o commit)
+    valor = Decimal(str(transfer.valor))
+    if _available_funds(db_account_origem) < valor:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Saldo insuficiente na conta de origem."
         )
 
-    # 5. Cria o registro da transferência (com conta_origem_id preenchida)
+    # 4. Cria o registro da transferência (com conta_origem_id preenchida)
     transfer_with_origem = model.TransferCreate(
         valor=transfer.valor,
         data=transfer.data,
@@ -81,9 +92,16 @@ def create_new_transfer(db: Session, transfer: model.TransferCreate, id_user: in
     )
     db_transfer = repository.create_transfer(db=db, transfer=transfer_with_origem, user_id=id_user)
     
-    # 6. Atualiza os saldos das contas
-    _update_account_balances_for_transfer(db, conta_origem_id, transfer.conta_destino_id, transfer.valor, is_new=True)
-    
+    # 5. Atualiza os saldos das contas e confirma tudo junto
+    accounts_repository.apply_balance_deltas(db, {
+        conta_origem_id: -valor,
+        transfer.conta_destino_id: valor,
+    })
+    db.refresh(db_transfer) # Ainda na transação: os valores como gravados
+    if before_commit is not None:
+        before_commit(db_transfer)
+    db.commit()
+    invalidate_balance_history([(conta_origem_id, transfer.data), (transfer.conta_destino_id, transfer.data)])
     return db_transfer
 
 # --- SERVIÇOS DE LEITURA (READ) ---
@@ -92,6 +110,11 @@ def get_all_transfers_for_user(db: Session, id_user: int):
     """Retorna todas as transferências do usuário logado."""
     return repository.get_transfers_by_user(db, user_id=id_user)
 
+def export_transfers(db: Session, id_user: int, formato: ExportFormat):
+    """Exporta as transferências do usuário (CSV/NDJSON) em streaming, com memória constante."""
+    rows = repository.iter_transfer_rows(db, user_id=id_user, batch_size=EXPORT_BATCH_SIZE)
+    return stream_rows(repository.EXPORT_COLUMNS, rows, formato=formato, filename="transferencias")
+
 def get_transfer_by_id(db: Session, transfer_id: int, id_user: int):
     """Busca uma transferência específica, verificando se ela pertence ao usuário logado."""
     db_transfer = repository.get_transfer(db, transfer_id=transfer_id)
@@ -109,19 +132,39 @@ def delete_transfer_by_id(db: Session, transfer_id: int, id_user: int):
     """Deleta uma transferência, verificando a permissão."""
     db_transfer = get_transfer_by_id(db, transfer_id=transfer_id, id_user=id_user)
     
-    # Reverter os saldos antes de deletar
-    _update_account_balances_for_transfer(
-        db,
-        cast(int, db_transfer.conta_origem_id),
-        cast(int, db_transfer.conta_destino_id),
-        cast(float, db_transfer.valor),
-        is_new=False
-    )
-    
-    return repository.delete_transfer(db=db, db_transfer=db_transfer)
+    # Reverte os saldos e deleta na mesma transação (um único commit)
+    valor = Decimal(db_transfer.valor)
+    accounts_repository.apply_balance_deltas(db, {
+        cast(int, db_transfer.conta_origem_id): valor,
+        cast(int, db_transfer.conta_destino_id): -valor,
+    })
+    touched = [
+        (cast(int, db_transfer.conta_origem_id), db_transfer.data),
+        (cast(int, db_transfer.conta_destino_id), db_transfer.data),
+    ]
+    repository.delete_transfer(db=db, db_transfer=db_transfer)
+    db.commit()
+    invalidate_balance_history(touched)
+    return db_transfer
 
 # --- SERVIÇOS ADMIN ---
 
-def get_all_transfers_admin(db: Session):
-    """Retorna todas as transferências de todos os usuários (apenas para admin)."""
-    return repository.get_all_transfers(db)
\ No newline at end of file
+def get_all_transfers_admin(db: Session, limit: int, cursor: str | None = None, filters: model.TransferFilter | None = None):
+    """
+    Uma página das transferências de todos os usuários (apenas para admin),
+    da mais recente para a mais antiga: (itens, next_cursor).
+    """
+    after = None
+    if cursor is not None:
+        data, transfer_id = decode_cursor(cursor, size=2)
+        try:
+            after = (date.fromisoformat(data), int(transfer_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    rows = repository.get_all_transfers(db, limit=limit + 1, after=after, filters=filters)
+    return paginate(rows, limit, key=lambda t: [t.data.isoformat(), t.id])
+
+def export_transfers_admin(db: Session, formato: ExportFormat, filters: model.TransferFilter | None = None):
+    """Exporta as transferências de todos os usuários em streaming, com memória constante (apenas para admin)."""
+    rows = repository.iter_all_transfer_rows(db, filters=filters, batch_size=EXPORT_BATCH_SIZE)
+    return stream_rows(repository.ADMIN_EXPORT_COLUMNS, rows, formato=formato, filename="transferencias_admin")
\ No newline at end of file
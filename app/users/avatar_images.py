@@ -0,0 +1,126 @@
+# app/users/avatar_images.py
+import io
+import os
+import tempfile
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# --- CONFIGURAÇÕES DAS FOTOS DE PERFIL ---
+AVATAR_MAX_UPLOAD_BYTES = int(os.getenv("AVATAR_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+AVATAR_MAX_PIXELS = 40_000_000 # Protege contra "decompression bombs"
+AVATAR_FULL_SIZE = 512 # Lado máximo da imagem "cheia" guardada
+AVATAR_THUMBNAIL_SIZES = (64, 128, 256) # Miniaturas quadradas geradas no upload
+AVATAR_LIST_THUMBNAIL_SIZE = 128 # Miniatura usada em listagens ('avatar_thumbnail_url')
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024 # Cabeçalhos e boundaries do multipart
+
+# --- RECEBIMENTO DO UPLOAD (STREAMING) ---
+
+async def receive_upload_to_tempfile(request: Request, field_name: str = "file") -> str:
+    """
+    Lê o corpo multipart da requisição em pedaços e grava o campo 'field_name'
+    em um arquivo temporário, sem nunca manter o arquivo inteiro em memória.
+    O limite de tamanho é verificado pelo Content-Length (antes de ler) e
+    durante a leitura. Retorna o caminho do arquivo (quem chama deve apagá-lo).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Expected multipart/form-data")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > AVATAR_MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image too large")
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".upload")
+    tmp_file = os.fdopen(fd, "wb")
+    state = {"headers": {}, "field": bytearray(), "value": bytearray(), "writing": False, "size": 0, "found": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int):
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][bytes(state["field"]).lower()] = bytes(state["value"])
+        state["field"] = bytearray()
+        state["value"] = bytearray()
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition"))
+        state["writing"] = not state["found"] and options.get(b"name") == field_name.encode()
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if not state["writing"]:
+            return
+        state["size"] += end - start
+        if state["size"] > AVATAR_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image too large")
+        tmp_file.write(data[start:end])
+
+    def on_part_end():
+        if state["writing"]:
+            state["found"] = True
+            state["writing"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        tmp_file.close()
+        if not state["found"] or state["size"] == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing '{field_name}' file field")
+    except BaseException:
+        tmp_file.close()
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+# --- REDIMENSIONAMENTO ---
+
+def _encode_webp(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=85, method=4)
+    return buffer.getvalue()
+
+def render_avatar(source: str | bytes | BinaryIO) -> tuple[bytes, dict[int, bytes]]:
+    """
+    Gera, a partir da imagem enviada, a versão "cheia" (até AVATAR_FULL_SIZE px)
+    e as miniaturas quadradas de AVATAR_THUMBNAIL_SIZES, todas em WEBP.
+    Lança ValueError se o conteúdo não for uma imagem válida.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as image:
+            if image.width * image.height > AVATAR_MAX_PIXELS:
+                raise ValueError("Image has too many pixels")
+            # Em JPEG, decodifica direto em escala reduzida (muito mais rápido)
+            image.draft("RGB", (AVATAR_FULL_SIZE, AVATAR_FULL_SIZE))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError("Invalid image") from e
+
+    full = image.copy()
+    full.thumbnail((AVATAR_FULL_SIZE, AVATAR_FULL_SIZE), Image.Resampling.LANCZOS)
+    thumbnails = {
+        size: _encode_webp(ImageOps.fit(full, (size, size), Image.Resampling.LANCZOS))
+        for size in AVATAR_THUMBNAIL_SIZES
+    }
+    return _encode_webp(full), thumbnails
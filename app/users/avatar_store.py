@@ -0,0 +1,97 @@
+# app/users/avatar_store.py
+import hashlib
+import os
+import tempfile
+from typing import Protocol
+
+# Diretório onde as fotos de perfil ficam guardadas (uma vez por conteúdo).
+AVATAR_STORAGE_DIR = os.getenv("AVATAR_STORAGE_DIR", "media/avatars")
+
+class AvatarStore(Protocol):
+    """Interface de armazenamento das fotos de perfil (endereçadas pelo hash do conteúdo)."""
+
+    def put(self, data: bytes) -> str:
+        """Guarda 'data' e retorna a chave (sha256 hex do conteúdo)."""
+        ...
+
+    def write(self, key: str, data: bytes) -> None:
+        """Guarda 'data' sob uma chave derivada (ex: miniaturas, ver 'variant_key')."""
+        ...
+
+    def read(self, key: str) -> bytes | None:
+        """Retorna o conteúdo guardado sob 'key' (ou None se não existir)."""
+        ...
+
+def variant_key(avatar_hash: str, size: int) -> str:
+    """Chave da miniatura 'size' x 'size' de uma foto."""
+    return f"{avatar_hash}_{size}"
+
+class LocalAvatarStore:
+    """
+    Guarda cada imagem em disco, em '<root>/<2 primeiros caracteres>/<sha256>'.
+    Imagens iguais (mesmo conteúdo) são gravadas uma única vez.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, data: bytes) -> str:
+        key = hashlib.sha256(data).hexdigest()
+        self.write(key, data)
+        return key
+
+    def write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Grava em um arquivo temporário e renomeia: leitores nunca veem arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, key: str) -> bytes | None:
+        # A chave vem do banco, mas garantimos que é um hash (evita path traversal)
+        if not key.replace("_", "").isalnum():
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+_avatar_store: AvatarStore = LocalAvatarStore(AVATAR_STORAGE_DIR)
+
+def get_avatar_store() -> AvatarStore:
+    return _avatar_store
+
+def set_avatar_store(store: AvatarStore) -> None:
+    """Troca o armazenamento (ex: um bucket S3) sem mudar o resto da aplicação."""
+    global _avatar_store
+    _avatar_store = store
+
+# Assinaturas (magic bytes) dos formatos de imagem aceitos
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+def guess_media_type(data: bytes) -> str:
+    """Descobre o tipo da imagem pelo conteúdo."""
+    for signature, media_type in _IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
@@ -1,13 +1,19 @@
 # app/users/controller.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
 from database import get_db
 from .model import UserCreate, UserPublic, UserUpdate
 from . import service
-from app.auth.service import get_current_user
+from .avatar_store import guess_media_type
+from .avatar_images import receive_upload_to_tempfile
+from app.auth.service import Principal, get_current_principal, get_current_user
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -41,19 +47,38 @@ def get_current_user_info(current_user: UserPublic = Depends(get_current_user)):
 def update_my_avatar(
     avatar: AvatarUpdate,
     db: Session = Depends(get_db),
-    current_user: UserPublic = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Atualiza a foto de perfil do usuário logado.
+    Atualiza a foto de perfil do usuário logado (JSON com a imagem em base64).
+    Prefira o upload multipart em POST /users/me/avatar.
     """
     user_update = UserUpdate(profile_image_base64=avatar.profile_image_base64)
     return service.update_existing_user(db=db, id_user=current_user.id, user_in=user_update)
 
+@router.post("/me/avatar", response_model=UserPublic)
+async def upload_my_avatar(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Envia a foto de perfil do usuário logado como multipart/form-data (campo 'file').
+    O arquivo é gravado em disco em pedaços (com limite de tamanho) e, no servidor,
+    redimensionado e convertido em miniaturas uma única vez.
+    """
+    file_path = await receive_upload_to_tempfile(request, field_name="file")
+    try:
+        # Redimensionar usa CPU e o banco é síncrono: roda fora do event loop
+        return await run_in_threadpool(service.save_uploaded_avatar, db=db, id_user=current_user.id, file_path=file_path)
+    finally:
+        os.remove(file_path)
+
 @router.put("/me", response_model=UserPublic)
 def update_my_profile(
     user_update: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: UserPublic = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Atualiza os dados do perfil do usuário logado (nome, moeda, avatar).
@@ -61,6 +86,53 @@ def update_my_profile(
     return service.update_existing_user(db=db, id_user=current_user.id, user_in=user_update)
 
 # Rotas com parâmetro {id_user} devem vir DEPOIS das rotas /me
+@router.get("/{id_user}/avatar", response_class=Response)
+def get_user_avatar(
+    id_user: int,
+    request: Request,
+    size: int | None = None,
+    v: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna a foto de perfil do usuário ('size' = 64, 128 ou 256 para miniaturas).
+    Suporta cache HTTP: ETag/If-None-Match e Last-Modified/If-Modified-Since (304).
+    """
+    data, avatar_hash, updated_at = service.get_avatar(db=db, id_user=id_user, size=size)
+
+    etag = f'"{avatar_hash}-{size}"' if size else f'"{avatar_hash}"'
+    headers = {"ETag": etag}
+    if updated_at is not None:
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+    # A URL em 'avatar_url' tem '?v=<hash>': esse endereço nunca muda de conteúdo.
+    if v is not None and avatar_hash.startswith(v):
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        headers["Cache-Control"] = "no-cache"
+
+    if _is_not_modified(request, etag, updated_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=data, media_type=guess_media_type(data), headers=headers)
+
+def _is_not_modified(request: Request, etag: str, updated_at: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tem prioridade sobre If-Modified-Since
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and updated_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return updated_at.replace(microsecond=0) <= since
+    return False
+
 @router.put("/{id_user}", response_model=UserPublic)
 def update_user(id_user: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     """
@@ -0,0 +1,33 @@
+# app/users/migrate_avatars.py
+"""
+Move as fotos de perfil guardadas na coluna legada 'users.profile_image_base64'
+para o AvatarStore (disco, endereçado pelo hash do conteúdo).
+Execute com: python -m app.users.migrate_avatars
+"""
+from sqlalchemy.engine import Engine
+
+from database import SessionLocal, add_missing_columns, engine
+from . import model, service
+
+# Colunas novas de 'users' ({coluna: DEFAULT em SQL}), criadas em bancos antigos na subida da API
+_USER_COLUMNS: dict[str, str | None] = {
+    "avatar_hash": None,
+    "avatar_updated_at": None,
+    "token_version": "0", # NOT NULL: os usuários existentes começam na versão 0
+}
+
+def ensure_user_columns(bind: Engine = engine):
+    """Cria em 'users' as colunas que o create_all não adiciona a uma tabela existente."""
+    add_missing_columns(bind, model.User.__table__, _USER_COLUMNS)
+
+def main():
+    ensure_user_columns()
+    db = SessionLocal()
+    try:
+        migrated = service.migrate_legacy_avatars(db)
+        print(f"✅ {migrated} foto(s) de perfil migrada(s) para o AvatarStore.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
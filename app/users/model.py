@@ -1,11 +1,12 @@
 # app/users/model.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Text, DateTime
+from sqlalchemy.orm import relationship, deferred
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from database import Base
 import enum
 # Importa o schema Pydantic de Role
 from app.roles.model import RolePublic
+from .avatar_images import AVATAR_LIST_THUMBNAIL_SIZE
 
 # 1. Enum para moedas
 class CurrencyType(str, enum.Enum):
@@ -35,13 +36,34 @@ class User(Base):
     moeda = Column(Enum(CurrencyType), nullable=False, default=CurrencyType.BRL)
     
     # --- Campos adicionados pelo Encontro 5 ---
-    profile_image_base64 = Column(Text, nullable=True)  # Armazena imagem em base64
+    # LEGADO: a foto agora fica no AvatarStore (ver 'avatar_hash').
+    # 'deferred' faz com que a coluna nunca seja lida junto com o usuário.
+    profile_image_base64 = deferred(Column(Text, nullable=True))
+    # sha256 da foto de perfil no AvatarStore (app/users/avatar_store.py)
+    avatar_hash = Column(String(64), nullable=True)
+    avatar_updated_at = Column(DateTime(timezone=True), nullable=True)
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False) # Chave estrangeira
+    # Incrementado para revogar todos os tokens já emitidos (ex: troca de role)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relacionamento com a tabela Role
     # lazy="joined" faz com que o 'role' seja carregado junto com o 'user'
     role = relationship("Role", lazy="joined") 
 
+    @property
+    def avatar_url(self) -> str | None:
+        """URL da foto de perfil; o parâmetro 'v' muda sempre que a foto muda."""
+        if not self.avatar_hash:
+            return None
+        return f"/users/{self.id}/avatar?v={self.avatar_hash[:16]}"
+
+    @property
+    def avatar_thumbnail_url(self) -> str | None:
+        """URL da miniatura usada em listagens (evita baixar a foto inteira)."""
+        if not self.avatar_hash:
+            return None
+        return f"/users/{self.id}/avatar?size={AVATAR_LIST_THUMBNAIL_SIZE}&v={self.avatar_hash[:16]}"
+
 # ==================================
 # SCHEMAS (Pydantic)
 # (Refletem a estrutura acima para entrada e saída da API)
@@ -52,7 +74,7 @@ class UserCreate(BaseModel):
     password: str = Field(min_length=8)
     nome: str | None = Field(default=None, min_length=3, max_length=100)
     moeda: CurrencyType = Field(default=CurrencyType.BRL)
-    profile_image_base64: str | None = None
+    profile_image_base64: str | None = Field(default=None, description="Foto de perfil em base64 (guardada no AvatarStore)")
     role_id: int = Field(description="ID do role (ex: 1 para admin, 2 para user)")
 
 class UserUpdate(BaseModel):
@@ -69,5 +91,6 @@ class UserPublic(BaseModel):
     email: EmailStr
     nome: str | None
     moeda: CurrencyType
-    profile_image_base64: str | None
+    avatar_url: str | None = None # A imagem é servida por GET /users/{id}/avatar
+    avatar_thumbnail_url: str | None = None # Miniatura 128x128
     role: RolePublic # Retorna o objeto Role aninhado
\ No newline at end of file
@@ -1,5 +1,6 @@
 # app/users/repository.py
 from sqlalchemy.orm import Session
+from datetime import datetime, timezone
 from . import model # Importa model.py
 # A importação 'security' vai falhar até criarmos o 'auth'.
 from security import get_password_hash 
@@ -11,18 +12,23 @@ def get_user(db: Session, id_user: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(model.User).filter(model.User.email == email).first()
 
+def get_token_version(db: Session, id_user: int):
+    """Busca apenas a versão do token do usuário (sem carregar a linha inteira)."""
+    return db.query(model.User.token_version).filter(model.User.id == id_user).scalar()
+
 def get_users(db: Session):
     return db.query(model.User).all()
 
 # --- FUNÇÃO DE CRIAÇÃO (CREATE) ---
-def create_user(db: Session, user: model.UserCreate):
+def create_user(db: Session, user: model.UserCreate, avatar_hash: str | None = None):
     hashed_password = get_password_hash(user.password)
     db_user = model.User(
         email=user.email, 
         hashed_password=hashed_password, 
         nome=user.nome,
         moeda=user.moeda,
-        profile_image_base64=user.profile_image_base64,
+        avatar_hash=avatar_hash, # A imagem em si fica no AvatarStore
+        avatar_updated_at=datetime.now(timezone.utc) if avatar_hash else None,
         role_id=user.role_id
     )
     db.add(db_user)
@@ -32,7 +38,8 @@ def create_user(db: Session, user: model.UserCreate):
 
 # --- FUNÇÃO DE ATUALIZAÇÃO (UPDATE) ---
 def update_user(db: Session, db_user: model.User, user_in: model.UserUpdate):
-    update_data = user_in.model_dump(exclude_unset=True)
+    # A foto é tratada separadamente (set_avatar), não vai para a coluna legada
+    update_data = user_in.model_dump(exclude_unset=True, exclude={"profile_image_base64"})
     
     for key, value in update_data.items():
          setattr(db_user, key, value)
@@ -42,6 +49,29 @@ def update_user(db: Session, db_user: model.User, user_in: model.UserUpdate):
     db.refresh(db_user)
     return db_user
 
+def set_avatar(db: Session, db_user: model.User, avatar_hash: str | None):
+    """Aponta a foto de perfil do usuário para uma imagem do AvatarStore (ou remove)."""
+    db_user.avatar_hash = avatar_hash
+    db_user.avatar_updated_at = datetime.now(timezone.utc)
+    db_user.profile_image_base64 = None # Limpa a cópia legada, se existir
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+def get_users_with_legacy_avatar(db: Session, limit: int):
+    """Busca (id, base64) de usuários cuja foto ainda está na coluna legada."""
+    return db.query(model.User.id, model.User.profile_image_base64).filter(
+        model.User.profile_image_base64.isnot(None)
+    ).order_by(model.User.id).limit(limit).all()
+
+def increment_token_version(db: Session, db_user: model.User):
+    db_user.token_version = model.User.token_version + 1
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
 # --- FUNÇÃO DE DELEÇÃO (DELETE) ---
 def delete_user(db: Session, db_user: model.User):
     db.delete(db_user)
@@ -1,8 +1,87 @@
 # app/users/service.py
+import base64
+import binascii
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from . import repository, model # Importa repository.py e model.py
+from .avatar_store import get_avatar_store, variant_key
+from .avatar_images import render_avatar, AVATAR_THUMBNAIL_SIZES
 from app.roles import repository as roles_repository # Importa o repo de roles
+from app.auth.cache import principal_cache, token_version_cache # Caches de usuários autenticados
+
+# --- FOTO DE PERFIL ---
+
+def _decode_base64_image(image_base64: str) -> bytes:
+    """Decodifica a foto enviada em base64 (aceita também o formato 'data:image/png;base64,...')."""
+    if image_base64.startswith("data:") and "," in image_base64:
+        image_base64 = image_base64.split(",", 1)[1]
+    try:
+        return base64.b64decode(image_base64, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid base64 image")
+
+def _store_avatar_image(source) -> str:
+    """
+    Redimensiona a foto, gera as miniaturas e guarda tudo no AvatarStore.
+    Retorna o hash da versão "cheia" (as miniaturas usam chaves derivadas dele).
+    """
+    try:
+        full, thumbnails = render_avatar(source)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image")
+    store = get_avatar_store()
+    avatar_hash = store.put(full)
+    for size, data in thumbnails.items():
+        store.write(variant_key(avatar_hash, size), data)
+    return avatar_hash
+
+def _store_base64_avatar(image_base64: str) -> str:
+    """Guarda a foto enviada em base64 no AvatarStore e retorna o hash do conteúdo."""
+    return _store_avatar_image(_decode_base64_image(image_base64))
+
+def save_uploaded_avatar(db: Session, id_user: int, file_path: str):
+    """Processa a foto enviada via upload (já gravada em 'file_path') e a associa ao usuário."""
+    db_user = get_user_by_id(db, id_user)
+    avatar_hash = _store_avatar_image(file_path)
+    db_user = repository.set_avatar(db=db, db_user=db_user, avatar_hash=avatar_hash)
+    principal_cache.invalidate(db_user.email)
+    return db_user
+
+def get_avatar(db: Session, id_user: int, size: int | None = None):
+    """
+    Retorna (conteúdo, hash, data de atualização) da foto de perfil do usuário.
+    Com 'size', retorna a miniatura correspondente (ou a foto cheia, se ela não existir).
+    """
+    db_user = get_user_by_id(db, id_user)
+    avatar_hash = db_user.avatar_hash
+    if not avatar_hash:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    store = get_avatar_store()
+    data = None
+    if size in AVATAR_THUMBNAIL_SIZES:
+        data = store.read(variant_key(avatar_hash, size))
+    if data is None:
+        data = store.read(avatar_hash)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    return data, avatar_hash, db_user.avatar_updated_at
+
+def migrate_legacy_avatars(db: Session, batch_size: int = 100) -> int:
+    """Move as fotos ainda guardadas em 'profile_image_base64' para o AvatarStore."""
+    migrated = 0
+    while True:
+        rows = repository.get_users_with_legacy_avatar(db, limit=batch_size)
+        if not rows:
+            return migrated
+        for id_user, image_base64 in rows:
+            db_user = get_user_by_id(db, id_user)
+            try:
+                avatar_hash = _store_base64_avatar(image_base64)
+            except HTTPException:
+                avatar_hash = None # Base64 inválido: descarta a foto quebrada
+            repository.set_avatar(db=db, db_user=db_user, avatar_hash=avatar_hash)
+            principal_cache.invalidate(db_user.email)
+            migrated += 1
 
 def create_new_user(db: Session, user: model.UserCreate):
     db_user = repository.get_user_by_email(db, email=user.email)
@@ -14,7 +93,8 @@ def create_new_user(db: Session, user: model.UserCreate):
     if not db_role:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Role with ID {user.role_id} not found")
 
-    return repository.create_user(db=db, user=user)
+    avatar_hash = _store_base64_avatar(user.profile_image_base64) if user.profile_image_base64 else None
+    return repository.create_user(db=db, user=user, avatar_hash=avatar_hash)
 
 def get_all_users(db: Session):
     return repository.get_users(db)
@@ -27,8 +107,36 @@ def get_user_by_id(db: Session, id_user: int):
 
 def update_existing_user(db: Session, id_user: int, user_in: model.UserUpdate):
     db_user = get_user_by_id(db, id_user)
-    return repository.update_user(db=db, db_user=db_user, user_in=user_in)
+    old_moeda = db_user.moeda
+    avatar_changed = "profile_image_base64" in user_in.model_fields_set
+    if avatar_changed:
+        image_base64 = user_in.profile_image_base64
+        avatar_hash = _store_base64_avatar(image_base64) if image_base64 else None
+    db_user = repository.update_user(db=db, db_user=db_user, user_in=user_in)
+    if avatar_changed:
+        db_user = repository.set_avatar(db=db, db_user=db_user, avatar_hash=avatar_hash)
+    if db_user.moeda != old_moeda:
+        # A moeda vai dentro do token (modo stateless): os tokens antigos não valem mais
+        return revoke_user_tokens(db, id_user=id_user)
+    # Remove do cache a versão antiga do usuário autenticado (após o commit)
+    principal_cache.invalidate(db_user.email)
+    return db_user
+
+def revoke_user_tokens(db: Session, id_user: int):
+    """
+    Invalida todos os tokens já emitidos para o usuário (incrementa 'token_version').
+    Deve ser chamado sempre que o role ou a moeda do usuário mudar.
+    """
+    db_user = get_user_by_id(db, id_user)
+    db_user = repository.increment_token_version(db=db, db_user=db_user)
+    principal_cache.invalidate(db_user.email)
+    token_version_cache.invalidate(id_user)
+    return db_user
 
 def delete_user_by_id(db: Session, id_user: int):
     db_user = get_user_by_id(db, id_user)
-    return repository.delete_user(db=db, db_user=db_user)
\ No newline at end of file
+    email = db_user.email
+    db_user = repository.delete_user(db=db, db_user=db_user)
+    principal_cache.invalidate(email)
+    token_version_cache.invalidate(id_user)
+    return db_user
\ No newline at end of file
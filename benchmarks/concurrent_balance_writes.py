@@ -0,0 +1,153 @@
+# benchmarks/concurrent_balance_writes.py
+"""
+Benchmark de escritas concorrentes no saldo de UMA conta.
+
+N threads (padrão 50) criam transações na mesma conta ao mesmo tempo, cada uma
+com sua própria sessão do banco. No fim, compara o saldo gravado com o saldo
+esperado (saldo inicial + soma das transações) e mostra a vazão.
+
+  --mode atomic  usa o serviço atual (saldo_atual = saldo_atual + delta, 1 commit)
+  --mode legacy  reproduz o caminho antigo (lê a conta, soma em Python, 2 commits)
+                 para comparação; costuma perder atualizações.
+
+Usa o banco de DATABASE_URL (rode contra um PostgreSQL de teste):
+    python benchmarks/concurrent_balance_writes.py --writers 50 --per-writer 40
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from app.roles.model import Role  # noqa: E402
+from app.users.model import User  # noqa: E402
+from app.accounts.model import Account, AccountType  # noqa: E402
+from app.categories.model import Category, CategoryType  # noqa: E402
+from app.transactions.model import Transaction, TransactionCreate  # noqa: E402
+from app.transfers.model import Transfer  # noqa: E402, F401
+from app.transactions import service as transactions_service  # noqa: E402
+
+INITIAL_BALANCE = Decimal("1000.00")
+
+def _setup() -> tuple[int, int]:
+    """Cria um usuário e uma conta descartáveis para o teste."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        role = db.query(Role).first()
+        if role is None:
+            role = Role(name="user")
+            db.add(role)
+            db.flush()
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="-", role_id=role.id)
+        db.add(user)
+        db.flush()
+        account = Account(
+            nome="Benchmark", tipo=AccountType.BANCO, usuario_id=user.id,
+            saldo_inicial=INITIAL_BALANCE, saldo_atual=INITIAL_BALANCE,
+        )
+        db.add(account)
+        db.commit()
+        return user.id, account.id
+    finally:
+        db.close()
+
+def _teardown(user_id: int, account_id: int):
+    db = SessionLocal()
+    try:
+        db.query(Transaction).filter(Transaction.conta_id == account_id).delete()
+        db.query(Account).filter(Account.id == account_id).delete()
+        db.query(Category).filter(Category.usuario_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def _legacy_create(db, transaction: TransactionCreate, user_id: int):
+    """Caminho antigo: INSERT + commit, depois lê a conta, soma em Python e faz outro commit."""
+    db_transaction = Transaction(
+        descricao=transaction.descricao, valor=transaction.valor, tipo=transaction.tipo,
+        data=transaction.data, conta_id=transaction.conta_id, usuario_id=user_id,
+    )
+    db.add(db_transaction)
+    db.commit()
+    db_account = db.query(Account).filter(Account.id == transaction.conta_id).first()
+    saldo = Decimal(str(db_account.saldo_atual))
+    valor = Decimal(str(transaction.valor))
+    db_account.saldo_atual = float(saldo - valor if transaction.tipo == CategoryType.DESPESA else saldo + valor)
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--per-writer", type=int, default=40)
+    parser.add_argument("--mode", choices=["atomic", "legacy"], default="atomic")
+    parser.add_argument("--keep", action="store_true", help="não apaga o usuário/conta de teste")
+    args = parser.parse_args()
+
+    user_id, account_id = _setup()
+    create = transactions_service.create_new_transaction if args.mode == "atomic" else _legacy_create
+    expected_delta = Decimal("0")
+    errors: list[Exception] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.writers)
+
+    def writer(index: int):
+        nonlocal expected_delta
+        db = SessionLocal()
+        local_delta = Decimal("0")
+        try:
+            start_barrier.wait()
+            for i in range(args.per_writer):
+                # Alterna receitas e despesas com centavos para pegar erros de arredondamento
+                tipo = CategoryType.RECEITA if (index + i) % 2 else CategoryType.DESPESA
+                valor = Decimal("1.01") + Decimal(i % 7) / 100
+                transaction = TransactionCreate(
+                    descricao=f"bench {index}/{i}", valor=float(valor), tipo=tipo,
+                    data=date.today(), conta_id=account_id,
+                )
+                try:
+                    create(db, transaction=transaction, user_id=user_id)
+                    local_delta += valor if tipo == CategoryType.RECEITA else -valor
+                except Exception as e:  # Conta a falha e segue
+                    db.rollback()
+                    with lock:
+                        errors.append(e)
+        finally:
+            db.close()
+            with lock:
+                expected_delta += local_delta
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        final_balance = Decimal(str(db.query(Account.saldo_atual).filter(Account.id == account_id).scalar()))
+    finally:
+        db.close()
+    expected_balance = INITIAL_BALANCE + expected_delta
+    writes = args.writers * args.per_writer - len(errors)
+
+    print(f"modo:            {args.mode}")
+    print(f"escritas:        {writes} ({len(errors)} falhas) em {elapsed:.2f}s -> {writes / elapsed:.1f} escritas/s")
+    print(f"saldo esperado:  {expected_balance}")
+    print(f"saldo gravado:   {final_balance}")
+    print(f"diferença:       {final_balance - expected_balance}")
+
+    if not args.keep:
+        _teardown(user_id, account_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/concurrent_transfers.py
+"""
+Teste de carga de transferências concorrentes entre poucas contas.
+
+N threads (padrão 50) fazem transferências em sentidos opostos entre as mesmas
+contas ao mesmo tempo, cada uma com sua própria sessão do banco. No fim, mostra
+a vazão e confere:
+  - deadlocks / erros inesperados (devem ser zero);
+  - saldo de cada conta = saldo inicial + entradas - saídas (diferença zero);
+  - nenhuma conta abaixo de -limite_credito (sem saque a descoberto).
+
+Usa o banco de DATABASE_URL (rode contra um PostgreSQL de teste):
+    python benchmarks/concurrent_transfers.py --writers 50 --per-writer 40 --accounts 2
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from app.roles.model import Role  # noqa: E402
+from app.users.model import User  # noqa: E402
+from app.accounts.model import Account, AccountType  # noqa: E402
+from app.categories.model import Category  # noqa: E402, F401
+from app.transactions.model import Transaction  # noqa: E402, F401
+from app.transfers.model import Transfer, TransferCreate  # noqa: E402
+from app.transfers import service as transfers_service  # noqa: E402
+
+def _setup(accounts: int, balance: Decimal, limit: Decimal) -> tuple[int, list[int]]:
+    """Cria um usuário e 'accounts' contas descartáveis para o teste."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        role = db.query(Role).first()
+        if role is None:
+            role = Role(name="user")
+            db.add(role)
+            db.flush()
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="-", role_id=role.id)
+        db.add(user)
+        db.flush()
+        created = [
+            Account(
+                nome=f"Benchmark {n}", tipo=AccountType.BANCO, usuario_id=user.id,
+                saldo_inicial=balance, saldo_atual=balance, limite_credito=limit,
+            )
+            for n in range(accounts)
+        ]
+        db.add_all(created)
+        db.commit()
+        return user.id, [a.id for a in created]
+    finally:
+        db.close()
+
+def _teardown(user_id: int):
+    db = SessionLocal()
+    try:
+        db.query(Transfer).filter(Transfer.usuario_id == user_id).delete()
+        db.query(Account).filter(Account.usuario_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def _check(user_id: int, account_ids: list[int]) -> list[tuple]:
+    """Retorna (conta, saldo gravado, saldo esperado, limite) de cada conta."""
+    db = SessionLocal()
+    try:
+        outgoing = dict(db.query(Transfer.conta_origem_id, func.sum(Transfer.valor))
+                        .filter(Transfer.usuario_id == user_id).group_by(Transfer.conta_origem_id).all())
+        incoming = dict(db.query(Transfer.conta_destino_id, func.sum(Transfer.valor))
+                        .filter(Transfer.usuario_id == user_id).group_by(Transfer.conta_destino_id).all())
+        result = []
+        for account in db.query(Account).filter(Account.id.in_(account_ids)).order_by(Account.id):
+            expected = (Decimal(account.saldo_inicial)
+                        + Decimal(incoming.get(account.id) or 0)
+                        - Decimal(outgoing.get(account.id) or 0))
+            result.append((account.id, Decimal(account.saldo_atual), expected, Decimal(account.limite_credito or 0)))
+        return result
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--per-writer", type=int, default=40)
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--balance", type=Decimal, default=Decimal("100.00"), help="saldo inicial de cada conta")
+    parser.add_argument("--limit", type=Decimal, default=Decimal("50.00"), help="limite de crédito de cada conta")
+    parser.add_argument("--keep", action="store_true", help="não apaga o usuário/contas de teste")
+    args = parser.parse_args()
+    if args.accounts < 2:
+        parser.error("--accounts precisa ser pelo menos 2")
+
+    user_id, account_ids = _setup(args.accounts, args.balance, args.limit)
+    outcomes: Counter[str] = Counter()
+    unexpected: list[Exception] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(args.writers)
+
+    def writer(index: int):
+        rng = random.Random(index)
+        db = SessionLocal()
+        local: Counter[str] = Counter()
+        try:
+            start_barrier.wait()
+            for _ in range(args.per_writer):
+                origem, destino = rng.sample(account_ids, 2)
+                transfer = TransferCreate(
+                    valor=float(Decimal(rng.randint(1, 2500)) / 100), data=date.today(),
+                    conta_origem_id=origem, conta_destino_id=destino,
+                )
+                try:
+                    transfers_service.create_new_transfer(db, transfer=transfer, id_user=user_id)
+                    local["ok"] += 1
+                except HTTPException as e:
+                    db.rollback()
+                    local[f"http {e.status_code}"] += 1
+                except Exception as e:  # Deadlock, timeout de trava etc.
+                    db.rollback()
+                    local["erro"] += 1
+                    with lock:
+                        unexpected.append(e)
+        finally:
+            db.close()
+            with lock:
+                outcomes.update(local)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"tentativas:      {args.writers * args.per_writer} em {elapsed:.2f}s")
+    print(f"transferências:  {outcomes['ok']} -> {outcomes['ok'] / elapsed:.1f} transferências/s")
+    print(f"recusadas (400): {outcomes['http 400']} (saldo insuficiente)")
+    print(f"erros:           {outcomes['erro']}")
+    for e in unexpected[:5]:
+        print(f"  {type(e).__name__}: {str(e).splitlines()[0]}")
+
+    drift = Decimal("0")
+    for account_id, stored, expected, limit in _check(user_id, account_ids):
+        drift += abs(stored - expected)
+        overdrawn = " (ESTOUROU O LIMITE)" if stored < -limit else ""
+        print(f"conta {account_id}: gravado {stored} | esperado {expected} | diferença {stored - expected}{overdrawn}")
+    print(f"diferença total: {drift}")
+
+    if not args.keep:
+        _teardown(user_id)
+
+if __name__ == "__main__":
+    main()
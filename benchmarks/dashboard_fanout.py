@@ -0,0 +1,83 @@
+# benchmarks/dashboard_fanout.py
+"""
+Compara a abertura do app em duas formas:
+  fan-out:   GET /users/me, /accounts/, /categories/, /transactions/ e /transfers/ em sequência
+  dashboard: um único GET /dashboard
+
+Cada "abertura" é medida de ponta a ponta (soma das chamadas em sequência).
+Mostra p50/p95/p99 de cada forma e quantas aberturas por segundo cada uma sustenta.
+
+Com a API rodando (uvicorn app.main:app) e um usuário já cadastrado:
+    python benchmarks/dashboard_fanout.py --email user@example.com --password senha123
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+FANOUT_PATHS = ["/users/me", "/accounts/", "/categories/", "/transactions/", "/transfers/"]
+DASHBOARD_PATHS = ["/dashboard"]
+
+def _login(base_url: str, email: str, password: str) -> str:
+    form = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    with urllib.request.urlopen(base_url + "/auth/login", data=form, timeout=60) as response:
+        return json.loads(response.read())["access_token"]
+
+def _open_app(base_url: str, token: str, paths: list[str]) -> tuple[int, float]:
+    """Faz as chamadas em sequência (como o app) e retorna (pior status, tempo total em ms)."""
+    started = time.perf_counter()
+    worst = 200
+    for path in paths:
+        request = urllib.request.Request(base_url + path, headers={"Authorization": f"Bearer {token}"})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        worst = max(worst, status)
+    return worst, (time.perf_counter() - started) * 1000
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _run(name: str, base_url: str, token: str, paths: list[str], total: int, concurrency: int):
+    _open_app(base_url, token, paths) # Aquecimento
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _open_app(base_url, token, paths), range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = [ms for _, ms in results]
+    statuses = Counter(status for status, _ in results)
+    print(
+        f"{name:<10} aberturas={total:<5} requisições={total * len(paths):<6} "
+        f"p50={_percentile(latencies, 50):8.1f}ms "
+        f"p95={_percentile(latencies, 95):8.1f}ms "
+        f"p99={_percentile(latencies, 99):8.1f}ms "
+        f"{total / elapsed:7.1f} aberturas/s status={dict(statuses)}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--opens", type=int, default=200, help="aberturas do app medidas em cada forma")
+    parser.add_argument("--concurrency", type=int, default=8, help="aberturas simultâneas")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    token = _login(base_url, args.email, args.password)
+    _run("fan-out", base_url, token, FANOUT_PATHS, args.opens, args.concurrency)
+    _run("dashboard", base_url, token, DASHBOARD_PATHS, args.opens, args.concurrency)
+
+if __name__ == "__main__":
+    main()
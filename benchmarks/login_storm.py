@@ -0,0 +1,95 @@
+# benchmarks/login_storm.py
+"""
+Benchmark de "tempestade de logins".
+
+Dispara muitos POST /auth/login em paralelo e, ao mesmo tempo, mede a latência
+de um endpoint que não tem nada a ver com senha (por padrão GET /).
+Mostra p50/p95/p99 de cada um e quantos logins foram rejeitados com 429.
+
+Com a API rodando (uvicorn app.main:app) e um usuário já cadastrado:
+    python benchmarks/login_storm.py --email user@example.com --password senha123
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def _request(url: str, data: bytes | None = None) -> tuple[int, float]:
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - started) * 1000
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _report(name: str, results: list[tuple[int, float]]):
+    latencies = [ms for _, ms in results]
+    statuses = Counter(status for status, _ in results)
+    print(
+        f"{name:<10} n={len(results):<6} "
+        f"p50={_percentile(latencies, 50):8.1f}ms "
+        f"p95={_percentile(latencies, 95):8.1f}ms "
+        f"p99={_percentile(latencies, 99):8.1f}ms "
+        f"status={dict(statuses)}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=500, help="total de logins disparados")
+    parser.add_argument("--concurrency", type=int, default=32, help="logins simultâneos")
+    parser.add_argument("--probe-path", default="/", help="endpoint não relacionado medido durante a tempestade")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="intervalo entre sondagens (s)")
+    args = parser.parse_args()
+
+    login_url = args.base_url.rstrip("/") + "/auth/login"
+    probe_url = args.base_url.rstrip("/") + args.probe_path
+    form = urllib.parse.urlencode({"username": args.email, "password": args.password}).encode()
+
+    # Latência de referência do endpoint não relacionado (sem carga)
+    baseline = [_request(probe_url) for _ in range(50)]
+
+    probe_results: list[tuple[int, float]] = []
+    storm_running = threading.Event()
+    storm_running.set()
+
+    def probe():
+        while storm_running.is_set():
+            probe_results.append(_request(probe_url))
+            time.sleep(args.probe_interval)
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        login_results = list(pool.map(lambda _: _request(login_url, form), range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    storm_running.clear()
+    prober.join()
+
+    ok = sum(1 for status, _ in login_results if status == 200)
+    print(f"logins: {args.logins} em {elapsed:.1f}s ({ok / elapsed:.1f} logins aceitos/s)")
+    _report("login", [r for r in login_results if r[0] == 200])
+    _report("login-429", [r for r in login_results if r[0] == 429])
+    _report("baseline", baseline)
+    _report("probe", probe_results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/search_latency.py
+"""
+Latência da busca nas descrições (o mesmo caminho de GET /transactions/search).
+
+Cria N transações (padrão 1.000.000) com descrições variadas para usuários
+descartáveis, roda buscas com palavras existentes, prefixos e erros de digitação
+e mostra p50/p95/p99. Os usuários ficam com '--rows / --users' transações cada;
+as buscas são sempre no primeiro deles.
+
+Usa o banco de DATABASE_URL (no PostgreSQL, com o índice pg_trgm já criado pela API
+ou por 'python -m app.transactions.search'):
+    python benchmarks/search_latency.py --rows 1000000 --users 10 --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from app.roles.model import Role  # noqa: E402
+from app.users.model import User  # noqa: E402
+from app.accounts.model import Account, AccountType  # noqa: E402
+from app.categories.model import Category, CategoryType  # noqa: E402
+from app.transactions.model import Transaction  # noqa: E402
+from app.transactions import search  # noqa: E402
+
+WORDS = [
+    "padaria", "supermercado", "farmacia", "posto", "restaurante", "uber", "ifood", "netflix",
+    "aluguel", "condominio", "energia", "agua", "internet", "academia", "livraria", "cinema",
+    "pet", "shop", "mercado", "pao", "acucar", "central", "extra", "sao", "joao", "quente",
+]
+INSERT_BATCH = 10_000
+
+def _describe(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title() + f" {rng.randint(1, 9999)}"
+
+def _setup(rows: int, users: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Cria os usuários (cada um com uma conta) e as transações. Retorna [(usuário, conta)]."""
+    Base.metadata.create_all(bind=engine)
+    search.ensure_search_indexes(engine)
+    db = SessionLocal()
+    try:
+        role = db.query(Role).first()
+        if role is None:
+            role = Role(name="user")
+            db.add(role)
+            db.flush()
+        owners = []
+        for _ in range(users):
+            user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="-", role_id=role.id)
+            db.add(user)
+            db.flush()
+            account = Account(nome="Benchmark", tipo=AccountType.BANCO, usuario_id=user.id, saldo_inicial=0, saldo_atual=0)
+            db.add(account)
+            db.flush()
+            owners.append((user.id, account.id))
+        db.commit()
+
+        start = date.today() - timedelta(days=3650)
+        batch = []
+        for i in range(rows):
+            user_id, account_id = owners[i % users]
+            batch.append({
+                "descricao": _describe(rng), "valor": 10, "tipo": CategoryType.DESPESA,
+                "data": start + timedelta(days=rng.randrange(3650)), "conta_id": account_id, "usuario_id": user_id,
+            })
+            if len(batch) >= INSERT_BATCH:
+                db.execute(insert(Transaction.__table__), batch)
+                db.commit()
+                batch = []
+        if batch:
+            db.execute(insert(Transaction.__table__), batch)
+            db.commit()
+        return owners
+    finally:
+        db.close()
+
+def _teardown(owners: list[tuple[int, int]]):
+    db = SessionLocal()
+    try:
+        user_ids = [user_id for user_id, _ in owners]
+        db.query(Transaction).filter(Transaction.usuario_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(Account).filter(Account.usuario_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(Category).filter(Category.usuario_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def _query(rng: random.Random) -> str:
+    word = rng.choice(WORDS)
+    kind = rng.random()
+    if kind < 0.3 and len(word) > 4:
+        return word[: len(word) - 2] # Prefixo
+    if kind < 0.6 and len(word) > 4:
+        i = rng.randrange(1, len(word) - 1)
+        return word[:i] + word[i + 1:] # Erro de digitação (letra faltando)
+    return word
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="não apaga os dados criados")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    owners = _setup(args.rows, args.users, rng)
+    print(f"{args.rows} transações criadas em {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+    user_id = owners[0][0]
+    try:
+        db = SessionLocal()
+        try:
+            first = time.perf_counter()
+            search.search_transactions(db, user_id=user_id, query=WORDS[0], limit=args.limit)
+            print(f"primeira busca (monta o índice em memória fora do PostgreSQL): {(time.perf_counter() - first) * 1000:.1f}ms")
+            latencies, hits = [], 0
+            for _ in range(args.queries):
+                t0 = time.perf_counter()
+                hits += bool(search.search_transactions(db, user_id=user_id, query=_query(rng), limit=args.limit))
+                db.rollback() # Cada busca é uma requisição (transação) separada
+                latencies.append((time.perf_counter() - t0) * 1000)
+        finally:
+            db.close()
+        print(
+            f"buscas={args.queries} com resultado={hits} "
+            f"p50={_percentile(latencies, 50):.1f}ms p95={_percentile(latencies, 95):.1f}ms "
+            f"p99={_percentile(latencies, 99):.1f}ms"
+        )
+    finally:
+        if not args.keep:
+            _teardown(owners)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # database.py
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import Table, create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -35,4 +36,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# 6. Colunas novas em tabelas já existentes: o create_all só cria as tabelas que
+#    faltam, nunca altera as que já existem. Chamado na subida da API, depois do create_all.
+def add_missing_columns(bind: Engine, table: Table, defaults: dict[str, str | None]):
+    """
+    Adiciona à 'table' no banco as colunas de 'defaults' ({coluna: DEFAULT em SQL ou None})
+    que ainda não existem, com o tipo e o NOT NULL do model. O DEFAULT preenche as
+    linhas antigas (obrigatório para colunas NOT NULL).
+    """
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    missing = [name for name in defaults if name not in existing]
+    if not missing:
+        return
+    # IF NOT EXISTS: vários workers podem subir ao mesmo tempo (o SQLite não tem, mas também não tem workers)
+    if_not_exists = "IF NOT EXISTS " if bind.dialect.name == "postgresql" else ""
+    with bind.begin() as conn:
+        for name in missing:
+            column = table.c[name]
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{name} {column.type.compile(dialect=bind.dialect)}"
+            if defaults[name] is not None:
+                ddl += f" DEFAULT {defaults[name]}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            conn.execute(text(ddl))
+            print(f"✅ Coluna {table.name}.{name} criada")
+
@@ -0,0 +1,45 @@
+# pagination.py
+import base64
+import binascii
+import json
+from fastapi import HTTPException, Response, status
+
+# --- PAGINAÇÃO POR CURSOR (KEYSET) ---
+# Em vez de OFFSET (que fica mais lento a cada página), a próxima página começa
+# logo depois da última linha retornada. O cursor é opaco para o cliente: apenas
+# a chave de ordenação da última linha, em JSON + base64.
+
+MAX_PAGE_SIZE = 500
+# Header com o cursor da próxima página (ausente na última página)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: list) -> str:
+    """Codifica a chave de ordenação da última linha da página em um cursor opaco."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodifica um cursor gerado por 'encode_cursor' (400 se for inválido)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+def paginate(rows: list, limit: int | None, key) -> tuple[list, str | None]:
+    """
+    Recebe até 'limit + 1' linhas (a extra só indica que há mais páginas) e
+    retorna (itens da página, cursor da próxima página ou None).
+    'key' extrai de uma linha a lista de valores da chave de ordenação.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,5 +1,9 @@
 # security.py
 import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
@@ -11,6 +15,9 @@ from pydantic import BaseModel
 SECRET_KEY = os.getenv("SECRET_KEY", "8f3a1b2c4d5e6f70")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 # Tempo de validade do token
+# Modo "stateless": quando ativo, as rotas que só precisam da identidade do
+# usuário confiam no id/role/moeda gravados no token e não consultam a tabela 'users'.
+STATELESS_AUTH = os.getenv("STATELESS_AUTH", "false").lower() in ("1", "true", "yes")
 
 # --- HASHING DE SENHA (ARGON2ID) ---
 # Argon2id é o algoritmo de hashing recomendado pela OWASP (2024)
@@ -18,13 +25,64 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30 # Tempo de validade do token
 # ALTERADO: schemes=["bcrypt"] -> schemes=["argon2"] para resolver incompatibilidade
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# O Argon2 é propositalmente caro (CPU e memória). Para que uma rajada de logins
+# não ocupe todas as threads do servidor, o cálculo roda em um pool de processos
+# separado, com um limite de tarefas simultâneas (executando + na fila).
+# PASSWORD_HASH_WORKERS=0 desativa o pool e calcula o hash na própria thread.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(max(PASSWORD_HASH_WORKERS, 1) * 2)))
+
+class PasswordHasherBusy(Exception):
+    """Lançada quando o pool de hashing está saturado (a API responde 429)."""
+
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(max(PASSWORD_HASH_QUEUE_LIMIT, 1))
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            # 'spawn' evita herdar conexões do banco e threads do processo da API
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _hash_executor
+
+def _reset_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        _hash_executor = None
+
+def _run_in_hash_pool(fn, *args):
+    """Executa 'fn' no pool de hashing ou lança PasswordHasherBusy se ele estiver cheio."""
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return _get_hash_executor().submit(fn, *args).result()
+    except BrokenProcessPool:
+        # Um processo do pool morreu; o próximo pedido cria um pool novo
+        _reset_hash_executor()
+        raise
+    finally:
+        _hash_slots.release()
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se uma senha em texto puro corresponde a um hash salvo."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_in_hash_pool(_verify_password, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Gera o hash de uma senha em texto puro usando Argon2id."""
-    return pwd_context.hash(password)
+    return _run_in_hash_pool(_hash_password, password)
 
 # --- GERENCIAMENTO DE TOKEN JWT ---
 
@@ -40,4 +98,7 @@ def create_access_token(data: dict):
 # Schema Pydantic para os dados que guardamos dentro do token
 class TokenData(BaseModel):
     email: str | None = None
-    role: str | None = None
\ No newline at end of file
+    role: str | None = None
+    user_id: int | None = None # claim 'uid'
+    moeda: str | None = None
+    version: int | None = None # claim 'ver' (versão do token do usuário)
\ No newline at end of file
@@ -0,0 +1,66 @@
+# streaming.py
+import csv
+import enum
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator
+from fastapi.responses import StreamingResponse
+
+# --- EXPORTAÇÃO EM STREAMING (CSV / NDJSON) ---
+# As linhas chegam do banco aos poucos (yield_per / cursor no servidor) e são
+# enviadas ao cliente em blocos, então a memória usada não depende do total de linhas.
+
+EXPORT_BATCH_SIZE = 1000 # Linhas buscadas do banco por vez
+_ROWS_PER_CHUNK = 500 # Linhas por bloco enviado ao cliente
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+def _plain(value):
+    """Converte os tipos do banco para valores simples (CSV/JSON)."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def iter_csv(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_plain(v) for v in row])
+        if count % _ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_ndjson(columns: list[str], rows: Iterable[tuple]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False))
+        if len(lines) >= _ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines.clear()
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def stream_rows(columns: list[str], rows: Iterable[tuple], formato: ExportFormat, filename: str) -> StreamingResponse:
+    """Monta a resposta em streaming para as linhas (tuplas) informadas."""
+    body = iter_csv(columns, rows) if formato == ExportFormat.CSV else iter_ndjson(columns, rows)
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{formato.value}"'},
+    )
@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import sys
+
+# Os testes de unidade não precisam do PostgreSQL: 'database.py' só cria a engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,28 @@
+# tests/test_categorizer.py
+from app.categories.model import CategoryType
+from app.transactions.categorizer import CategoryIndex
+
+def test_suggest_uses_the_most_frequent_category():
+    index = CategoryIndex()
+    for _ in range(3):
+        index.learn(["padaria"], CategoryType.DESPESA, 1)
+    index.learn(["padaria"], CategoryType.DESPESA, 2)
+    assert index.suggest(["padaria"], CategoryType.DESPESA) == (1, 0.75)
+
+def test_unlearning_an_unknown_category_keeps_totals_consistent():
+    # Transação apagada/recategorizada que o índice não contou (fora do histórico carregado)
+    index = CategoryIndex()
+    for _ in range(3):
+        index.learn(["padaria"], CategoryType.DESPESA, 1)
+    index.learn(["padaria"], CategoryType.DESPESA, 2, weight=-1)
+    assert index.suggest(["padaria"], CategoryType.DESPESA) == (1, 1.0)
+    key = (CategoryType.DESPESA, "padaria")
+    assert index.totals[key] == sum(index.counts[key].values())
+
+def test_unlearning_the_last_occurrence_forgets_the_word():
+    index = CategoryIndex()
+    index.learn(["padaria"], CategoryType.DESPESA, 1)
+    index.learn(["padaria"], CategoryType.DESPESA, 1, weight=-1)
+    index.learn(["padaria"], CategoryType.DESPESA, 1, weight=-1)
+    assert index.suggest(["padaria"], CategoryType.DESPESA) is None
+    assert index.counts == {} and index.totals == {}
@@ -0,0 +1,139 @@
+# tests/test_importer.py
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.categories.model import CategoryType
+from app.transactions import importer
+
+class CountingStream(io.BytesIO):
+    """BytesIO que conta os bytes lidos (o TextIOWrapper do parser o fecha ao terminar)."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read1(self, size=-1):
+        data = super().read1(size)
+        self.bytes_read += len(data)
+        return data
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+def test_ofx_without_tags_is_rejected_without_reading_the_whole_file():
+    stream = CountingStream(b"data,descricao,valor\n" + b"2026-01-01,Padaria,-10\n" * 100_000)
+    with pytest.raises(ValueError, match="OFX"):
+        next(importer.iter_ofx_rows(stream))
+    # Parou nos primeiros blocos, sem acumular o resto do arquivo
+    assert stream.bytes_read < 4 * importer._OFX_CHUNK_SIZE
+
+@pytest.mark.parametrize("text, expected", [
+    ("10", "10"),
+    ("-50.00", "-50.00"),
+    ("1.234,56", "1234.56"),
+    ("1,234.56", "1234.56"),
+    ("R$ 10,00", "10.00"),
+    ("-R$ 1.000,5", "-1000.5"),
+])
+def test_parse_amount(text, expected):
+    assert importer.parse_amount(text) == Decimal(expected)
+
+@pytest.mark.parametrize("text", ["", "abc", "R$"])
+def test_parse_amount_invalid(text):
+    with pytest.raises(ValueError):
+        importer.parse_amount(text)
+
+@pytest.mark.parametrize("text, expected", [
+    ("2026-01-31", date(2026, 1, 31)),
+    ("31/01/2026", date(2026, 1, 31)),
+    ("20260131", date(2026, 1, 31)),
+    ("20260131120000[-3:BRT]", date(2026, 1, 31)),
+    (" 2026-01-31 ", date(2026, 1, 31)),
+])
+def test_parse_date(text, expected):
+    assert importer.parse_date(text) == expected
+
+@pytest.mark.parametrize("text", ["", "31-01-2026", "2026-02-30"])
+def test_parse_date_invalid(text):
+    with pytest.raises(ValueError):
+        importer.parse_date(text)
+
+def _csv(text: str, encoding: str = "utf-8-sig"):
+    return list(importer.iter_csv_rows(io.BytesIO(text.encode(encoding)), encoding=encoding))
+
+def test_csv_comma_delimiter():
+    rows = _csv("data,descricao,valor\n2026-01-05,Padaria,-10.50\n")
+    assert rows == [(2, {"data": "2026-01-05", "descricao": "Padaria", "valor": "-10.50"})]
+
+def test_csv_semicolon_delimiter_and_aliases():
+    # Cabeçalho com acento e maiúsculas, ';' e vírgula decimal (formato de banco brasileiro)
+    rows = _csv("Data Lançamento;Histórico;Valor (R$);Tipo\n05/01/2026;Padaria, centro;10,50;D\n", "latin-1")
+    assert rows == [(2, {"data": "05/01/2026", "descricao": "Padaria, centro", "valor": "10,50", "tipo": "D"})]
+
+def test_csv_skips_blank_lines_and_keeps_line_numbers():
+    rows = _csv("date,amount\n2026-01-01,1\n\n , \n2026-01-02,2\n")
+    assert [(line, raw["valor"]) for line, raw in rows] == [(2, "1"), (5, "2")]
+
+def test_csv_short_row_fills_missing_fields():
+    rows = _csv("data,valor,descricao\n2026-01-01,1\n")
+    assert rows[0][1]["descricao"] == ""
+
+def test_csv_requires_date_and_amount_columns():
+    with pytest.raises(ValueError):
+        _csv("descricao,valor\nPadaria,10\n")
+
+def test_csv_unterminated_quote_raises_csv_error():
+    with pytest.raises(csv.Error):
+        _csv('data,descricao,valor\n2026-01-01,"' + "a" * 200_000 + "\n")
+
+_OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20260105120000[-3:BRT]
+<TRNAMT>-10.50
+<MEMO>Padaria São João
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20260106
+<TRNAMT>1000.00
+<NAME>Salário
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+_OFX_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20260105</DTPOSTED><TRNAMT>-10.50</TRNAMT><MEMO>Padaria São João</MEMO></STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20260106</DTPOSTED><TRNAMT>1000.00</TRNAMT><NAME>Salário</NAME></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+@pytest.mark.parametrize("content, encoding", [(_OFX_SGML, "latin-1"), (_OFX_XML, "utf-8")])
+def test_ofx_rows(content, encoding):
+    rows = list(importer.iter_ofx_rows(io.BytesIO(content.encode(encoding)), encoding=encoding))
+    assert [(number, raw["valor"], raw["descricao"]) for number, raw in rows] == [
+        (1, "-10.50", "Padaria São João"),
+        (2, "1000.00", "Salário"),
+    ]
+    assert importer.parse_date(rows[0][1]["data"]) == date(2026, 1, 5)
+
+def test_ofx_tag_split_across_chunks(monkeypatch):
+    monkeypatch.setattr(importer, "_OFX_CHUNK_SIZE", 7) # Tags e valores cortados entre blocos
+    rows = list(importer.iter_ofx_rows(io.BytesIO(_OFX_SGML.encode("latin-1"))))
+    assert [raw["valor"] for _, raw in rows] == ["-10.50", "1000.00"]
+
+def test_build_transaction_infers_type_from_sign():
+    t = importer.build_transaction({"data": "2026-01-05", "valor": "-10,50", "descricao": " Padaria "}, conta_id=1)
+    assert (t.tipo, t.valor, t.descricao) == (CategoryType.DESPESA, 10.5, "Padaria")
+    t = importer.build_transaction({"data": "2026-01-05", "valor": "10", "tipo": "Débito"}, conta_id=1)
+    assert t.tipo == CategoryType.DESPESA
@@ -0,0 +1,104 @@
+# tests/test_recurring_schedule.py
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.recurring.model import Frequency
+from app.recurring.runner import RECURRING_MAX_CATCH_UP
+from app.recurring.schedule import first_on_or_after, occurrences_until
+
+def make_rule(**fields):
+    rule = dict(
+        frequencia=Frequency.MENSAL, intervalo=1, data_inicio=date(2026, 1, 10),
+        dia_do_mes=None, dia_da_semana=None, data_fim=None,
+    )
+    rule.update(fields)
+    rule.setdefault("proxima_data", rule["data_inicio"])
+    return SimpleNamespace(**rule)
+
+# --- first_on_or_after ---
+
+@pytest.mark.parametrize("frequencia,intervalo,data_inicio,dia_do_mes,dia_da_semana,when,expected", [
+    # Mensal: dia 31 cai no último dia dos meses mais curtos
+    (Frequency.MENSAL, 1, date(2026, 1, 31), 31, None, date(2026, 2, 1), date(2026, 2, 28)),
+    (Frequency.MENSAL, 1, date(2028, 1, 31), 31, None, date(2028, 2, 1), date(2028, 2, 29)),
+    (Frequency.MENSAL, 1, date(2026, 1, 31), 31, None, date(2026, 3, 1), date(2026, 3, 31)),
+    (Frequency.MENSAL, 1, date(2026, 1, 31), 31, None, date(2026, 4, 1), date(2026, 4, 30)),
+    # Sem dia_do_mes, usa o dia de data_inicio
+    (Frequency.MENSAL, 1, date(2026, 1, 31), None, None, date(2026, 2, 1), date(2026, 2, 28)),
+    # Antes do início, a primeira ocorrência é o próprio início
+    (Frequency.MENSAL, 1, date(2026, 3, 10), None, None, date(2026, 1, 1), date(2026, 3, 10)),
+    # Dia do mês anterior ao dia do início: começa no mês seguinte
+    (Frequency.MENSAL, 1, date(2026, 1, 20), 5, None, date(2026, 1, 1), date(2026, 2, 5)),
+    # A cada 2 meses: só meses múltiplos do intervalo a partir do início
+    (Frequency.MENSAL, 2, date(2026, 1, 15), None, None, date(2026, 2, 16), date(2026, 3, 15)),
+    (Frequency.MENSAL, 2, date(2026, 1, 15), None, None, date(2026, 3, 16), date(2026, 5, 15)),
+    (Frequency.MENSAL, 2, date(2026, 11, 15), None, None, date(2026, 12, 1), date(2027, 1, 15)),
+    # Semanal: 2026-01-01 é quinta; sem dia_da_semana, usa o dia de data_inicio
+    (Frequency.SEMANAL, 1, date(2026, 1, 1), None, None, date(2026, 1, 1), date(2026, 1, 1)),
+    (Frequency.SEMANAL, 1, date(2026, 1, 1), None, None, date(2026, 1, 2), date(2026, 1, 8)),
+    # Segunda-feira (0) depois do início
+    (Frequency.SEMANAL, 1, date(2026, 1, 1), None, 0, date(2026, 1, 1), date(2026, 1, 5)),
+    (Frequency.SEMANAL, 1, date(2026, 1, 1), None, 0, date(2026, 1, 6), date(2026, 1, 12)),
+    # A cada 2 semanas: pula a segunda-feira intermediária
+    (Frequency.SEMANAL, 2, date(2026, 1, 1), None, 0, date(2026, 1, 6), date(2026, 1, 19)),
+    (Frequency.SEMANAL, 2, date(2026, 1, 1), None, 0, date(2026, 1, 19), date(2026, 1, 19)),
+])
+def test_first_on_or_after(frequencia, intervalo, data_inicio, dia_do_mes, dia_da_semana, when, expected):
+    assert first_on_or_after(frequencia, intervalo, data_inicio, dia_do_mes, dia_da_semana, when) == expected
+
+# --- occurrences_until ---
+
+@pytest.mark.parametrize("fields,until,limit,expected_dates,expected_next", [
+    # Dia 31 ao longo dos meses: volta ao 31 depois de fevereiro
+    (
+        dict(data_inicio=date(2026, 1, 31), dia_do_mes=31), date(2026, 5, 31), 100,
+        [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31)],
+        date(2026, 6, 30),
+    ),
+    # Nada vencido ainda
+    (dict(), date(2026, 1, 9), 100, [], date(2026, 1, 10)),
+    # data_fim no meio: para e não há próxima
+    (
+        dict(data_fim=date(2026, 3, 15)), date(2026, 6, 30), 100,
+        [date(2026, 1, 10), date(2026, 2, 10), date(2026, 3, 10)], None,
+    ),
+    # data_fim exatamente numa ocorrência: ela entra
+    (
+        dict(data_fim=date(2026, 3, 10)), date(2026, 6, 30), 100,
+        [date(2026, 1, 10), date(2026, 2, 10), date(2026, 3, 10)], None,
+    ),
+    # until antes de data_fim: a próxima continua agendada
+    (
+        dict(data_fim=date(2026, 12, 31)), date(2026, 2, 20), 100,
+        [date(2026, 1, 10), date(2026, 2, 10)], date(2026, 3, 10),
+    ),
+    # Semanal com limite: a próxima é a primeira que ficou de fora
+    (
+        dict(frequencia=Frequency.SEMANAL, data_inicio=date(2026, 1, 5)), date(2026, 12, 31), 3,
+        [date(2026, 1, 5), date(2026, 1, 12), date(2026, 1, 19)], date(2026, 1, 26),
+    ),
+    # Regra encerrada
+    (dict(proxima_data=None), date(2026, 12, 31), 100, [], None),
+])
+def test_occurrences_until(fields, until, limit, expected_dates, expected_next):
+    assert occurrences_until(make_rule(**fields), until, limit) == (expected_dates, expected_next)
+
+def test_catch_up_is_capped_and_resumes_without_repeating_dates():
+    # Regra semanal parada há anos: cada execução lança no máximo RECURRING_MAX_CATCH_UP
+    start = date(2010, 1, 4)
+    rule = make_rule(frequencia=Frequency.SEMANAL, data_inicio=start)
+    until = date(2026, 10, 17)
+
+    dates, next_date = occurrences_until(rule, until, RECURRING_MAX_CATCH_UP)
+    assert len(dates) == RECURRING_MAX_CATCH_UP
+    assert dates[0] == start
+    assert dates[-1] == start + timedelta(weeks=RECURRING_MAX_CATCH_UP - 1)
+    assert next_date == start + timedelta(weeks=RECURRING_MAX_CATCH_UP)
+
+    # A execução seguinte continua da próxima data: nenhuma data lançada duas vezes
+    rule.proxima_data = next_date
+    more, _ = occurrences_until(rule, until, RECURRING_MAX_CATCH_UP)
+    assert more[0] == next_date
+    assert not set(dates) & set(more)